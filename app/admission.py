@@ -0,0 +1,151 @@
+import asyncio
+import logging
+from collections import deque
+from fastapi import HTTPException, status
+from app.config import settings
+from app.metrics import metrics
+
+logger = logging.getLogger(__name__)
+
+# Highest priority first. Wallet writes and order creation move money;
+# reads can be retried; signup and login are the cheapest to turn away.
+CRITICAL = "critical"
+STANDARD = "standard"
+LOW = "low"
+PRIORITIES = (CRITICAL, STANDARD, LOW)
+
+
+class AdmissionRejected(Exception):
+    def __init__(self, priority: str, reason: str):
+        super().__init__(f"{priority} request shed: {reason}")
+        self.priority = priority
+        self.reason = reason
+
+
+class AdmissionController:
+    """Cap in-flight DB work per priority class and shed excess load fast.
+
+    A class is admitted only while total in-flight work is below its limit,
+    so lower classes leave headroom for higher ones. Requests over their
+    limit wait in a bounded per-class queue until a slot frees up or their
+    deadline passes; freed slots go to the highest-priority waiter first.
+    All methods must be called from the event loop, which serializes them.
+    """
+
+    def __init__(self, limits: dict[str, int], timeouts: dict[str, float], max_queue: int):
+        self.limits = limits
+        self.timeouts = timeouts
+        self.max_queue = max_queue
+        self.in_flight = 0
+        self._waiters: dict[str, deque[asyncio.Future]] = {priority: deque() for priority in PRIORITIES}
+
+    @classmethod
+    def from_settings(cls) -> "AdmissionController":
+        capacity = settings.admission_max_in_flight or (settings.db_pool_size + settings.db_max_overflow)
+        return cls(
+            limits={
+                CRITICAL: capacity,
+                STANDARD: max(int(capacity * settings.admission_standard_share), 1),
+                LOW: max(int(capacity * settings.admission_low_share), 1),
+            },
+            timeouts={
+                CRITICAL: settings.admission_critical_timeout_ms / 1000,
+                STANDARD: settings.admission_standard_timeout_ms / 1000,
+                LOW: settings.admission_low_timeout_ms / 1000,
+            },
+            max_queue=settings.admission_max_queue,
+        )
+
+    def queued(self) -> int:
+        return sum(len(waiters) for waiters in self._waiters.values())
+
+    def _has_priority_waiters(self, priority: str) -> bool:
+        for other in PRIORITIES:
+            if self._waiters[other]:
+                return True
+            if other == priority:
+                return False
+        return False
+
+    async def acquire(self, priority: str):
+        if self.in_flight < self.limits[priority] and not self._has_priority_waiters(priority):
+            self.in_flight += 1
+            metrics.increment(f"admission.{priority}.admitted")
+            return
+
+        if self.queued() >= self.max_queue:
+            metrics.increment(f"admission.{priority}.shed")
+            raise AdmissionRejected(priority, "queue full")
+
+        waiter = asyncio.get_running_loop().create_future()
+        self._waiters[priority].append(waiter)
+        metrics.increment(f"admission.{priority}.queued")
+        try:
+            await asyncio.wait({waiter}, timeout=self.timeouts[priority])
+        except asyncio.CancelledError:
+            # Client went away while queued: hand back a slot we may have been granted.
+            if waiter.done():
+                self.release()
+            else:
+                self._waiters[priority].remove(waiter)
+            raise
+        if waiter.done():
+            metrics.increment(f"admission.{priority}.admitted")
+            return
+
+        self._waiters[priority].remove(waiter)
+        waiter.cancel()
+        metrics.increment(f"admission.{priority}.shed")
+        raise AdmissionRejected(priority, "queue deadline exceeded")
+
+    def release(self):
+        self.in_flight -= 1
+        for priority in PRIORITIES:
+            waiters = self._waiters[priority]
+            while waiters and self.in_flight < self.limits[priority]:
+                self.in_flight += 1
+                waiters.popleft().set_result(None)
+            if waiters:
+                # Do not let lower classes overtake a blocked higher class.
+                return
+
+    def stats(self) -> dict:
+        return {
+            "enabled": settings.enable_graceful_degradation,
+            "in_flight": self.in_flight,
+            "limits": self.limits,
+            "queued": {priority: len(waiters) for priority, waiters in self._waiters.items()},
+        }
+
+
+admission_controller = AdmissionController.from_settings()
+metrics.register_collector("admission", lambda: admission_controller.stats())
+
+
+def admission(priority: str):
+    """Route dependency that holds an admission slot for the whole request.
+
+    Only active when ``enable_graceful_degradation`` is set; otherwise every
+    request is admitted immediately, matching the previous behavior.
+    """
+
+    async def admit():
+        if not settings.enable_graceful_degradation:
+            yield
+            return
+        controller = admission_controller
+        try:
+            await controller.acquire(priority)
+        except AdmissionRejected as exc:
+            logger.warning("admission.shed", extra={"priority": priority, "reason": exc.reason})
+            raise HTTPException(
+                status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+                detail="Service overloaded, please retry",
+                headers={"Retry-After": str(settings.admission_retry_after_seconds)},
+            )
+        try:
+            yield
+        finally:
+            controller.release()
+
+    return admit
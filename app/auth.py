@@ -1,55 +1,37 @@
 from fastapi import Depends, HTTPException, status
-from fastapi.security import HTTPBearer, HTTPAuthorizationCredentials
+from fastapi.security import APIKeyHeader, HTTPBearer, HTTPAuthorizationCredentials
 from jose import JWTError, jwt
 from datetime import datetime, timedelta, timezone
 from uuid import UUID
 import logging
-import base64
-import hashlib
 import hmac
-import secrets
 from app.config import settings
+from app.kdf import password_policy
+from app.revocation import revoked_sessions
+from app.tracing import span
 
 SECRET_KEY = settings.secret_key
 ALGORITHM = settings.algorithm
 ACCESS_TOKEN_EXPIRE_MINUTES = settings.access_token_expire_minutes
-PBKDF2_ITERATIONS = 100_000
 
 security = HTTPBearer()
+admin_key_header = APIKeyHeader(name="X-Admin-Key", auto_error=False)
 logger = logging.getLogger(__name__)
 
 
-def hash_password(password: str) -> str:
-    """Hash a password using PBKDF2-HMAC-SHA256."""
-    salt = secrets.token_bytes(16)
-    digest = hashlib.pbkdf2_hmac(
-        "sha256",
-        password.encode("utf-8"),
-        salt,
-        PBKDF2_ITERATIONS
-    )
-    salt_b64 = base64.b64encode(salt).decode("ascii")
-    digest_b64 = base64.b64encode(digest).decode("ascii")
-    return f"pbkdf2_sha256${PBKDF2_ITERATIONS}${salt_b64}${digest_b64}"
+def hash_password(password: str, salt: bytes | None = None) -> str:
+    """Hash a password under the current KDF policy (random salt unless given)."""
+    return password_policy.hash(password, salt)
 
 
 def verify_password(plain_password: str, hashed_password: str) -> bool:
-    """Verify a plain password against stored PBKDF2 hash."""
-    try:
-        scheme, iterations, salt_b64, digest_b64 = hashed_password.split("$", 3)
-        if scheme != "pbkdf2_sha256":
-            return False
-        salt = base64.b64decode(salt_b64.encode("ascii"))
-        expected = base64.b64decode(digest_b64.encode("ascii"))
-        actual = hashlib.pbkdf2_hmac(
-            "sha256",
-            plain_password.encode("utf-8"),
-            salt,
-            int(iterations)
-        )
-        return hmac.compare_digest(actual, expected)
-    except Exception:
-        return False
+    """Verify a plain password against a stored PBKDF2 or scrypt hash."""
+    return password_policy.verify(plain_password, hashed_password)
+
+
+def password_needs_rehash(hashed_password: str) -> bool:
+    """Whether a verified hash should be re-created with the current KDF policy."""
+    return password_policy.needs_rehash(hashed_password)
 
 
 def create_access_token(data: dict) -> str:
@@ -65,12 +47,23 @@ async def get_current_user(
     credentials: HTTPAuthorizationCredentials = Depends(security)
 ):
     """Return authenticated user id from bearer token."""
-    token = credentials.credentials
+    with span("auth.get_current_user"):
+        return _user_id_from_token(credentials.credentials)
 
+
+def _user_id_from_token(token: str) -> UUID:
     try:
         payload = jwt.decode(token, SECRET_KEY, algorithms=[ALGORITHM])
         user_id = payload.get("sub")
 
+        session_id = payload.get("sid")
+        if session_id is not None and revoked_sessions.is_revoked(session_id):
+            logger.warning("auth.token.session_revoked", extra={"subject": str(user_id), "session_id": session_id})
+            raise HTTPException(
+                status_code=status.HTTP_401_UNAUTHORIZED,
+                detail="Session revoked",
+            )
+
         if user_id is None:
             logger.warning("auth.token.invalid_payload_missing_sub")
             raise HTTPException(
@@ -94,3 +87,15 @@ async def get_current_user(
             status_code=status.HTTP_401_UNAUTHORIZED,
             detail="Invalid or expired token",
         )
+
+
+async def require_admin(api_key: str | None = Depends(admin_key_header)):
+    """Guard operator endpoints with ``ADMIN_API_KEY``; they do not exist while it is unset."""
+    if not settings.admin_api_key:
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Not Found")
+    if not api_key or not hmac.compare_digest(api_key.encode("utf-8"), settings.admin_api_key.encode("utf-8")):
+        logger.warning("auth.admin.rejected")
+        raise HTTPException(
+            status_code=status.HTTP_401_UNAUTHORIZED,
+            detail="Invalid admin key",
+        )
@@ -0,0 +1,145 @@
+from collections import OrderedDict
+from datetime import datetime
+from threading import Lock
+from time import monotonic
+from typing import NamedTuple, Optional
+from uuid import UUID
+
+
+CACHE_MISS = object()
+
+
+class UserRecord(NamedTuple):
+    """Immutable snapshot of a user row, safe to share across sessions and threads."""
+
+    id: UUID
+    email: str
+    full_name: str
+    phone: Optional[str]
+    hashed_password: str
+    created_at: datetime
+    is_active: bool
+
+    @classmethod
+    def from_model(cls, user) -> "UserRecord":
+        return cls(
+            id=user.id,
+            email=user.email,
+            full_name=user.full_name,
+            phone=user.phone,
+            hashed_password=user.hashed_password,
+            created_at=user.created_at,
+            is_active=user.is_active,
+        )
+
+
+class UserCache:
+    """Bounded in-memory LRU of user records keyed by id and email.
+
+    Unknown emails are cached as negative entries with a shorter TTL so
+    repeated failed logins do not reach the database. An entry is only
+    stored if nothing was invalidated since ``version()`` was read before the
+    lookup, so a concurrent signup or password change is never hidden behind
+    a stale miss or a stale record. A cache with ``max_entries=0`` stores nothing and always misses.
+    """
+
+    def __init__(self, max_entries: int, ttl_seconds: float, negative_ttl_seconds: float):
+        self.max_entries = max_entries
+        self.ttl_seconds = ttl_seconds
+        self.negative_ttl_seconds = negative_ttl_seconds
+        self._entries: OrderedDict[str, tuple[float, Optional[UserRecord]]] = OrderedDict()
+        self._lock = Lock()
+        self._version = 0
+        self.hits = 0
+        self.negative_hits = 0
+        self.misses = 0
+
+    @staticmethod
+    def _id_key(user_id: UUID) -> str:
+        return f"id:{user_id}"
+
+    @staticmethod
+    def _email_key(email: str) -> str:
+        return f"email:{email}"
+
+    def _get(self, key: str):
+        now = monotonic()
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None or entry[0] <= now:
+                if entry is not None:
+                    del self._entries[key]
+                self.misses += 1
+                return CACHE_MISS
+            self._entries.move_to_end(key)
+            if entry[1] is None:
+                self.negative_hits += 1
+            else:
+                self.hits += 1
+            return entry[1]
+
+    def _set_locked(self, key: str, value: Optional[UserRecord], ttl: float):
+        self._entries[key] = (monotonic() + ttl, value)
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
+
+    def get_by_id(self, user_id: UUID):
+        """Return the cached record, or ``CACHE_MISS``."""
+        return self._get(self._id_key(user_id))
+
+    def get_by_email(self, email: str):
+        """Return the cached record, ``None`` for a known-unknown email, or ``CACHE_MISS``."""
+        return self._get(self._email_key(email))
+
+    def put(self, record: UserRecord, version: int):
+        if self.max_entries <= 0:
+            return
+        with self._lock:
+            if version != self._version:
+                # The user changed after the lookup started; the record may be stale.
+                return
+            self._set_locked(self._id_key(record.id), record, self.ttl_seconds)
+            self._set_locked(self._email_key(record.email), record, self.ttl_seconds)
+
+    def version(self) -> int:
+        """Invalidation counter; read it before the database lookup a fill is based on."""
+        return self._version
+
+    def put_missing_email(self, email: str, version: int):
+        if self.max_entries <= 0:
+            return
+        with self._lock:
+            if version != self._version:
+                # A signup or profile change landed after the lookup started.
+                return
+            self._set_locked(self._email_key(email), None, self.negative_ttl_seconds)
+
+    def invalidate(self, user_id: Optional[UUID] = None, email: Optional[str] = None):
+        """Drop every entry for a user; call after signup or any profile change."""
+        with self._lock:
+            self._version += 1
+            if user_id is not None:
+                entry = self._entries.pop(self._id_key(user_id), None)
+                if entry is not None and entry[1] is not None:
+                    self._entries.pop(self._email_key(entry[1].email), None)
+            if email is not None:
+                entry = self._entries.pop(self._email_key(email), None)
+                if entry is not None and entry[1] is not None:
+                    self._entries.pop(self._id_key(entry[1].id), None)
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+            self.hits = 0
+            self.negative_hits = 0
+            self.misses = 0
+
+    def stats(self) -> dict:
+        with self._lock:
+            return {
+                "entries": len(self._entries),
+                "hits": self.hits,
+                "negative_hits": self.negative_hits,
+                "misses": self.misses,
+            }
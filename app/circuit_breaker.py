@@ -0,0 +1,164 @@
+import logging
+import math
+from threading import Lock
+from time import monotonic
+from fastapi import HTTPException, status
+from sqlalchemy import event
+from sqlalchemy.exc import DBAPIError, DisconnectionError, TimeoutError as PoolTimeoutError
+from app.config import settings
+from app.metrics import metrics
+
+logger = logging.getLogger(__name__)
+
+CLOSED = "closed"
+OPEN = "open"
+HALF_OPEN = "half_open"
+
+
+def is_connection_failure(exc: BaseException) -> bool:
+    """True for errors that mean the database cannot be reached, not that a query failed."""
+    if isinstance(exc, (PoolTimeoutError, DisconnectionError)):
+        return True
+    return isinstance(exc, DBAPIError) and exc.connection_invalidated
+
+
+class CircuitBreaker:
+    """Stop sending requests to a database that keeps failing to connect.
+
+    ``failure_threshold`` consecutive connection failures open the circuit.
+    While open, ``admit`` rejects requests without touching the pool, so
+    they fail in microseconds instead of waiting out pre-ping retries and
+    connect timeouts. After ``cooldown_seconds`` the circuit is half-open:
+    up to ``half_open_max_probes`` requests at a time go through, and the
+    first successful connection checkout closes it while a failure reopens
+    it for another cooldown. Outcomes are recorded from engine and pool
+    events, so background workers and the health monitor probe too.
+    Methods are called from worker threads and guarded by a lock.
+    """
+
+    def __init__(self, failure_threshold: int, cooldown_seconds: float, half_open_max_probes: int):
+        self.failure_threshold = failure_threshold
+        self.cooldown_seconds = cooldown_seconds
+        self.half_open_max_probes = half_open_max_probes
+        self.state = CLOSED
+        self.consecutive_failures = 0
+        self.opened_at: float | None = None
+        self._probes = 0
+        self._lock = Lock()
+
+    @classmethod
+    def from_settings(cls) -> "CircuitBreaker":
+        return cls(
+            failure_threshold=settings.db_circuit_failure_threshold,
+            cooldown_seconds=settings.db_circuit_cooldown_seconds,
+            half_open_max_probes=settings.db_circuit_half_open_max_probes,
+        )
+
+    def _open(self, now: float):
+        self.state = OPEN
+        self.opened_at = now
+        self._probes = 0
+        metrics.increment("db_circuit.opened")
+        logger.error(
+            "db_circuit.opened",
+            extra={"consecutive_failures": self.consecutive_failures, "cooldown_seconds": self.cooldown_seconds},
+        )
+
+    def retry_after(self) -> int:
+        """Whole seconds until the circuit goes half-open (at least 1)."""
+        if self.opened_at is None:
+            return 1
+        return max(math.ceil(self.opened_at + self.cooldown_seconds - monotonic()), 1)
+
+    def allow(self) -> bool | None:
+        """Admit a request: True as a half-open probe, False when rejected, None otherwise."""
+        if self.state == CLOSED:
+            return None
+        with self._lock:
+            if self.state == OPEN:
+                if monotonic() - self.opened_at < self.cooldown_seconds:
+                    return False
+                self.state = HALF_OPEN
+                logger.info("db_circuit.half_open")
+            if self.state == HALF_OPEN:
+                if self._probes >= self.half_open_max_probes:
+                    return False
+                self._probes += 1
+                return True
+            return None
+
+    def release_probe(self):
+        with self._lock:
+            self._probes = max(self._probes - 1, 0)
+
+    def record_success(self):
+        if self.state == CLOSED and self.consecutive_failures == 0:
+            return
+        with self._lock:
+            self.consecutive_failures = 0
+            if self.state == HALF_OPEN:
+                self.state = CLOSED
+                self.opened_at = None
+                metrics.increment("db_circuit.closed")
+                logger.info("db_circuit.closed")
+
+    def record_failure(self):
+        with self._lock:
+            if self.state == OPEN:
+                return
+            self.consecutive_failures += 1
+            metrics.increment("db_circuit.failures")
+            if self.state == HALF_OPEN or self.consecutive_failures >= self.failure_threshold:
+                self._open(monotonic())
+
+    def stats(self) -> dict:
+        return {
+            "enabled": settings.enable_graceful_degradation,
+            "state": self.state,
+            "consecutive_failures": self.consecutive_failures,
+            "retry_after_seconds": self.retry_after() if self.state == OPEN else None,
+        }
+
+
+db_breaker = CircuitBreaker.from_settings()
+metrics.register_collector("db_circuit", lambda: db_breaker.stats())
+
+
+def install(engine):
+    """Feed ``db_breaker`` from ``engine``: connect/disconnect errors fail, checkouts succeed."""
+
+    @event.listens_for(engine, "handle_error")
+    def _on_error(context):
+        # A failed pre-ping is retried with a fresh connection; only count the outcome.
+        if context.is_pre_ping:
+            return
+        if context.connection is None:
+            # Could not connect at all. Dialects only classify broken connections
+            # as disconnects; mark this one too so is_connection_failure sees it.
+            context.is_disconnect = True
+        if context.is_disconnect:
+            db_breaker.record_failure()
+
+    # Fires after pool_pre_ping has proven the connection alive.
+    event.listen(engine, "checkout", lambda *args: db_breaker.record_success())
+
+
+def unavailable() -> HTTPException:
+    return HTTPException(
+        status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+        detail={"error": "database_unavailable", "circuit": db_breaker.state},
+        headers={"Retry-After": str(db_breaker.retry_after())},
+    )
+
+
+def admit() -> bool:
+    """Fail fast with 503 while the circuit is open; returns whether this is a probe.
+
+    Only rejects when ``enable_graceful_degradation`` is set; otherwise the
+    breaker just tracks state for health and metrics.
+    """
+    admitted = db_breaker.allow()
+    if admitted is False and settings.enable_graceful_degradation:
+        metrics.increment("db_circuit.rejected")
+        raise unavailable()
+    return bool(admitted)
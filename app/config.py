@@ -8,6 +8,14 @@ class Settings(BaseSettings):
     secret_key: str
     algorithm: str = "HS256"
     access_token_expire_minutes: int = 30
+    refresh_token_expire_days: int = 30
+    revocation_poll_seconds: float = 10.0
+    password_scheme: str = "pbkdf2_sha256"
+    password_hash_target_ms: float = 100.0
+    password_pbkdf2_min_iterations: int = 100_000
+    password_pbkdf2_max_iterations: int = 2_000_000
+    password_scrypt_min_n: int = 16_384
+    password_scrypt_max_n: int = 131_072
     log_level: str = "INFO"
     log_format: str = "plain"
     create_tables_on_startup: bool = False
@@ -15,12 +23,73 @@ class Settings(BaseSettings):
     db_max_overflow: int = 20
     db_pool_timeout: int = 30
     db_pool_recycle: int = 1800
+    worker_threads: int = 0
+    threadpool_sample_size: int = 4096
+    loop_stall_threshold_ms: float = 250.0
     cors_origins: List[str] = []
     enable_graceful_degradation: bool = False
+    db_circuit_failure_threshold: int = 5
+    db_circuit_cooldown_seconds: float = 10.0
+    db_circuit_half_open_max_probes: int = 1
     enable_strict_idempotency_check: bool = False
     transaction_settlement_window: int = 0
     login_attempt_limit: int = 5
     login_attempt_window_seconds: int = 300
+    user_cache_max_entries: int = 10000
+    user_cache_ttl_seconds: int = 60
+    user_cache_negative_ttl_seconds: int = 10
+    read_coalescing_enabled: bool = True
+    health_check_interval_seconds: float = 5.0
+    health_check_timeout_seconds: float = 2.0
+    health_snapshot_max_age_seconds: float = 15.0
+    admission_max_in_flight: int = 0
+    admission_standard_share: float = 0.8
+    admission_low_share: float = 0.5
+    admission_max_queue: int = 100
+    admission_critical_timeout_ms: int = 2000
+    admission_standard_timeout_ms: int = 1000
+    admission_low_timeout_ms: int = 250
+    admission_retry_after_seconds: int = 1
+    orders_partition_months_ahead: int = 3
+    # orders_default catches rows outside every monthly partition, but forces
+    # archival to detach under ACCESS EXCLUSIVE (no DETACH CONCURRENTLY).
+    orders_default_partition: bool = False
+    settlement_batch_size: int = 500
+    settlement_poll_interval_seconds: float = 1.0
+    outbox_batch_size: int = 500
+    outbox_poll_interval_seconds: float = 0.5
+    outbox_sink: str = "ndjson"
+    outbox_sink_path: str = "outbox.ndjson"
+    db_prepare_threshold: int = 2
+    db_pipeline_enabled: bool = True
+    query_capture_path: str = ""
+    traffic_capture_path: str = ""
+    traffic_capture_sample_rate: float = 0.01
+    db_retry_max_attempts: int = 4
+    db_retry_base_delay_ms: int = 10
+    db_retry_max_delay_ms: int = 200
+    db_retry_deadline_ms: int = 2000
+    db_budget_wallet_write_statement_timeout_ms: int = 2000
+    db_budget_wallet_write_lock_timeout_ms: int = 500
+    db_budget_order_write_statement_timeout_ms: int = 3000
+    db_budget_order_write_lock_timeout_ms: int = 1000
+    db_budget_default_statement_timeout_ms: int = 2000
+    db_budget_default_lock_timeout_ms: int = 1000
+    db_budget_export_statement_timeout_ms: int = 30000
+    db_budget_export_lock_timeout_ms: int = 1000
+    db_budget_retry_after_seconds: int = 1
+    wallet_lock_sketch_size: int = 128
+    wallet_lock_sample_size: int = 4096
+    wallet_lock_slow_ms: float = 200.0
+    admin_api_key: str = ""
+    tracing_enabled: bool = False
+    trace_sample_rate: float = 0.01
+    trace_tail_sample_rate: float = 0.1
+    trace_slow_ms: float = 500.0
+    trace_buffer_size: int = 200
+    trace_export_path: str = ""
+    money_storage: str = "numeric"
+    wallet_currency: str = "INR"
 
     model_config = SettingsConfigDict(env_file=".env")
 
@@ -31,4 +100,18 @@ class Settings(BaseSettings):
             return [origin.strip() for origin in value.split(",") if origin.strip()]
         return value
 
+    @field_validator("password_scheme")
+    @classmethod
+    def validate_password_scheme(cls, value):
+        if value not in ("pbkdf2_sha256", "scrypt"):
+            raise ValueError("password_scheme must be 'pbkdf2_sha256' or 'scrypt'")
+        return value
+
+    @field_validator("money_storage")
+    @classmethod
+    def validate_money_storage(cls, value):
+        if value not in ("numeric", "minor_units"):
+            raise ValueError("money_storage must be 'numeric' or 'minor_units'")
+        return value
+
 settings = Settings()
@@ -1,11 +1,42 @@
+from contextlib import contextmanager
 from sqlalchemy import create_engine, text
-from sqlalchemy.orm import sessionmaker
+from sqlalchemy.engine import make_url
+from sqlalchemy.exc import DBAPIError, TimeoutError as PoolTimeoutError
+from sqlalchemy.orm import Session, sessionmaker
 import logging
+from app import circuit_breaker
 from app.config import settings
 from app.models import Base
+from app.tracing import TracedQueuePool
 
 logger = logging.getLogger(__name__)
 
+
+def _connect_args(database_url: str) -> dict:
+    """Driver-specific connection arguments.
+
+    ``postgresql+psycopg://`` selects psycopg 3, which prepares a statement
+    server-side once a connection has run it ``DB_PREPARE_THRESHOLD`` times.
+    A negative threshold disables preparing (needed behind PgBouncer in
+    transaction mode). psycopg2 (``postgresql://``) has no equivalent.
+    """
+    if make_url(database_url).get_driver_name() != "psycopg":
+        return {}
+    threshold = settings.db_prepare_threshold
+    return {"prepare_threshold": threshold if threshold >= 0 else None}
+
+
+def _pool_options(database_url: str) -> dict:
+    """Pool class for server databases: a QueuePool that traces checkout waits.
+
+    SQLite keeps SQLAlchemy's default pool for the URL (in-memory databases
+    must not get a QueuePool).
+    """
+    if make_url(database_url).get_backend_name() == "sqlite":
+        return {}
+    return {"poolclass": TracedQueuePool}
+
+
 engine = create_engine(
     settings.database_url,
     pool_pre_ping=True,
@@ -13,8 +44,17 @@ engine = create_engine(
     max_overflow=settings.db_max_overflow,
     pool_timeout=settings.db_pool_timeout,
     pool_recycle=settings.db_pool_recycle,
+    connect_args=_connect_args(settings.database_url),
+    **_pool_options(settings.database_url),
 )
 
+circuit_breaker.install(engine)
+
+if settings.query_capture_path:
+    from app.query_capture import QueryCapture
+
+    QueryCapture(settings.query_capture_path).install()
+
 SessionLocal = sessionmaker(
     autocommit=False,
     autoflush=False,
@@ -24,9 +64,41 @@ SessionLocal = sessionmaker(
 def init_db():
     logger.info("db.init.started")
     Base.metadata.create_all(bind=engine)
+    if engine.dialect.name == "postgresql":
+        from app.partitions import ensure_order_partitions
+
+        ensure_order_partitions(
+            engine,
+            months_ahead=settings.orders_partition_months_ahead,
+            default_partition=settings.orders_default_partition,
+        )
     logger.info("db.init.succeeded")
 
 
+@contextmanager
+def pipeline(db: Session):
+    """Send the statements issued inside as one batch when the driver is psycopg 3.
+
+    Only for statements whose results are not read before the block exits:
+    Core INSERT/UPDATE without RETURNING, and ORM flushes of inserts whose
+    keys are set client-side. The ORM checks UPDATE rowcounts immediately,
+    so ORM updates must not be flushed inside. Other drivers simply run the
+    statements one at a time.
+
+    Errors only surface when the batch is synced, outside SQLAlchemy's
+    execute, so they are wrapped here the way ``execute`` would wrap them.
+    """
+    dialect = db.get_bind().dialect
+    if not settings.db_pipeline_enabled or dialect.driver != "psycopg":
+        yield
+        return
+    try:
+        with db.connection().connection.dbapi_connection.pipeline():
+            yield
+    except dialect.dbapi.Error as exc:
+        raise DBAPIError.instance(None, None, exc, dialect.dbapi.Error) from exc
+
+
 def db_healthcheck() -> bool:
     """Return True when DB is reachable and can execute a simple query."""
     try:
@@ -37,11 +109,35 @@ def db_healthcheck() -> bool:
         logger.exception("db.healthcheck.failed")
         return False
 
+def pool_status() -> dict:
+    """Return connection pool occupancy for the application engine."""
+    pool = engine.pool
+    capacity = settings.db_pool_size + settings.db_max_overflow
+    checked_out = pool.checkedout() if hasattr(pool, "checkedout") else 0
+    return {
+        "size": pool.size() if hasattr(pool, "size") else None,
+        "checked_out": checked_out,
+        "overflow": pool.overflow() if hasattr(pool, "overflow") else None,
+        "capacity": capacity,
+        "saturation": round(checked_out / capacity, 3) if capacity else 0.0,
+    }
+
+
 def get_db():
+    probe = circuit_breaker.admit()
     db = SessionLocal()
     logger.debug("db.session.opened")
     try:
         yield db
+    except Exception as exc:
+        if isinstance(exc, PoolTimeoutError):
+            # No connection freed up within DB_POOL_TIMEOUT; engine events never see this.
+            circuit_breaker.db_breaker.record_failure()
+        if settings.enable_graceful_degradation and circuit_breaker.is_connection_failure(exc):
+            raise circuit_breaker.unavailable() from exc
+        raise
     finally:
         db.close()
+        if probe:
+            circuit_breaker.db_breaker.release_probe()
         logger.debug("db.session.closed")
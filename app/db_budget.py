@@ -0,0 +1,100 @@
+import logging
+from typing import NamedTuple
+from fastapi import Depends, HTTPException, status
+from sqlalchemy import event
+from sqlalchemy.exc import DBAPIError
+from sqlalchemy.orm import Session
+from app.config import settings
+from app.db import get_db
+from app.metrics import metrics
+
+logger = logging.getLogger(__name__)
+
+# Route classes with their own database time budget.
+WALLET_WRITE = "wallet_write"
+ORDER_WRITE = "order_write"
+DEFAULT = "default"
+EXPORT = "export"
+
+LOCK_TIMEOUT = "lock_timeout"
+STATEMENT_TIMEOUT = "statement_timeout"
+# lock_not_available and query_canceled; SQLite has no equivalent.
+TIMEOUT_SQLSTATES = {"55P03": LOCK_TIMEOUT, "57014": STATEMENT_TIMEOUT}
+
+
+class DBBudget(NamedTuple):
+    """Per-transaction limits in milliseconds; 0 leaves the server default."""
+
+    statement_timeout_ms: int
+    lock_timeout_ms: int
+
+
+BUDGETS = {
+    WALLET_WRITE: DBBudget(
+        settings.db_budget_wallet_write_statement_timeout_ms,
+        settings.db_budget_wallet_write_lock_timeout_ms,
+    ),
+    ORDER_WRITE: DBBudget(
+        settings.db_budget_order_write_statement_timeout_ms,
+        settings.db_budget_order_write_lock_timeout_ms,
+    ),
+    DEFAULT: DBBudget(
+        settings.db_budget_default_statement_timeout_ms,
+        settings.db_budget_default_lock_timeout_ms,
+    ),
+    EXPORT: DBBudget(
+        settings.db_budget_export_statement_timeout_ms,
+        settings.db_budget_export_lock_timeout_ms,
+    ),
+}
+
+
+def timeout_reason(exc: BaseException) -> str | None:
+    """Name the budget limit a database error hit, or None for any other error."""
+    if not isinstance(exc, DBAPIError):
+        return None
+    sqlstate = getattr(exc.orig, "pgcode", None) or getattr(exc.orig, "sqlstate", None)
+    return TIMEOUT_SQLSTATES.get(sqlstate)
+
+
+def use_budget(db: Session, name: str):
+    """Apply budget ``name`` to every transaction the session begins from now on."""
+    db.info["db_budget"] = name
+
+
+@event.listens_for(Session, "after_begin")
+def _apply_budget(session, transaction, connection):
+    # SET LOCAL ends with the transaction, so a pooled connection never keeps
+    # a budget, and each attempt of services.run_in_transaction gets it again.
+    name = session.info.get("db_budget")
+    if name is None or connection.dialect.name != "postgresql":
+        return
+    budget = BUDGETS[name]
+    connection.exec_driver_sql(
+        f"SET LOCAL statement_timeout = {int(budget.statement_timeout_ms)}; "
+        f"SET LOCAL lock_timeout = {int(budget.lock_timeout_ms)}"
+    )
+
+
+def db_budget(name: str):
+    """Route dependency that applies a budget and maps its timeouts to a retryable 503."""
+    if name not in BUDGETS:
+        raise ValueError(f"unknown db budget {name!r}")
+
+    def apply(db: Session = Depends(get_db)):
+        use_budget(db, name)
+        try:
+            yield
+        except DBAPIError as exc:
+            reason = timeout_reason(exc)
+            if reason is None:
+                raise
+            metrics.increment(f"db_budget.{name}.{reason}")
+            logger.warning("db_budget.exceeded", extra={"budget": name, "reason": reason})
+            raise HTTPException(
+                status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+                detail={"error": "db_timeout", "budget": name, "reason": reason},
+                headers={"Retry-After": str(settings.db_budget_retry_after_seconds)},
+            ) from exc
+
+    return apply
@@ -0,0 +1,37 @@
+import hashlib
+from fastapi import Response
+
+REVALIDATE_CACHE_CONTROL = "private, no-cache"
+
+
+def weak_etag(*parts) -> str:
+    """Build a weak ETag from cheap version data (counts, timestamps, ids)."""
+    raw = "|".join("" if part is None else str(part) for part in parts)
+    digest = hashlib.blake2b(raw.encode("utf-8"), digest_size=12).hexdigest()
+    return f'W/"{digest}"'
+
+
+def etag_matches(if_none_match: str | None, etag: str) -> bool:
+    """Weak comparison of an If-None-Match header against an ETag (RFC 9110 13.1.2)."""
+    if not if_none_match:
+        return False
+    if if_none_match.strip() == "*":
+        return True
+    opaque = etag.removeprefix("W/")
+    return any(
+        candidate.strip().removeprefix("W/") == opaque
+        for candidate in if_none_match.split(",")
+    )
+
+
+def set_revalidation_headers(response: Response, etag: str):
+    """Let private caches keep the response but require revalidation on every use."""
+    response.headers["ETag"] = etag
+    response.headers["Cache-Control"] = REVALIDATE_CACHE_CONTROL
+    response.headers["Vary"] = "Authorization"
+
+
+def not_modified(etag: str) -> Response:
+    response = Response(status_code=304)
+    set_revalidation_headers(response, etag)
+    return response
@@ -0,0 +1,125 @@
+import asyncio
+import logging
+from datetime import datetime, timezone
+from time import monotonic, perf_counter
+from typing import NamedTuple, Optional
+from app.circuit_breaker import db_breaker
+from app.db import db_healthcheck, pool_status
+
+logger = logging.getLogger(__name__)
+
+
+class HealthSnapshot(NamedTuple):
+    checked_at: datetime
+    checked_monotonic: float
+    db_ok: bool
+    db_latency_ms: Optional[float]
+    db_error: Optional[str]
+    pool: dict
+    loop_lag_ms: float
+
+    def to_dict(self) -> dict:
+        return {
+            "checked_at": self.checked_at.isoformat(),
+            "age_seconds": round(monotonic() - self.checked_monotonic, 3),
+            "database": {
+                "status": "up" if self.db_ok else "down",
+                "latency_ms": self.db_latency_ms,
+                "error": self.db_error,
+            },
+            "pool": self.pool,
+            "event_loop_lag_ms": self.loop_lag_ms,
+        }
+
+
+class HealthMonitor:
+    """Probe dependencies in the background and publish the latest snapshot.
+
+    Health endpoints read ``snapshot`` instead of touching the database, so
+    orchestrator probes cost no connections and cannot pile up behind a slow
+    DB. At most one DB probe runs at a time; a probe that outlives the
+    timeout is reported as down and is not restarted until it returns.
+    """
+
+    def __init__(self, interval_seconds: float, timeout_seconds: float, max_age_seconds: float):
+        self.interval_seconds = interval_seconds
+        self.timeout_seconds = timeout_seconds
+        self.max_age_seconds = max_age_seconds
+        self.snapshot: Optional[HealthSnapshot] = None
+        self._task: Optional[asyncio.Task] = None
+        self._probe: Optional[asyncio.Future] = None
+        self._loop_lag_ms = 0.0
+
+    async def start(self):
+        """Take a first snapshot, then keep probing every ``interval_seconds``."""
+        if self._task is None:
+            await self.probe_once()
+            self._task = asyncio.create_task(self._run(), name="health-monitor")
+            logger.info("health.monitor.started", extra={"interval_seconds": self.interval_seconds})
+
+    async def stop(self):
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+            logger.info("health.monitor.stopped")
+
+    async def _run(self):
+        loop = asyncio.get_running_loop()
+        while True:
+            started = loop.time()
+            await asyncio.sleep(self.interval_seconds)
+            # A blocked event loop wakes us late; the overshoot is the loop lag.
+            self._loop_lag_ms = round(max(loop.time() - started - self.interval_seconds, 0.0) * 1000, 2)
+            await self.probe_once()
+
+    async def probe_once(self) -> HealthSnapshot:
+        loop = asyncio.get_running_loop()
+        db_ok, latency_ms, error = False, None, None
+        if self._probe is not None and not self._probe.done():
+            error = "previous probe still running"
+        else:
+            start = perf_counter()
+            self._probe = loop.run_in_executor(None, db_healthcheck)
+            try:
+                db_ok = await asyncio.wait_for(asyncio.shield(self._probe), self.timeout_seconds)
+                latency_ms = round((perf_counter() - start) * 1000, 2)
+                if not db_ok:
+                    error = "query failed"
+            except asyncio.TimeoutError:
+                error = f"timed out after {self.timeout_seconds}s"
+
+        snapshot = HealthSnapshot(
+            checked_at=datetime.now(timezone.utc),
+            checked_monotonic=monotonic(),
+            db_ok=db_ok,
+            db_latency_ms=latency_ms,
+            db_error=error,
+            pool=pool_status(),
+            loop_lag_ms=self._loop_lag_ms,
+        )
+        if not db_ok:
+            logger.warning("health.monitor.db_unhealthy", extra={"reason": error})
+        self.snapshot = snapshot
+        return snapshot
+
+    def is_ready(self) -> bool:
+        snapshot = self.snapshot
+        return (
+            snapshot is not None
+            and snapshot.db_ok
+            and monotonic() - snapshot.checked_monotonic <= self.max_age_seconds
+        )
+
+    def status(self) -> dict:
+        snapshot = self.snapshot
+        if snapshot is None:
+            return {"status": "starting"}
+        return {
+            "status": "ready" if self.is_ready() else "not_ready",
+            **snapshot.to_dict(),
+            "circuit_breaker": db_breaker.stats(),
+        }
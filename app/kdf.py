@@ -0,0 +1,171 @@
+import base64
+import hashlib
+import hmac
+import logging
+import secrets
+from time import perf_counter
+from typing import NamedTuple
+from app.config import settings
+from app.metrics import metrics
+
+logger = logging.getLogger(__name__)
+
+PBKDF2 = "pbkdf2_sha256"
+SCRYPT = "scrypt"
+SCRYPT_BLOCK_SIZE = 8
+SCRYPT_PARALLELISM = 1
+# Pods calibrate independently; tolerate their noise before upgrading a PBKDF2 hash.
+PBKDF2_REHASH_MARGIN = 0.8
+CALIBRATION_ROUNDS = 3
+_PROBE_PASSWORD = b"kdf-calibration-probe"
+
+
+class KdfParams(NamedTuple):
+    scheme: str
+    cost: int  # PBKDF2 iterations, or scrypt's N
+    block_size: int = SCRYPT_BLOCK_SIZE
+    parallelism: int = SCRYPT_PARALLELISM
+
+
+def _derive(params: KdfParams, password: bytes, salt: bytes) -> bytes:
+    if params.scheme == PBKDF2:
+        return hashlib.pbkdf2_hmac("sha256", password, salt, params.cost)
+    # scrypt needs 128 * r * N bytes; allow that plus slack over OpenSSL's 32 MiB default.
+    maxmem = 129 * params.block_size * params.cost * params.parallelism + 1024 * 1024
+    return hashlib.scrypt(
+        password, salt=salt, n=params.cost, r=params.block_size, p=params.parallelism, maxmem=maxmem, dklen=32
+    )
+
+
+def _encode(params: KdfParams, salt: bytes, digest: bytes) -> str:
+    salt_b64 = base64.b64encode(salt).decode("ascii")
+    digest_b64 = base64.b64encode(digest).decode("ascii")
+    if params.scheme == PBKDF2:
+        return f"{PBKDF2}${params.cost}${salt_b64}${digest_b64}"
+    return f"{SCRYPT}${params.cost}${params.block_size}${params.parallelism}${salt_b64}${digest_b64}"
+
+
+def _decode(hashed_password: str) -> tuple[KdfParams, bytes, bytes] | None:
+    """``(params, salt, digest)`` of a stored hash, or None if it is not one of ours."""
+    try:
+        parts = hashed_password.split("$")
+        if parts[0] == PBKDF2 and len(parts) == 4:
+            params = KdfParams(PBKDF2, int(parts[1]))
+        elif parts[0] == SCRYPT and len(parts) == 6:
+            params = KdfParams(SCRYPT, int(parts[1]), int(parts[2]), int(parts[3]))
+        else:
+            return None
+        salt = base64.b64decode(parts[-2].encode("ascii"))
+        digest = base64.b64decode(parts[-1].encode("ascii"))
+    except (ValueError, TypeError):
+        return None
+    return params, salt, digest
+
+
+class KdfPolicy:
+    """Password hashing parameters, calibrated to a latency target at startup.
+
+    Until ``calibrate`` runs the policy uses the scheme's minimum cost.
+    Calibration times the KDF on this machine and picks the highest cost
+    that stays within ``target_ms`` per hash, clamped to the configured
+    bounds: PBKDF2 iterations scale linearly; scrypt's N is a power of two
+    and doubles until the next step would overshoot.
+    """
+
+    def __init__(self, scheme: str, target_ms: float, pbkdf2_bounds: tuple[int, int], scrypt_bounds: tuple[int, int]):
+        self.scheme = scheme
+        self.target_ms = target_ms
+        self.bounds = {PBKDF2: pbkdf2_bounds, SCRYPT: scrypt_bounds}
+        self.params = KdfParams(scheme, self.bounds[scheme][0])
+        self.hash_ms = None
+        self.calibrated = False
+
+    def _time_ms(self, params: KdfParams) -> float:
+        best = None
+        for _ in range(CALIBRATION_ROUNDS):
+            started = perf_counter()
+            _derive(params, _PROBE_PASSWORD, b"\0" * 16)
+            elapsed = (perf_counter() - started) * 1000
+            best = elapsed if best is None else min(best, elapsed)
+        return best
+
+    def calibrate(self, force: bool = False) -> KdfParams:
+        if self.calibrated and not force:
+            return self.params
+        low, high = self.bounds[self.scheme]
+        if self.target_ms <= 0:
+            self.params = KdfParams(self.scheme, low)
+            self.calibrated = True
+            logger.info("kdf.calibration.skipped", extra={"scheme": self.scheme, "cost": low})
+            return self.params
+
+        if self.scheme == PBKDF2:
+            elapsed = self._time_ms(KdfParams(PBKDF2, low))
+            cost = int(low * self.target_ms / elapsed) // 1000 * 1000
+            self.params = KdfParams(PBKDF2, min(max(cost, low), high))
+            self.hash_ms = self._time_ms(self.params)
+        else:
+            cost, elapsed = low, self._time_ms(KdfParams(SCRYPT, low))
+            while cost * 2 <= high:
+                doubled = self._time_ms(KdfParams(SCRYPT, cost * 2))
+                if doubled > self.target_ms:
+                    break
+                cost, elapsed = cost * 2, doubled
+            self.params = KdfParams(SCRYPT, cost)
+            self.hash_ms = elapsed
+        self.calibrated = True
+        logger.info(
+            "kdf.calibrated",
+            extra={
+                "scheme": self.scheme,
+                "cost": self.params.cost,
+                "hash_ms": round(self.hash_ms, 2),
+                "target_ms": self.target_ms,
+            },
+        )
+        return self.params
+
+    def hash(self, password: str, salt: bytes | None = None) -> str:
+        salt = salt or secrets.token_bytes(16)
+        metrics.increment("kdf.hash")
+        return _encode(self.params, salt, _derive(self.params, password.encode("utf-8"), salt))
+
+    def verify(self, password: str, hashed_password: str) -> bool:
+        decoded = _decode(hashed_password)
+        if decoded is None:
+            return False
+        params, salt, expected = decoded
+        metrics.increment("kdf.verify")
+        try:
+            actual = _derive(params, password.encode("utf-8"), salt)
+        except (ValueError, MemoryError):
+            return False
+        return hmac.compare_digest(actual, expected)
+
+    def needs_rehash(self, hashed_password: str) -> bool:
+        """True when a hash that verified should be replaced under the current policy.
+
+        Hashes are upgraded to the current scheme, into the configured
+        bounds, and to at least the current cost (PBKDF2 within a margin for
+        calibration noise). Stronger hashes within bounds are kept.
+        """
+        decoded = _decode(hashed_password)
+        if decoded is None:
+            return False
+        params = decoded[0]
+        if params.scheme != self.params.scheme:
+            return True
+        low, high = self.bounds[params.scheme]
+        if not low <= params.cost <= high:
+            return True
+        if params.scheme == PBKDF2:
+            return params.cost < self.params.cost * PBKDF2_REHASH_MARGIN
+        return params.cost < self.params.cost or params[2:] != self.params[2:]
+
+
+password_policy = KdfPolicy(
+    scheme=settings.password_scheme,
+    target_ms=settings.password_hash_target_ms,
+    pbkdf2_bounds=(settings.password_pbkdf2_min_iterations, settings.password_pbkdf2_max_iterations),
+    scrypt_bounds=(settings.password_scrypt_min_n, settings.password_scrypt_max_n),
+)
@@ -0,0 +1,137 @@
+import logging
+import time
+from collections import deque
+from threading import Lock
+from uuid import UUID
+from sqlalchemy import event
+from sqlalchemy.orm import Session
+from app.config import settings
+from app.metrics import metrics, percentiles
+
+logger = logging.getLogger(__name__)
+
+
+class SpaceSaving:
+    """Bounded heavy-hitters sketch (Metwally et al.'s Space-Saving).
+
+    Tracks at most ``capacity`` keys. A new key evicts the least counted
+    one and inherits its count as ``error``, so ``count - error`` is a lower
+    bound on its true frequency, and no key seen more than
+    ``total / capacity`` times can be missing. Wait and hold totals only
+    cover the time since the key entered the sketch.
+    """
+
+    def __init__(self, capacity: int):
+        self.capacity = max(capacity, 1)
+        self.total = 0
+        # key -> [count, error, wait_seconds, hold_seconds]
+        self._entries: dict = {}
+
+    def add(self, key, wait_seconds: float, hold_seconds: float):
+        self.total += 1
+        entry = self._entries.get(key)
+        if entry is None:
+            floor = 0
+            if len(self._entries) >= self.capacity:
+                victim = min(self._entries, key=lambda k: self._entries[k][0])
+                floor = self._entries.pop(victim)[0]
+            entry = self._entries[key] = [floor, floor, 0.0, 0.0]
+        entry[0] += 1
+        entry[2] += wait_seconds
+        entry[3] += hold_seconds
+
+    def top(self, n: int) -> list[dict]:
+        ranked = sorted(self._entries.items(), key=lambda item: item[1][0], reverse=True)[:n]
+        result = []
+        for key, (count, error, wait, hold) in ranked:
+            observed = count - error
+            result.append(
+                {
+                    "customer_id": str(key),
+                    "count": count,
+                    "error": error,
+                    "avg_wait_ms": round(wait / observed * 1000, 3) if observed else None,
+                    "avg_hold_ms": round(hold / observed * 1000, 3) if observed else None,
+                }
+            )
+        return result
+
+
+class WalletLockTelemetry:
+    """Per-wallet lock wait and hold times for ``services._get_wallet_for_update``.
+
+    Wait is how long the ``SELECT ... FOR UPDATE`` took to return; hold is
+    from then until the transaction commits or rolls back. Percentiles are
+    computed over the most recent ``sample_size`` locks.
+    """
+
+    def __init__(self, sketch_size: int, sample_size: int, slow_ms: float):
+        self.sketch = SpaceSaving(sketch_size)
+        self.waits = deque(maxlen=sample_size)
+        self.holds = deque(maxlen=sample_size)
+        self.slow_seconds = slow_ms / 1000
+        self._lock = Lock()
+
+    def acquired(self, db: Session, customer_id: UUID, wait_seconds: float):
+        """Note a wallet row lock taken in ``db``'s current transaction."""
+        db.info.setdefault("wallet_locks", []).append((customer_id, wait_seconds, time.perf_counter()))
+
+    def released(self, db: Session, outcome: str):
+        released_at = time.perf_counter()
+        for customer_id, wait_seconds, acquired_at in db.info.pop("wallet_locks", ()):
+            self._record(customer_id, wait_seconds, released_at - acquired_at, outcome)
+
+    def _record(self, customer_id: UUID, wait_seconds: float, hold_seconds: float, outcome: str):
+        with self._lock:
+            self.sketch.add(customer_id, wait_seconds, hold_seconds)
+            self.waits.append(wait_seconds)
+            self.holds.append(hold_seconds)
+        metrics.increment(f"wallet_lock.{outcome}")
+        if self.slow_seconds and wait_seconds + hold_seconds >= self.slow_seconds:
+            logger.warning(
+                "wallet_lock.slow",
+                extra={
+                    "user_id": str(customer_id),
+                    "wait_ms": round(wait_seconds * 1000, 3),
+                    "hold_ms": round(hold_seconds * 1000, 3),
+                    "outcome": outcome,
+                },
+            )
+
+    def summary(self) -> dict:
+        """Aggregates only; safe for ``/metrics``, which carries no customer ids."""
+        with self._lock:
+            return {
+                "locks": self.sketch.total,
+                "wait_ms": percentiles(self.waits),
+                "hold_ms": percentiles(self.holds),
+            }
+
+    def report(self, top_n: int = 10) -> dict:
+        with self._lock:
+            hottest = self.sketch.top(top_n)
+        return {**self.summary(), "hottest": hottest}
+
+    def reset(self):
+        with self._lock:
+            self.sketch = SpaceSaving(self.sketch.capacity)
+            self.waits.clear()
+            self.holds.clear()
+
+
+wallet_locks = WalletLockTelemetry(
+    sketch_size=settings.wallet_lock_sketch_size,
+    sample_size=settings.wallet_lock_sample_size,
+    slow_ms=settings.wallet_lock_slow_ms,
+)
+metrics.register_collector("wallet_locks", lambda: wallet_locks.summary())
+
+
+@event.listens_for(Session, "after_commit")
+def _lock_committed(session):
+    wallet_locks.released(session, "committed")
+
+
+@event.listens_for(Session, "after_rollback")
+def _lock_rolled_back(session):
+    wallet_locks.released(session, "rolled_back")
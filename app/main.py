@@ -4,16 +4,30 @@ from contextlib import asynccontextmanager
 import logging
 from fastapi import HTTPException
 from app.config import settings
-from app.db import init_db, db_healthcheck
+from app.db import SessionLocal, init_db
+from app.health import HealthMonitor
+from app.kdf import password_policy
+from app.revocation import revoked_sessions
 from app.logging_config import setup_logging
+from app.metrics import metrics
 from app.middleware_logging import RequestLoggingMiddleware
 from app.routes_users import router as users_router
 from app.routes_orders import router as orders_router
 from app.routes_wallet import router as wallet_router
+from app.routes_admin import router as admin_router
+from app.threadpool import LoopStallWatchdog, configure_worker_threads, threadpool_telemetry
+from app.traffic_capture import traffic_capture
 
 setup_logging(settings.log_level, settings.log_format)
 logger = logging.getLogger(__name__)
 access_logger = logging.getLogger("app.access")
+health_monitor = HealthMonitor(
+    interval_seconds=settings.health_check_interval_seconds,
+    timeout_seconds=settings.health_check_timeout_seconds,
+    max_age_seconds=settings.health_snapshot_max_age_seconds,
+)
+metrics.register_collector("health", health_monitor.status)
+loop_watchdog = LoopStallWatchdog(threshold_ms=settings.loop_stall_threshold_ms)
 
 
 @asynccontextmanager
@@ -34,8 +48,18 @@ async def lifespan(app: FastAPI):
         "middleware loaded",
         extra={"middlewares": [m.cls.__name__ for m in app.user_middleware]},
     )
+    password_policy.calibrate()
+    await threadpool_telemetry.start(configure_worker_threads())
+    await loop_watchdog.start()
+    await health_monitor.start()
+    await revoked_sessions.start(SessionLocal)
     logger.info("application startup complete")
     yield
+    await revoked_sessions.stop()
+    await health_monitor.stop()
+    await loop_watchdog.stop()
+    await threadpool_telemetry.stop()
+    traffic_capture.close()
     logger.info("application shutdown complete")
 
 
@@ -58,6 +82,7 @@ app.add_middleware(RequestLoggingMiddleware)
 app.include_router(users_router)
 app.include_router(orders_router)
 app.include_router(wallet_router)
+app.include_router(admin_router)
 
 
 @app.get("/")
@@ -66,8 +91,25 @@ def root():
 
 
 @app.get("/health")
-def health():
-    db_ok = db_healthcheck()
-    if not db_ok:
+async def health():
+    if not health_monitor.is_ready():
         raise HTTPException(status_code=503, detail={"status": "unhealthy", "database": "down"})
     return {"status": "healthy", "database": "up"}
+
+
+@app.get("/health/live")
+async def health_live():
+    return {"status": "alive"}
+
+
+@app.get("/health/ready")
+async def health_ready():
+    status = health_monitor.status()
+    if not health_monitor.is_ready():
+        raise HTTPException(status_code=503, detail=status)
+    return status
+
+
+@app.get("/metrics")
+def get_metrics():
+    return metrics.snapshot()
@@ -0,0 +1,53 @@
+from threading import Lock
+from typing import Callable
+
+
+class MetricsRegistry:
+    """In-process counters plus pluggable collectors, served at GET /metrics."""
+
+    def __init__(self):
+        self._counters: dict[str, float] = {}
+        self._collectors: dict[str, Callable[[], dict]] = {}
+        self._lock = Lock()
+
+    def increment(self, name: str, value: float = 1):
+        with self._lock:
+            self._counters[name] = self._counters.get(name, 0) + value
+
+    def register_collector(self, name: str, collector: Callable[[], dict]):
+        """Register a callable whose dict result is included under ``name``."""
+        with self._lock:
+            self._collectors[name] = collector
+
+    def get(self, name: str) -> float:
+        with self._lock:
+            return self._counters.get(name, 0)
+
+    def snapshot(self) -> dict:
+        with self._lock:
+            counters = dict(sorted(self._counters.items()))
+            collectors = dict(self._collectors)
+        snapshot = {"counters": counters}
+        for name, collector in sorted(collectors.items()):
+            snapshot[name] = collector()
+        return snapshot
+
+    def reset(self):
+        with self._lock:
+            self._counters.clear()
+
+
+def percentiles(samples) -> dict:
+    """p50/p95/p99/max in milliseconds of a collection of durations in seconds."""
+    if not samples:
+        return {"p50": None, "p95": None, "p99": None, "max": None}
+    ordered = sorted(samples)
+    last = len(ordered) - 1
+
+    def rank(fraction: float) -> float:
+        return round(ordered[min(int(fraction * len(ordered)), last)] * 1000, 3)
+
+    return {"p50": rank(0.50), "p95": rank(0.95), "p99": rank(0.99), "max": round(ordered[last] * 1000, 3)}
+
+
+metrics = MetricsRegistry()
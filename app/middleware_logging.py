@@ -4,6 +4,8 @@ import uuid
 from starlette.middleware.base import BaseHTTPMiddleware
 from starlette.requests import Request
 from app.logging_config import set_request_id, reset_request_id
+from app.tracing import tracer
+from app.traffic_capture import traffic_capture
 
 
 class RequestLoggingMiddleware(BaseHTTPMiddleware):
@@ -19,6 +21,13 @@ class RequestLoggingMiddleware(BaseHTTPMiddleware):
         request_id_token = set_request_id(request_id)
         start = perf_counter()
         status_code = 500
+        trace_token = tracer.start_trace(
+            f"{request.method} {request.url.path}",
+            {"http.method": request.method, "http.target": request.url.path, "request.id": request_id},
+            traceparent=request.headers.get("traceparent"),
+        )
+        error = None
+        captured = await traffic_capture.begin(request) if traffic_capture.enabled else None
 
         self.access_logger.info(
             "http request started",
@@ -38,9 +47,11 @@ class RequestLoggingMiddleware(BaseHTTPMiddleware):
             response.headers["X-Frame-Options"] = "DENY"
             response.headers["Referrer-Policy"] = "no-referrer"
             response.headers["Permissions-Policy"] = "geolocation=(), microphone=(), camera=()"
-            response.headers["Cache-Control"] = "no-store"
+            # Routes that support conditional GET set their own revalidation policy.
+            response.headers.setdefault("Cache-Control", "no-store")
             return response
-        except Exception:
+        except Exception as exc:
+            error = exc
             self.app_logger.exception(
                 "http request failed",
                 extra={
@@ -65,4 +76,7 @@ class RequestLoggingMiddleware(BaseHTTPMiddleware):
                     "user_agent": request.headers.get("user-agent", "-"),
                 },
             )
+            tracer.finish_trace(trace_token, status_code, error)
+            if captured is not None:
+                traffic_capture.finish(captured, request, status_code, duration_ms)
             reset_request_id(request_id_token)
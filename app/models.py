@@ -1,7 +1,11 @@
-from sqlalchemy import Column, String, Numeric, DateTime, CheckConstraint, Text, ForeignKey, Boolean
-from sqlalchemy.dialects.postgresql import UUID
+from sqlalchemy import Column, String, Numeric, DateTime, CheckConstraint, Text, ForeignKey, Boolean, Index, text
+from sqlalchemy import BigInteger, Integer, JSON, UniqueConstraint
+from sqlalchemy.dialects.postgresql import JSONB, UUID
 from sqlalchemy.orm import declarative_base, relationship
 from datetime import datetime, timezone
+from decimal import Decimal
+from app.config import settings
+from app.money import STORE_MINOR_UNITS, from_storage
 import uuid
 
 Base = declarative_base()
@@ -12,6 +16,11 @@ def utcnow_naive() -> datetime:
     return datetime.now(timezone.utc).replace(tzinfo=None)
 
 
+def money_type():
+    """BIGINT minor units when MONEY_STORAGE=minor_units, otherwise NUMERIC(10, 2)."""
+    return BigInteger() if STORE_MINOR_UNITS else Numeric(10, 2)
+
+
 class User(Base):
     __tablename__ = "users"
     
@@ -31,17 +40,33 @@ class Order(Base):
     __tablename__ = "orders"
     
     id = Column(UUID(as_uuid=True), primary_key=True, default=uuid.uuid4)
-    customer_id = Column(UUID(as_uuid=True), ForeignKey('users.id'), nullable=False, index=True)
-    amount = Column(Numeric(10, 2), nullable=False)
+    customer_id = Column(UUID(as_uuid=True), ForeignKey('users.id'), nullable=False)
+    amount = Column(money_type(), nullable=False)
     currency = Column(String(10), nullable=False)
     idempotency_key = Column(Text, nullable=True)
     status = Column(String(50), nullable=False, default="created")
-    created_at = Column(DateTime, default=utcnow_naive)
+    # Partition key; PostgreSQL requires it in the primary key of a partitioned table.
+    created_at = Column(DateTime, primary_key=True, default=utcnow_naive)
+    updated_at = Column(DateTime, default=utcnow_naive, onupdate=utcnow_naive)
     
     user = relationship("User", back_populates="orders")
+
+    @property
+    def amount_major(self) -> Decimal:
+        return from_storage(self.amount, self.currency)
     
     __table_args__ = (
         CheckConstraint('amount > 0', name='check_order_amount_positive'),
+        Index('idx_orders_customer_created', customer_id, created_at.desc()),
+        Index('idx_orders_idempotency_key', idempotency_key),
+        # Lets the settlement worker find due orders without scanning settled ones.
+        # The predicate must list settlement.SETTLEABLE_STATUSES.
+        Index(
+            'idx_orders_unsettled_created',
+            created_at,
+            postgresql_where=text("status IN ('created', 'paid')"),
+        ),
+        {'postgresql_partition_by': 'RANGE (created_at)'},
     )
 
 
@@ -49,11 +74,79 @@ class Wallet(Base):
     __tablename__ = "wallets"
     
     customer_id = Column(UUID(as_uuid=True), ForeignKey('users.id'), primary_key=True)
-    balance = Column(Numeric(10, 2), nullable=False, default=0)
+    balance = Column(money_type(), nullable=False, default=0)
     updated_at = Column(DateTime, default=utcnow_naive, onupdate=utcnow_naive)
     
     user = relationship("User", back_populates="wallet")
+
+    @property
+    def balance_major(self) -> Decimal:
+        return from_storage(self.balance, settings.wallet_currency)
     
     __table_args__ = (
         CheckConstraint('balance >= 0', name='check_wallet_balance_non_negative'),
     )
+
+
+class WalletTransfer(Base):
+    """Money moved between two wallets in one transaction."""
+    __tablename__ = "wallet_transfers"
+
+    id = Column(UUID(as_uuid=True), primary_key=True, default=uuid.uuid4)
+    from_customer_id = Column(UUID(as_uuid=True), ForeignKey('users.id'), nullable=False)
+    to_customer_id = Column(UUID(as_uuid=True), ForeignKey('users.id'), nullable=False)
+    # In wallet currency, stored like wallets.balance.
+    amount = Column(money_type(), nullable=False)
+    idempotency_key = Column(Text, nullable=True)
+    created_at = Column(DateTime, nullable=False, default=utcnow_naive)
+
+    @property
+    def amount_major(self) -> Decimal:
+        return from_storage(self.amount, settings.wallet_currency)
+
+    __table_args__ = (
+        CheckConstraint('amount > 0', name='check_transfer_amount_positive'),
+        CheckConstraint('from_customer_id <> to_customer_id', name='check_transfer_distinct_wallets'),
+        # Idempotency keys are scoped to the sender; the constraint settles concurrent retries.
+        UniqueConstraint('from_customer_id', 'idempotency_key', name='uq_transfer_sender_idempotency_key'),
+    )
+
+
+class RefreshToken(Base):
+    """One refresh token of a login session; only its SHA-256 is stored.
+
+    Rotation marks a token used and issues its successor in the same
+    ``family_id``. Presenting a used token again revokes the whole family.
+    """
+    __tablename__ = "refresh_tokens"
+
+    id = Column(UUID(as_uuid=True), primary_key=True, default=uuid.uuid4)
+    user_id = Column(UUID(as_uuid=True), ForeignKey('users.id'), nullable=False)
+    family_id = Column(UUID(as_uuid=True), nullable=False, index=True)
+    token_hash = Column(String(64), nullable=False, unique=True)
+    created_at = Column(DateTime, nullable=False, default=utcnow_naive)
+    expires_at = Column(DateTime, nullable=False)
+    used_at = Column(DateTime, nullable=True)
+    revoked_at = Column(DateTime, nullable=True)
+
+    __table_args__ = (
+        # Recently revoked families, polled by app.revocation.
+        Index('idx_refresh_tokens_revoked_at', 'revoked_at', postgresql_where=text('revoked_at IS NOT NULL')),
+        # Expired tokens, purged in batches by scripts/purge_refresh_tokens.py.
+        Index('idx_refresh_tokens_expires_at', 'expires_at'),
+    )
+
+
+class OutboxEvent(Base):
+    """Event written in the same transaction as the change it describes.
+
+    ``scripts/outbox_relay.py`` publishes rows in ``id`` order and deletes them.
+    """
+    __tablename__ = "outbox_events"
+
+    # SQLite only autoincrements INTEGER primary keys.
+    id = Column(BigInteger().with_variant(Integer, "sqlite"), primary_key=True, autoincrement=True)
+    event_type = Column(String(50), nullable=False)
+    customer_id = Column(UUID(as_uuid=True), nullable=False)
+    payload = Column(JSON().with_variant(JSONB, "postgresql"), nullable=False)
+    created_at = Column(DateTime, nullable=False, default=utcnow_naive)
@@ -0,0 +1,44 @@
+from decimal import Decimal
+from app.config import settings
+
+NUMERIC = "numeric"
+MINOR_UNITS = "minor_units"
+
+# ISO 4217 minor-unit exponents that differ from the default of 2.
+CURRENCY_EXPONENTS = {
+    "BHD": 3, "BIF": 0, "CLP": 0, "DJF": 0, "GNF": 0, "IQD": 3, "ISK": 0,
+    "JOD": 3, "JPY": 0, "KMF": 0, "KRW": 0, "KWD": 3, "LYD": 3, "OMR": 3,
+    "PYG": 0, "RWF": 0, "TND": 3, "UGX": 0, "VND": 0, "VUV": 0, "XAF": 0,
+    "XOF": 0, "XPF": 0,
+}
+DEFAULT_EXPONENT = 2
+
+# Fixed when the models are imported: the column types depend on it.
+STORE_MINOR_UNITS = settings.money_storage == MINOR_UNITS
+ZERO = 0 if STORE_MINOR_UNITS else Decimal("0.00")
+
+
+def exponent(currency: str) -> int:
+    return CURRENCY_EXPONENTS.get(currency, DEFAULT_EXPONENT)
+
+
+def to_minor(amount: Decimal, currency: str) -> int:
+    """Convert a major-unit amount to integer minor units, refusing to round."""
+    scaled = amount.scaleb(exponent(currency))
+    if scaled != scaled.to_integral_value():
+        raise ValueError(f"{currency} amounts allow at most {exponent(currency)} decimal places")
+    return int(scaled)
+
+
+def from_minor(units: int, currency: str) -> Decimal:
+    return Decimal(units).scaleb(-exponent(currency))
+
+
+def to_storage(amount: Decimal, currency: str) -> Decimal | int:
+    """Convert an API amount into the configured storage representation."""
+    return to_minor(amount, currency) if STORE_MINOR_UNITS else amount
+
+
+def from_storage(value: Decimal | int, currency: str) -> Decimal:
+    """Convert a stored amount back into major units for the API."""
+    return from_minor(value, currency) if STORE_MINOR_UNITS else value
@@ -0,0 +1,234 @@
+import importlib
+import json
+import logging
+import os
+import sys
+import time
+from abc import ABC, abstractmethod
+from datetime import datetime
+from decimal import Decimal
+from uuid import UUID
+from sqlalchemy import delete, func, insert, select
+from sqlalchemy.orm import Session
+from app.models import OutboxEvent, utcnow_naive
+
+logger = logging.getLogger(__name__)
+
+ORDER_CREATED = "order.created"
+WALLET_CHANGED = "wallet.changed"
+
+
+def _json_value(value):
+    if isinstance(value, (UUID, Decimal)):
+        return str(value)
+    if isinstance(value, datetime):
+        return value.isoformat()
+    return value
+
+
+def _lock_key(customer_id: UUID) -> int:
+    return int.from_bytes(customer_id.bytes[:8], "big", signed=True)
+
+
+def lock_customer_events(db: Session, *customer_ids: UUID):
+    """Serialize event writes per customer until the caller's transaction ends.
+
+    Outbox ids are taken at insert, so without this a transaction that
+    inserts first but commits last would leave a lower id behind one the
+    relay has already published. Holding ``pg_advisory_xact_lock`` from
+    before the insert until commit makes one customer's ids follow commit
+    order. Call it before ``record_event`` and outside ``db.pipeline``, after
+    any row locks the transaction takes, and take several customers at once
+    so they are locked in a fixed order. SQLite already serializes writers
+    until commit, so there it is a no-op.
+    """
+    if db.get_bind().dialect.name != "postgresql":
+        return
+    for key in sorted({_lock_key(customer_id) for customer_id in customer_ids}):
+        db.execute(select(func.pg_advisory_xact_lock(key)))
+
+
+def record_event(db: Session, event_type: str, customer_id: UUID, payload: dict):
+    """Insert an event in the caller's transaction; it commits or rolls back with the change.
+
+    The caller must hold ``lock_customer_events`` for ``customer_id``. The
+    INSERT is inline: the new id is never read back (no RETURNING, no
+    nextval() round trip), so it can share a ``db.pipeline`` batch.
+    """
+    db.execute(
+        insert(OutboxEvent.__table__).inline().values(
+            event_type=event_type,
+            customer_id=customer_id,
+            payload={key: _json_value(value) for key, value in payload.items()},
+            created_at=utcnow_naive(),
+        )
+    )
+
+
+class OutboxSink(ABC):
+    """Destination for relayed events.
+
+    ``publish`` receives a batch in outbox order and must raise if any event
+    could not be delivered; the relay then keeps the whole batch and retries.
+    """
+
+    @abstractmethod
+    def publish(self, events: list[dict]):
+        ...
+
+    def close(self):
+        pass
+
+
+class NdjsonFileSink(OutboxSink):
+    """Append events as JSON lines to a file (``-`` for stdout), for local use."""
+
+    def __init__(self, path: str = "-", fsync: bool = True):
+        self.path = path
+        self.fsync = fsync and path != "-"
+        self._file = sys.stdout if path == "-" else open(path, "a", encoding="utf-8")
+
+    def publish(self, events: list[dict]):
+        self._file.write("".join(json.dumps(event, separators=(",", ":")) + "\n" for event in events))
+        self._file.flush()
+        if self.fsync:
+            os.fsync(self._file.fileno())
+
+    def close(self):
+        if self._file is not sys.stdout:
+            self._file.close()
+
+
+SINKS = {"ndjson": NdjsonFileSink}
+
+
+def build_sink(name: str, path: str) -> OutboxSink:
+    """Build a sink by registered name or ``package.module:Factory`` import path."""
+    if name in SINKS:
+        return SINKS[name](path)
+    module_name, _, attribute = name.partition(":")
+    if not attribute:
+        raise ValueError(f"Unknown outbox sink: {name}")
+    return getattr(importlib.import_module(module_name), attribute)(path)
+
+
+def _to_message(event: OutboxEvent) -> dict:
+    return {
+        "id": event.id,
+        "type": event.event_type,
+        "customer_id": str(event.customer_id),
+        "occurred_at": event.created_at.isoformat(),
+        "payload": event.payload,
+    }
+
+
+class OutboxRelay:
+    """Publish outbox events in batches and delete them once the sink accepts them.
+
+    Delivery is at-least-once: rows are deleted in the same transaction that
+    locked them, after ``publish`` returns, so a crash or failed commit
+    between the two republishes the batch. Consumers deduplicate on ``id``.
+    Batches are read in ``id`` order under ``FOR UPDATE`` (not SKIP LOCKED),
+    so concurrent relays take turns rather than interleave. Writers hold
+    ``lock_customer_events`` from insert to commit, so each customer's
+    events reach the sink in the order they were committed.
+    """
+
+    def __init__(
+        self,
+        session_factory,
+        sink: OutboxSink,
+        batch_size: int,
+        poll_interval_seconds: float,
+        report_interval_seconds: float = 10.0,
+    ):
+        self.session_factory = session_factory
+        self.sink = sink
+        self.batch_size = batch_size
+        self.poll_interval_seconds = poll_interval_seconds
+        self.report_interval_seconds = report_interval_seconds
+        self.published = 0
+        self.batches = 0
+        self.failures = 0
+        self.last_lag_ms = 0.0
+        self.max_lag_ms = 0.0
+        self._running = False
+
+    def relay_once(self) -> int:
+        """Publish and delete one batch; returns how many events it published."""
+        with self.session_factory() as db:
+            try:
+                events = db.execute(
+                    select(OutboxEvent)
+                    .order_by(OutboxEvent.id)
+                    .limit(self.batch_size)
+                    .with_for_update()
+                ).scalars().all()
+                if not events:
+                    db.rollback()
+                    return 0
+                oldest = events[0].created_at
+                ids = [event.id for event in events]
+                self.sink.publish([_to_message(event) for event in events])
+                db.execute(
+                    delete(OutboxEvent)
+                    .where(OutboxEvent.id.in_(ids))
+                    .execution_options(synchronize_session=False)
+                )
+                db.commit()
+            except Exception:
+                db.rollback()
+                self.failures += 1
+                logger.exception("outbox.relay.batch_failed", extra={"batch_size": self.batch_size})
+                raise
+
+        # Lag: from the business change being recorded to the sink accepting it.
+        self.last_lag_ms = round((utcnow_naive() - oldest).total_seconds() * 1000, 2)
+        self.max_lag_ms = max(self.max_lag_ms, self.last_lag_ms)
+        self.batches += 1
+        self.published += len(ids)
+        return len(ids)
+
+    def run(self, max_batches: int | None = None, stop_when_idle: bool = False):
+        """Relay until stopped; ``max_batches`` caps attempts, including empty and failed ones."""
+        self._running = True
+        started = time.perf_counter()
+        last_report = started
+        attempts = 0
+        logger.info("outbox.relay.started", extra={"batch_size": self.batch_size})
+        while self._running:
+            attempts += 1
+            try:
+                published = self.relay_once()
+            except Exception:
+                # Rows stay in the outbox; back off and retry the same batch.
+                if max_batches is not None and attempts >= max_batches:
+                    break
+                time.sleep(self.poll_interval_seconds)
+                continue
+            if max_batches is not None and attempts >= max_batches:
+                break
+            if published < self.batch_size:
+                if stop_when_idle:
+                    break
+                time.sleep(self.poll_interval_seconds)
+            if time.perf_counter() - last_report >= self.report_interval_seconds:
+                self.log_stats(time.perf_counter() - started)
+                last_report = time.perf_counter()
+        self.log_stats(time.perf_counter() - started)
+
+    def stop(self):
+        self._running = False
+
+    def stats(self, elapsed_seconds: float) -> dict:
+        return {
+            "published": self.published,
+            "batches": self.batches,
+            "failures": self.failures,
+            "events_per_second": round(self.published / elapsed_seconds, 1) if elapsed_seconds else 0.0,
+            "last_lag_ms": self.last_lag_ms,
+            "max_lag_ms": self.max_lag_ms,
+        }
+
+    def log_stats(self, elapsed_seconds: float):
+        logger.info("outbox.relay.stats", extra=self.stats(elapsed_seconds))
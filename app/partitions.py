@@ -0,0 +1,268 @@
+import logging
+import re
+import time
+from datetime import date
+from sqlalchemy import text
+from sqlalchemy.engine import Connection, Engine
+from sqlalchemy.exc import OperationalError
+from app.models import Order
+
+logger = logging.getLogger(__name__)
+
+PARENT_TABLE = "orders"
+DEFAULT_PARTITION = "orders_default"
+ARCHIVE_TABLE = "orders_archive"
+_PARTITION_NAME = re.compile(r"^orders_(\d{4})_(\d{2})$")
+# Copies name every column: orders_archive is created once with LIKE and must
+# not depend on keeping the live table's column order.
+ORDER_COLUMNS = ", ".join(column.name for column in Order.__table__.columns)
+
+
+def month_start(day: date) -> date:
+    return day.replace(day=1)
+
+
+def add_months(month: date, months: int) -> date:
+    index = month.year * 12 + month.month - 1 + months
+    return date(index // 12, index % 12 + 1, 1)
+
+
+def partition_name(month: date) -> str:
+    return f"{PARENT_TABLE}_{month:%Y_%m}"
+
+
+def partition_month(name: str) -> date | None:
+    """Month of an ``orders_YYYY_MM`` partition, or None for any other table name."""
+    match = _PARTITION_NAME.match(name)
+    return date(int(match.group(1)), int(match.group(2)), 1) if match else None
+
+
+def list_order_partitions(conn: Connection) -> dict[str, date | None]:
+    """Return attached partitions of ``orders`` mapped to their month (None for default)."""
+    rows = conn.execute(
+        text(
+            """
+            SELECT child.relname
+            FROM pg_inherits
+            JOIN pg_class parent ON parent.oid = pg_inherits.inhparent
+            JOIN pg_class child ON child.oid = pg_inherits.inhrelid
+            WHERE parent.relname = :parent
+            """
+        ),
+        {"parent": PARENT_TABLE},
+    ).scalars()
+    return {name: partition_month(name) for name in rows}
+
+
+def _set_lock_timeout(conn: Connection, lock_timeout_ms: int):
+    conn.execute(text(f"SET LOCAL lock_timeout = '{int(lock_timeout_ms)}ms'"))
+
+
+def _create_partition(engine: Engine, month: date, source: str | None, lock_timeout_ms: int) -> int:
+    """Create and attach the ``month`` partition, first moving its rows out of ``source``.
+
+    Returns how many rows were moved. The partition is built detached and
+    attached after the move, because attaching would fail while
+    ``orders_default`` still holds rows for its range.
+    """
+    name = partition_name(month)
+    lower, upper = month.isoformat(), add_months(month, 1).isoformat()
+    moved = 0
+    with engine.begin() as conn:
+        _set_lock_timeout(conn, lock_timeout_ms)
+        conn.execute(text(f"CREATE TABLE {name} (LIKE {PARENT_TABLE} INCLUDING DEFAULTS INCLUDING CONSTRAINTS)"))
+        if source is not None:
+            moved = conn.execute(
+                text(
+                    f"""
+                    WITH moved AS (
+                        DELETE FROM {source}
+                        WHERE created_at >= :lower AND created_at < :upper
+                        RETURNING {ORDER_COLUMNS}
+                    )
+                    INSERT INTO {name} ({ORDER_COLUMNS}) SELECT {ORDER_COLUMNS} FROM moved
+                    """
+                ),
+                {"lower": lower, "upper": upper},
+            ).rowcount
+        conn.execute(
+            text(f"ALTER TABLE {PARENT_TABLE} ATTACH PARTITION {name} FOR VALUES FROM ('{lower}') TO ('{upper}')")
+        )
+    logger.info("partitions.created", extra={"partition": name, "rows_moved_from_default": moved})
+    return moved
+
+
+def ensure_order_partitions(
+    engine: Engine,
+    months_ahead: int,
+    months_back: int = 0,
+    today: date | None = None,
+    lock_timeout_ms: int = 5000,
+    default_partition: bool = False,
+) -> list[str]:
+    """Create monthly ``orders_YYYY_MM`` partitions around ``today``. PostgreSQL only.
+
+    With ``default_partition``, also create ``orders_default`` to catch rows
+    outside every monthly range. It keeps inserts from failing when
+    partitions were not created far enough ahead, but PostgreSQL cannot
+    ``DETACH ... CONCURRENTLY`` while it exists, so archival then takes an
+    ACCESS EXCLUSIVE lock on ``orders`` for every detach.
+    """
+    current = month_start(today or date.today())
+    created = []
+    with engine.begin() as conn:
+        _set_lock_timeout(conn, lock_timeout_ms)
+        if default_partition:
+            conn.execute(text(f"CREATE TABLE IF NOT EXISTS {DEFAULT_PARTITION} PARTITION OF {PARENT_TABLE} DEFAULT"))
+        existing = list_order_partitions(conn)
+    source = DEFAULT_PARTITION if DEFAULT_PARTITION in existing else None
+
+    for offset in range(-months_back, months_ahead + 1):
+        month = add_months(current, offset)
+        name = partition_name(month)
+        if name in existing:
+            continue
+        _create_partition(engine, month, source, lock_timeout_ms)
+        created.append(name)
+    return created
+
+
+def _detach_partition(engine: Engine, name: str, concurrently: bool, lock_timeout_ms: int, retries: int):
+    for attempt in range(1, retries + 1):
+        try:
+            if concurrently:
+                # DETACH CONCURRENTLY cannot run inside a transaction block.
+                with engine.connect().execution_options(isolation_level="AUTOCOMMIT") as conn:
+                    conn.execute(text(f"SET lock_timeout = '{int(lock_timeout_ms)}ms'"))
+                    conn.execute(text(f"ALTER TABLE {PARENT_TABLE} DETACH PARTITION {name} CONCURRENTLY"))
+            else:
+                with engine.begin() as conn:
+                    _set_lock_timeout(conn, lock_timeout_ms)
+                    conn.execute(text(f"ALTER TABLE {PARENT_TABLE} DETACH PARTITION {name}"))
+            return
+        except OperationalError:
+            logger.warning("partitions.detach.lock_timeout", extra={"partition": name, "attempt": attempt})
+            if attempt == retries:
+                raise
+            time.sleep(min(0.5 * attempt, 5.0))
+
+
+def _default_partition_months(engine: Engine) -> list[date]:
+    with engine.connect() as conn:
+        rows = conn.execute(
+            text(f"SELECT DISTINCT date_trunc('month', created_at)::date FROM {DEFAULT_PARTITION}")
+        ).scalars()
+        return sorted(rows)
+
+
+def _retire_default_partition(engine: Engine, lock_timeout_ms: int, retries: int):
+    """Move ``orders_default``'s rows into monthly partitions, then detach and drop it.
+
+    Detaching the default takes one short ACCESS EXCLUSIVE lock on ``orders``
+    (it cannot be detached concurrently). Once it is gone, every later detach
+    can run CONCURRENTLY. Rows that arrive between the sweep and the detach
+    are swept again from the detached table. Inserts for a month with no
+    partition fail from then on, so keep ``create --months-ahead`` scheduled.
+    """
+    for month in _default_partition_months(engine):
+        _create_partition(engine, month, DEFAULT_PARTITION, lock_timeout_ms)
+    _detach_partition(engine, DEFAULT_PARTITION, False, lock_timeout_ms, retries)
+    for month in _default_partition_months(engine):
+        _create_partition(engine, month, DEFAULT_PARTITION, lock_timeout_ms)
+    with engine.begin() as conn:
+        conn.execute(text(f"DROP TABLE {DEFAULT_PARTITION}"))
+    logger.info("partitions.default.retired", extra={"partition": DEFAULT_PARTITION})
+
+
+def archive_order_partitions(
+    engine: Engine,
+    retain_months: int,
+    mode: str = "move",
+    batch_size: int = 5000,
+    max_partitions: int = 1,
+    lock_timeout_ms: int = 2000,
+    detach_retries: int = 5,
+    today: date | None = None,
+    keep_default: bool = False,
+) -> list[str]:
+    """Archive monthly partitions that ended more than ``retain_months`` ago.
+
+    ``move`` copies rows into ``orders_archive`` in ``batch_size`` transactions,
+    then detaches and drops the empty partition. ``detach`` detaches the
+    partition and leaves it as a standalone table for dumping or dropping.
+    At most ``max_partitions`` partitions are processed per call, and every
+    statement runs under ``lock_timeout`` so archival never queues in front
+    of live traffic.
+
+    Partitions are detached CONCURRENTLY, which only locks ``orders`` briefly
+    in modes that do not block reads or writes. PostgreSQL refuses that while
+    ``orders_default`` exists, so an existing default partition is retired
+    first (``_retire_default_partition``). With ``keep_default`` it is kept
+    and each detach takes ACCESS EXCLUSIVE on ``orders`` instead.
+    """
+    if mode not in ("move", "detach"):
+        raise ValueError(f"Unknown archive mode: {mode}")
+    cutoff = add_months(month_start(today or date.today()), -retain_months)
+
+    def due_partitions() -> tuple[list[str], bool]:
+        with engine.connect() as conn:
+            partitions = list_order_partitions(conn)
+        due = sorted(
+            name for name, month in partitions.items()
+            if month is not None and add_months(month, 1) <= cutoff
+        )
+        return due[:max_partitions], DEFAULT_PARTITION in partitions
+
+    due, has_default = due_partitions()
+    if due and has_default and not keep_default:
+        _retire_default_partition(engine, lock_timeout_ms, detach_retries)
+        # Old rows from the default now have monthly partitions of their own.
+        due, has_default = due_partitions()
+
+    if due and mode == "move":
+        with engine.begin() as conn:
+            conn.execute(
+                text(f"CREATE TABLE IF NOT EXISTS {ARCHIVE_TABLE} (LIKE {PARENT_TABLE} INCLUDING DEFAULTS)")
+            )
+            # scripts/report_daily.py reads the archive one day at a time.
+            conn.execute(
+                text(f"CREATE INDEX IF NOT EXISTS idx_{ARCHIVE_TABLE}_created_at ON {ARCHIVE_TABLE} (created_at)")
+            )
+
+    for name in due:
+        if mode == "move":
+            total = 0
+            while True:
+                with engine.begin() as conn:
+                    _set_lock_timeout(conn, lock_timeout_ms)
+                    moved = conn.execute(
+                        text(
+                            f"""
+                            WITH moved AS (
+                                DELETE FROM {name}
+                                WHERE ctid IN (
+                                    SELECT ctid FROM {name} LIMIT :batch_size FOR UPDATE SKIP LOCKED
+                                )
+                                RETURNING {ORDER_COLUMNS}
+                            )
+                            INSERT INTO {ARCHIVE_TABLE} ({ORDER_COLUMNS}) SELECT {ORDER_COLUMNS} FROM moved
+                            """
+                        ),
+                        {"batch_size": batch_size},
+                    ).rowcount
+                total += moved
+                logger.info("partitions.archive.batch", extra={"partition": name, "rows": moved})
+                if moved < batch_size:
+                    break
+        _detach_partition(engine, name, not has_default, lock_timeout_ms, detach_retries)
+        if mode == "move":
+            with engine.begin() as conn:
+                # Sweep rows that SKIP LOCKED passed over; nothing writes here once detached.
+                total += conn.execute(
+                    text(f"INSERT INTO {ARCHIVE_TABLE} ({ORDER_COLUMNS}) SELECT {ORDER_COLUMNS} FROM {name}")
+                ).rowcount
+                conn.execute(text(f"DROP TABLE {name}"))
+            logger.info("partitions.archive.moved", extra={"partition": name, "rows": total})
+        else:
+            logger.info("partitions.archive.detached", extra={"partition": name})
+    return due
@@ -0,0 +1,66 @@
+import json
+import logging
+import os
+from threading import Lock
+from sqlalchemy import event
+from sqlalchemy.dialects import postgresql
+from sqlalchemy.engine import Engine
+from sqlalchemy.sql.elements import TextClause
+
+logger = logging.getLogger(__name__)
+
+_dialect = postgresql.dialect()
+
+
+class QueryCapture:
+    """Record each distinct statement the app executes, for ``scripts/audit_query_plans.py``.
+
+    Statements are compiled for PostgreSQL whatever engine runs them, so a
+    test suite on SQLite yields statements that can be EXPLAINed on a
+    PostgreSQL database. Each distinct SQL text is appended once to a JSON
+    lines file with the parameters of its first execution.
+    """
+
+    def __init__(self, path: str):
+        self.path = path
+        self._seen: set[str] = set()
+        self._lock = Lock()
+
+    def install(self):
+        event.listen(Engine, "before_execute", self._before_execute)
+        logger.info("query_capture.enabled", extra={"path": self.path})
+
+    def uninstall(self):
+        event.remove(Engine, "before_execute", self._before_execute)
+
+    def _before_execute(self, conn, clauseelement, multiparams, params, execution_options):
+        if isinstance(clauseelement, TextClause):
+            if not clauseelement.text.lstrip().lower().startswith(("select", "with")):
+                return
+        elif not (getattr(clauseelement, "is_select", False) or getattr(clauseelement, "is_dml", False)):
+            return
+        bound = dict(multiparams[0] if multiparams else params or {})
+        if getattr(clauseelement, "is_insert", False):
+            # Python-side defaults (e.g. uuid4 keys) are filled in at execution, after this hook.
+            for column in clauseelement.table.columns:
+                default = column.default
+                if column.key not in bound and default is not None and (default.is_scalar or default.is_callable):
+                    bound[column.key] = default.arg(None) if default.is_callable else default.arg
+        try:
+            compiled = clauseelement.compile(
+                dialect=_dialect,
+                column_keys=list(bound) if bound else None,
+                compile_kwargs={"render_postcompile": True},
+            )
+            sql = str(compiled)
+            values = compiled.construct_params(bound or None)
+        except Exception:
+            logger.debug("query_capture.compile_failed", exc_info=True)
+            return
+        with self._lock:
+            if sql in self._seen:
+                return
+            self._seen.add(sql)
+            line = json.dumps({"sql": sql, "params": values, "pid": os.getpid()}, default=str)
+            with open(self.path, "a", encoding="utf-8") as handle:
+                handle.write(line + "\n")
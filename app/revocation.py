@@ -0,0 +1,94 @@
+import asyncio
+import logging
+from datetime import timedelta
+from threading import Lock
+from time import monotonic
+from typing import Optional
+from sqlalchemy import select
+from app.config import settings
+from app.models import RefreshToken, utcnow_naive
+
+logger = logging.getLogger(__name__)
+
+
+class RevokedSessions:
+    """Login sessions (refresh-token families) revoked within the access-token lifetime.
+
+    Access tokens carry their session id in the ``sid`` claim, and
+    ``get_current_user`` checks it against this in-memory map, so no
+    request pays a database round trip for revocation. Revocations made by
+    this process apply at once; revocations from other processes are picked
+    up by polling ``refresh_tokens.revoked_at`` every ``poll_seconds``.
+    Entries expire when every access token issued before the revocation
+    has expired.
+    """
+
+    def __init__(self, ttl_seconds: float, poll_seconds: float):
+        self.ttl_seconds = ttl_seconds
+        self.poll_seconds = poll_seconds
+        # session id -> monotonic time after which the entry can be dropped
+        self._revoked: dict[str, float] = {}
+        self._lock = Lock()
+        self._task: Optional[asyncio.Task] = None
+
+    def add(self, session_id):
+        with self._lock:
+            self._revoked[str(session_id)] = monotonic() + self.ttl_seconds
+
+    def is_revoked(self, session_id: str) -> bool:
+        expires = self._revoked.get(session_id)
+        return expires is not None and expires > monotonic()
+
+    def reload(self, session_factory):
+        """Replace the map with the families revoked in the last ``ttl_seconds``."""
+        now = utcnow_naive()
+        with session_factory() as db:
+            rows = db.execute(
+                select(RefreshToken.family_id, RefreshToken.revoked_at)
+                .where(RefreshToken.revoked_at >= now - timedelta(seconds=self.ttl_seconds))
+                .distinct()
+            ).all()
+        clock = monotonic()
+        revoked = {}
+        for family_id, revoked_at in rows:
+            expires = clock + self.ttl_seconds - (now - revoked_at).total_seconds()
+            revoked[str(family_id)] = max(expires, revoked.get(str(family_id), expires))
+        with self._lock:
+            # Keep live local entries the query may have raced with.
+            for session_id, expires in self._revoked.items():
+                if expires > clock and session_id not in revoked:
+                    revoked[session_id] = expires
+            self._revoked = revoked
+
+    def __len__(self) -> int:
+        return len(self._revoked)
+
+    async def start(self, session_factory):
+        if self._task is None:
+            self._task = asyncio.create_task(self._run(session_factory), name="revoked-sessions")
+            logger.info("revocation.poller.started", extra={"poll_seconds": self.poll_seconds})
+
+    async def stop(self):
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+            logger.info("revocation.poller.stopped")
+
+    async def _run(self, session_factory):
+        loop = asyncio.get_running_loop()
+        while True:
+            try:
+                await loop.run_in_executor(None, self.reload, session_factory)
+            except Exception:
+                logger.exception("revocation.reload.failed")
+            await asyncio.sleep(self.poll_seconds)
+
+
+revoked_sessions = RevokedSessions(
+    ttl_seconds=settings.access_token_expire_minutes * 60,
+    poll_seconds=settings.revocation_poll_seconds,
+)
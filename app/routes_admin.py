@@ -0,0 +1,31 @@
+from fastapi import APIRouter, Depends, Query
+import logging
+from app.auth import require_admin
+from app.lock_telemetry import wallet_locks
+from app.tracing import to_otlp, trace_buffer
+
+router = APIRouter(prefix="/admin", tags=["admin"], dependencies=[Depends(require_admin)])
+logger = logging.getLogger(__name__)
+
+
+@router.get("/wallet-locks")
+def wallet_lock_report(top: int = Query(10, ge=1, le=100)):
+    """Hottest wallets by row-lock count, with lock wait and hold percentiles."""
+    report = wallet_locks.report(top_n=top)
+    logger.info(
+        "admin.wallet_locks.reported",
+        extra={
+            "locks": report["locks"],
+            "wait_p99_ms": report["wait_ms"]["p99"],
+            "hottest": [entry["customer_id"] for entry in report["hottest"]],
+        },
+    )
+    return report
+
+
+@router.get("/traces")
+def recent_traces(limit: int = Query(20, ge=1, le=1000)):
+    """Most recently kept traces as an OTLP/JSON export request."""
+    traces = trace_buffer.recent(limit)
+    logger.info("admin.traces.reported", extra={"traces": len(traces)})
+    return to_otlp(traces)
@@ -1,20 +1,37 @@
-from fastapi import APIRouter, Depends, HTTPException
+from fastapi import APIRouter, Depends, HTTPException, Query, Request
 from sqlalchemy.orm import Session
 from uuid import UUID
+from datetime import datetime, timezone
 import logging
-from typing import List
+from typing import List, Optional
 from app.db import get_db
 from app.schemas import OrderCreate, OrderResponse, OrderDetail
 from app.config import settings
-from app import services
+from app import circuit_breaker, services
 from app.auth import get_current_user
+from app.admission import admission, CRITICAL, STANDARD
+from app.db_budget import db_budget, timeout_reason, EXPORT, ORDER_WRITE
+from app.etag import weak_etag, etag_matches, not_modified, set_revalidation_headers
+from app.serializers import JSONBytesResponse, orders_json
 
 logger = logging.getLogger(__name__)
 
 router = APIRouter(prefix="/orders", tags=["orders"])
 
 
-@router.post("", response_model=OrderResponse, status_code=201)
+def _as_naive_utc(value: Optional[datetime]) -> Optional[datetime]:
+    """Normalize query datetimes to the naive UTC stored in created_at."""
+    if value is None or value.tzinfo is None:
+        return value
+    return value.astimezone(timezone.utc).replace(tzinfo=None)
+
+
+@router.post(
+    "",
+    response_model=OrderResponse,
+    status_code=201,
+    dependencies=[Depends(admission(CRITICAL)), Depends(db_budget(ORDER_WRITE))],
+)
 def create_order(
     order_input: OrderCreate,
     db: Session = Depends(get_db),
@@ -56,9 +73,14 @@ def create_order(
         )
         raise HTTPException(status_code=400, detail=str(e))
 
-    except Exception:
+    except Exception as e:
+        if timeout_reason(e):
+            # Over its DB time budget: db_budget turns this into a retryable 503.
+            raise
         logger.exception("Order processing failed")
         if settings.enable_graceful_degradation:
+            if circuit_breaker.is_connection_failure(e):
+                raise circuit_breaker.unavailable() from e
             raise HTTPException(
                 status_code=503,
                 detail="Order service temporarily unavailable"
@@ -69,16 +91,41 @@ def create_order(
         )
 
 
-@router.get("", response_model=List[OrderDetail])
+@router.get(
+    "",
+    response_model=List[OrderDetail],
+    dependencies=[Depends(admission(STANDARD)), Depends(db_budget(EXPORT))],
+)
 def list_orders(
+    request: Request,
+    created_from: Optional[datetime] = Query(None, description="Inclusive lower bound on created_at"),
+    created_to: Optional[datetime] = Query(None, description="Exclusive upper bound on created_at"),
     db: Session = Depends(get_db),
     current_user_id: UUID = Depends(get_current_user)
 ):
-    """List all orders for the authenticated user."""
+    """List orders for the authenticated user, optionally within a created_at range.
+
+    Honors If-None-Match with a weak ETag over the order count and latest
+    updated_at, so unchanged polls are answered before the list is loaded.
+    A date range lets the database skip order partitions outside it.
+    Rows are encoded straight to JSON bytes; the body matches List[OrderDetail].
+    """
     logger.info("order.list.started", extra={"user_id": str(current_user_id)})
-    orders = services.get_orders_by_customer(db, current_user_id)
+    window = (_as_naive_utc(created_from), _as_naive_utc(created_to))
+    if_none_match = request.headers.get("if-none-match")
+    if if_none_match:
+        count, latest = services.get_orders_version(db, current_user_id, *window)
+        etag = weak_etag("orders", current_user_id, *window, count, latest)
+        if etag_matches(if_none_match, etag):
+            logger.info("order.list.not_modified", extra={"user_id": str(current_user_id)})
+            return not_modified(etag)
+
+    orders = services.get_orders_by_customer(db, current_user_id, *window)
+    latest = max((order.updated_at for order in orders if order.updated_at), default=None)
+    response = JSONBytesResponse(orders_json(current_user_id, orders))
+    set_revalidation_headers(response, weak_etag("orders", current_user_id, *window, len(orders), latest))
     logger.info(
         "order.list.succeeded",
         extra={"user_id": str(current_user_id), "count": len(orders)},
     )
-    return orders
+    return response
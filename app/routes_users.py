@@ -1,13 +1,16 @@
 from fastapi import APIRouter, Depends, HTTPException, Request, status
+from sqlalchemy.exc import SQLAlchemyError
 from sqlalchemy.orm import Session
 from uuid import UUID
 import logging
 from app.db import get_db
-from app.schemas import UserCreate, UserResponse, UserDetail, UserLogin, Token
+from app.schemas import RefreshRequest, UserCreate, UserResponse, UserDetail, UserLogin, Token
 from app import services
-from app.auth import create_access_token, hash_password, verify_password, get_current_user
+from app.auth import create_access_token, hash_password, password_needs_rehash, verify_password, get_current_user
 from app.config import settings
 from app.security import LoginAttemptLimiter
+from app.admission import admission, STANDARD, LOW
+from app.db_budget import db_budget, DEFAULT
 
 router = APIRouter(prefix="/users", tags=["users"])
 logger = logging.getLogger(__name__)
@@ -17,7 +20,12 @@ login_limiter = LoginAttemptLimiter(
 )
 
 
-@router.post("/signup", response_model=UserResponse, status_code=201)
+@router.post(
+    "/signup",
+    response_model=UserResponse,
+    status_code=201,
+    dependencies=[Depends(admission(LOW)), Depends(db_budget(DEFAULT))],
+)
 def signup(user_input: UserCreate, db: Session = Depends(get_db)):
     """Register a new user with email + password credentials."""
     logger.info("user.signup.started", extra={"email": user_input.email})
@@ -35,7 +43,11 @@ def signup(user_input: UserCreate, db: Session = Depends(get_db)):
     return created_user
 
 
-@router.post("/login", response_model=Token)
+@router.post(
+    "/login",
+    response_model=Token,
+    dependencies=[Depends(admission(STANDARD)), Depends(db_budget(DEFAULT))],
+)
 def login(login_input: UserLogin, request: Request, db: Session = Depends(get_db)):
     """Authenticate a user and issue a bearer token."""
     client_ip = request.client.host if request.client else "unknown"
@@ -62,7 +74,15 @@ def login(login_input: UserLogin, request: Request, db: Session = Depends(get_db
         login_limiter.register_failure(limiter_key)
         raise HTTPException(status_code=400, detail="Invalid credentials")
 
-    access_token = create_access_token(data={"sub": str(user_record.id)})
+    if password_needs_rehash(user_record.hashed_password):
+        try:
+            services.update_password_hash(db, user_record, hash_password(login_input.password))
+        except SQLAlchemyError:
+            db.rollback()
+            logger.exception("user.login.rehash_failed", extra={"user_id": str(user_record.id)})
+
+    refresh_token, session_id = services.issue_refresh_token(db, user_record.id)
+    access_token = create_access_token(data={"sub": str(user_record.id), "sid": str(session_id)})
     login_limiter.clear(limiter_key)
     logger.info(
         "user.login.succeeded",
@@ -70,11 +90,49 @@ def login(login_input: UserLogin, request: Request, db: Session = Depends(get_db
     )
     return {
         "access_token": access_token,
-        "token_type": "bearer"
+        "token_type": "bearer",
+        "refresh_token": refresh_token,
+    }
+
+
+@router.post(
+    "/token/refresh",
+    response_model=Token,
+    dependencies=[Depends(admission(STANDARD)), Depends(db_budget(DEFAULT))],
+)
+def refresh_access_token(refresh_input: RefreshRequest, db: Session = Depends(get_db)):
+    """Exchange a refresh token for a new access token and a new refresh token.
+
+    Each refresh token works once; replaying a used one ends the session.
+    """
+    try:
+        refresh_token, user_id, session_id = services.rotate_refresh_token(db, refresh_input.refresh_token)
+    except LookupError:
+        raise HTTPException(status_code=status.HTTP_401_UNAUTHORIZED, detail="Invalid refresh token")
+    access_token = create_access_token(data={"sub": str(user_id), "sid": str(session_id)})
+    return {
+        "access_token": access_token,
+        "token_type": "bearer",
+        "refresh_token": refresh_token,
     }
 
 
-@router.get("/me", response_model=UserDetail)
+@router.post(
+    "/logout",
+    status_code=status.HTTP_204_NO_CONTENT,
+    dependencies=[Depends(admission(STANDARD)), Depends(db_budget(DEFAULT))],
+)
+def logout(refresh_input: RefreshRequest, db: Session = Depends(get_db)):
+    """Revoke the session's refresh tokens and its outstanding access tokens."""
+    if not services.revoke_refresh_token(db, refresh_input.refresh_token):
+        raise HTTPException(status_code=status.HTTP_401_UNAUTHORIZED, detail="Invalid refresh token")
+
+
+@router.get(
+    "/me",
+    response_model=UserDetail,
+    dependencies=[Depends(admission(STANDARD)), Depends(db_budget(DEFAULT))],
+)
 def get_current_user_profile(
     current_user_id: UUID = Depends(get_current_user),
     db: Session = Depends(get_db)
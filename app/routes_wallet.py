@@ -1,17 +1,24 @@
-from fastapi import APIRouter, Depends, HTTPException
+from fastapi import APIRouter, Depends, HTTPException, Request, Response
 from sqlalchemy.orm import Session
 from uuid import UUID
 import logging
 from app.db import get_db
-from app.schemas import WalletOperation, WalletResponse
+from app.schemas import WalletOperation, WalletResponse, WalletTransferCreate, WalletTransferResponse
 from app import services
 from app.auth import get_current_user
+from app.admission import admission, CRITICAL, STANDARD
+from app.db_budget import db_budget, DEFAULT, WALLET_WRITE
+from app.etag import weak_etag, etag_matches, not_modified, set_revalidation_headers
 
 router = APIRouter(prefix="/wallet", tags=["wallet"])
 logger = logging.getLogger(__name__)
 
 
-@router.post("/me/credit", response_model=WalletResponse)
+@router.post(
+    "/me/credit",
+    response_model=WalletResponse,
+    dependencies=[Depends(admission(CRITICAL)), Depends(db_budget(WALLET_WRITE))],
+)
 def credit_wallet(
     operation: WalletOperation,
     db: Session = Depends(get_db),
@@ -22,7 +29,7 @@ def credit_wallet(
         "wallet.credit.started",
         extra={"user_id": str(current_user_id), "amount": str(operation.amount)},
     )
-    wallet = services.credit_wallet(db, current_user_id, operation.amount)
+    wallet = services.credit_wallet(db, current_user_id, operation.stored_amount)
     logger.info(
         "wallet.credit.succeeded",
         extra={"user_id": str(current_user_id), "balance": str(wallet.balance)},
@@ -30,11 +37,15 @@ def credit_wallet(
 
     return WalletResponse(
         customer_id=wallet.customer_id,
-        balance=wallet.balance
+        balance=wallet.balance_major
     )
 
 
-@router.post("/me/debit", response_model=WalletResponse)
+@router.post(
+    "/me/debit",
+    response_model=WalletResponse,
+    dependencies=[Depends(admission(CRITICAL)), Depends(db_budget(WALLET_WRITE))],
+)
 def debit_wallet(
     operation: WalletOperation,
     db: Session = Depends(get_db),
@@ -46,7 +57,7 @@ def debit_wallet(
         extra={"user_id": str(current_user_id), "amount": str(operation.amount)},
     )
     try:
-        wallet = services.debit_wallet(db, current_user_id, operation.amount)
+        wallet = services.debit_wallet(db, current_user_id, operation.stored_amount)
         logger.info(
             "wallet.debit.succeeded",
             extra={"user_id": str(current_user_id), "balance": str(wallet.balance)},
@@ -54,7 +65,7 @@ def debit_wallet(
 
         return WalletResponse(
             customer_id=wallet.customer_id,
-            balance=wallet.balance
+            balance=wallet.balance_major
         )
 
     except ValueError as e:
@@ -65,13 +76,81 @@ def debit_wallet(
         raise HTTPException(status_code=400, detail=str(e))
 
 
-@router.get("/me", response_model=WalletResponse)
+@router.post(
+    "/me/transfer",
+    response_model=WalletTransferResponse,
+    status_code=201,
+    dependencies=[Depends(admission(CRITICAL)), Depends(db_budget(WALLET_WRITE))],
+)
+def transfer_from_wallet(
+    transfer: WalletTransferCreate,
+    db: Session = Depends(get_db),
+    current_user_id: UUID = Depends(get_current_user)
+):
+    """Move funds from the authenticated user's wallet to another customer's wallet."""
+    logger.info(
+        "wallet.transfer.started",
+        extra={
+            "user_id": str(current_user_id),
+            "to_user_id": str(transfer.to_customer_id),
+            "amount": str(transfer.amount),
+            "idempotency_key": transfer.idempotency_key,
+        },
+    )
+    try:
+        record, wallet = services.transfer_wallet(
+            db,
+            current_user_id,
+            transfer.to_customer_id,
+            transfer.stored_amount,
+            idempotency_key=transfer.idempotency_key,
+        )
+    except LookupError as e:
+        logger.warning(
+            "wallet.transfer.rejected",
+            extra={"user_id": str(current_user_id), "reason": str(e)},
+        )
+        raise HTTPException(status_code=404, detail=str(e))
+    except ValueError as e:
+        logger.warning(
+            "wallet.transfer.rejected",
+            extra={"user_id": str(current_user_id), "reason": str(e)},
+        )
+        raise HTTPException(status_code=400, detail=str(e))
+
+    logger.info(
+        "wallet.transfer.succeeded",
+        extra={"user_id": str(current_user_id), "transfer_id": str(record.id), "balance": str(wallet.balance)},
+    )
+    return WalletTransferResponse(
+        transfer_id=record.id,
+        to_customer_id=record.to_customer_id,
+        amount=record.amount_major,
+        balance=wallet.balance_major,
+    )
+
+
+@router.get(
+    "/me",
+    response_model=WalletResponse,
+    dependencies=[Depends(admission(STANDARD)), Depends(db_budget(DEFAULT))],
+)
 def get_wallet(
+    request: Request,
+    response: Response,
     db: Session = Depends(get_db),
     current_user_id: UUID = Depends(get_current_user)
 ):
     """Get wallet balance for the authenticated user."""
     logger.info("wallet.get.started", extra={"user_id": str(current_user_id)})
+    if_none_match = request.headers.get("if-none-match")
+    version = services.get_wallet_version(db, current_user_id) if if_none_match else None
+    if version is not None:
+        etag = weak_etag("wallet", current_user_id, *version)
+        if etag_matches(if_none_match, etag):
+            logger.info("wallet.get.not_modified", extra={"user_id": str(current_user_id)})
+            return not_modified(etag)
+
     wallet = services.get_wallet(db, current_user_id)
 
     if not wallet:
@@ -81,8 +160,12 @@ def get_wallet(
         "wallet.get.succeeded",
         extra={"user_id": str(current_user_id), "balance": str(wallet.balance)},
     )
+    set_revalidation_headers(
+        response,
+        weak_etag("wallet", current_user_id, wallet.updated_at, wallet.balance),
+    )
 
     return WalletResponse(
         customer_id=wallet.customer_id,
-        balance=wallet.balance
+        balance=wallet.balance_major
     )
@@ -1,8 +1,10 @@
-from pydantic import BaseModel, Field, EmailStr, ConfigDict
+from pydantic import AliasChoices, BaseModel, Field, EmailStr, ConfigDict, model_validator
 from typing import Optional
 from datetime import datetime
 from uuid import UUID
 from decimal import Decimal
+from app.config import settings
+from app.money import STORE_MINOR_UNITS, to_storage
 
 
 
@@ -39,6 +41,11 @@ class UserDetail(UserResponse):
 class Token(BaseModel):
     access_token: str
     token_type: str
+    refresh_token: Optional[str] = None
+
+
+class RefreshRequest(BaseModel):
+    refresh_token: str = Field(..., min_length=1, max_length=512)
 
 
 
@@ -49,6 +56,18 @@ class OrderCreate(BaseModel):
     amount: Decimal = Field(..., gt=0)
     currency: str = Field(default="INR", pattern=r'^[A-Z]{3}$')
     idempotency_key: Optional[str] = Field(None, max_length=255)
+    # Debit the wallet in the same transaction and create the order as paid.
+    pay_from_wallet: bool = False
+
+    @model_validator(mode="after")
+    def check_currency_precision(self):
+        if STORE_MINOR_UNITS:
+            to_storage(self.amount, self.currency)
+        return self
+
+    @property
+    def stored_amount(self) -> Decimal | int:
+        return to_storage(self.amount, self.currency)
 
 
 class OrderResponse(BaseModel):
@@ -61,7 +80,8 @@ class OrderResponse(BaseModel):
 class OrderDetail(BaseModel):
     id: UUID
     customer_id: UUID
-    amount: Decimal
+    # Read through Order.amount_major so minor-unit storage is converted here, once.
+    amount: Decimal = Field(validation_alias=AliasChoices("amount_major", "amount"))
     currency: str
     status: str
     idempotency_key: Optional[str]
@@ -77,6 +97,29 @@ class OrderDetail(BaseModel):
 class WalletOperation(BaseModel):
     amount: Decimal = Field(..., gt=0)
 
+    @model_validator(mode="after")
+    def check_currency_precision(self):
+        if STORE_MINOR_UNITS:
+            to_storage(self.amount, settings.wallet_currency)
+        return self
+
+    @property
+    def stored_amount(self) -> Decimal | int:
+        return to_storage(self.amount, settings.wallet_currency)
+
+
+class WalletTransferCreate(WalletOperation):
+    to_customer_id: UUID
+    idempotency_key: Optional[str] = Field(None, max_length=255)
+
+
+class WalletTransferResponse(BaseModel):
+    transfer_id: UUID
+    to_customer_id: UUID
+    amount: Decimal
+    # Sender's balance after the transfer.
+    balance: Decimal
+
 
 class WalletResponse(BaseModel):
     customer_id: UUID
@@ -0,0 +1,32 @@
+import orjson
+from fastapi import Response
+from app.money import from_storage
+
+
+class JSONBytesResponse(Response):
+    """Response for a body that is already encoded JSON.
+
+    Returning it from a route bypasses ``response_model`` validation and
+    re-encoding; the route's ``response_model`` still documents the shape.
+    """
+
+    media_type = "application/json"
+
+
+def orders_json(customer_id, rows) -> bytes:
+    """Encode ``services.get_orders_by_customer`` rows exactly as ``List[OrderDetail]`` would."""
+    customer_id = str(customer_id)
+    return orjson.dumps(
+        [
+            {
+                "id": order_id,
+                "customer_id": customer_id,
+                "amount": str(from_storage(amount, currency)),
+                "currency": currency,
+                "status": status,
+                "idempotency_key": idempotency_key,
+                "created_at": created_at,
+            }
+            for order_id, amount, currency, status, idempotency_key, created_at, _ in rows
+        ]
+    )
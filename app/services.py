@@ -1,13 +1,126 @@
+from sqlalchemy import Text, cast, delete, func, select, update
+from sqlalchemy.engine import Row
 from sqlalchemy.orm import Session
-from sqlalchemy.exc import SQLAlchemyError
-from app.models import User, Order, Wallet
+from sqlalchemy.orm.attributes import set_committed_value
+from sqlalchemy.exc import DBAPIError, IntegrityError, OperationalError, SQLAlchemyError
+from app.models import User, Order, RefreshToken, Wallet, WalletTransfer, utcnow_naive
 from app.schemas import UserCreate, OrderCreate
+from app.cache import CACHE_MISS, UserCache, UserRecord
+from app.config import settings
+from app.db import pipeline
+from app.lock_telemetry import wallet_locks
+from app.metrics import metrics
+from app.outbox import ORDER_CREATED, WALLET_CHANGED, lock_customer_events, record_event
+from app.revocation import revoked_sessions
+from app.money import ZERO, from_storage
+from app import settlement
+from app.singleflight import SingleFlight
+from app.tracing import traced
 from uuid import UUID
+from datetime import datetime, timedelta
 from decimal import Decimal
+from time import monotonic, perf_counter, sleep
+from typing import Callable, NamedTuple, TypeVar
+import hashlib
 import logging
+import random
+import secrets
 import uuid
 
 logger = logging.getLogger(__name__)
+user_cache = UserCache(
+    max_entries=settings.user_cache_max_entries,
+    ttl_seconds=settings.user_cache_ttl_seconds,
+    negative_ttl_seconds=settings.user_cache_negative_ttl_seconds,
+)
+read_flight = SingleFlight("reads")
+metrics.register_collector("user_cache", user_cache.stats)
+metrics.register_collector("read_coalescing", read_flight.stats)
+
+
+def _coalesced_read(key: tuple, fn):
+    """Run a read through the single-flight layer when coalescing is enabled."""
+    if not settings.read_coalescing_enabled:
+        return fn()
+    return read_flight.do(key, fn)
+
+
+T = TypeVar("T")
+
+# SQLSTATEs after which PostgreSQL has already rolled the transaction back.
+RETRYABLE_SQLSTATES = {
+    "40001": "serialization_failure",
+    "40P01": "deadlock",
+    "55P03": "lock_timeout",
+}
+
+
+def _retry_reason(exc: Exception) -> str | None:
+    """Name the transient failure behind ``exc``, or None if it must not be retried.
+
+    Only errors that guarantee nothing was committed qualify. A dropped
+    connection never does: the COMMIT may have landed before it broke.
+    """
+    if not isinstance(exc, DBAPIError) or exc.connection_invalidated:
+        return None
+    sqlstate = getattr(exc.orig, "pgcode", None) or getattr(exc.orig, "sqlstate", None)
+    if sqlstate in RETRYABLE_SQLSTATES:
+        return RETRYABLE_SQLSTATES[sqlstate]
+    if isinstance(exc, OperationalError) and "database is locked" in str(exc.orig):
+        return "sqlite_busy"
+    return None
+
+
+def run_in_transaction(
+    db: Session,
+    name: str,
+    work: Callable[[], T],
+    deadline_seconds: float | None = None,
+) -> T:
+    """Run ``work`` and commit as one unit, re-running both on transient DB errors.
+
+    ``work`` must do all its reads and writes through ``db`` and be safe to
+    repeat from scratch. On a deadlock, serialization failure or lock timeout
+    the session is rolled back and ``work`` runs again after a full-jitter
+    exponential backoff, until it commits, fails for another reason, uses up
+    ``DB_RETRY_MAX_ATTEMPTS`` or would sleep past the deadline. Nothing is
+    re-run once COMMIT has succeeded. Any failure rolls the session back.
+    """
+    if deadline_seconds is None:
+        deadline_seconds = settings.db_retry_deadline_ms / 1000
+    deadline = monotonic() + deadline_seconds
+    attempt = 1
+    while True:
+        try:
+            result = work()
+            db.commit()
+        except Exception as exc:
+            db.rollback()
+            reason = _retry_reason(exc)
+            if reason is None:
+                if isinstance(exc, SQLAlchemyError):
+                    logger.exception("db.transaction.failed", extra={"transaction": name, "attempt": attempt})
+                raise
+            backoff_ms = min(settings.db_retry_max_delay_ms, settings.db_retry_base_delay_ms * 2 ** (attempt - 1))
+            delay = random.uniform(0, backoff_ms) / 1000
+            if attempt >= settings.db_retry_max_attempts or monotonic() + delay > deadline:
+                metrics.increment(f"db_retry.{name}.exhausted")
+                logger.error(
+                    "db.transaction.retries_exhausted",
+                    extra={"transaction": name, "attempt": attempt, "reason": reason},
+                )
+                raise
+            metrics.increment(f"db_retry.{name}.{reason}")
+            logger.warning(
+                "db.transaction.retrying",
+                extra={"transaction": name, "attempt": attempt, "reason": reason, "delay_ms": round(delay * 1000, 2)},
+            )
+            sleep(delay)
+            attempt += 1
+            continue
+        if attempt > 1:
+            metrics.increment(f"db_retry.{name}.recovered")
+        return result
 
 
 def _commit_and_refresh(db: Session, instance):
@@ -28,15 +141,32 @@ def _commit_and_refresh(db: Session, instance):
         raise
 
 
-def get_user_by_email(db: Session, email: str) -> User | None:
+@traced
+def get_user_by_email(db: Session, email: str) -> UserRecord | None:
     logger.info("service.user.get_by_email.started", extra={"email": email})
+    cached = user_cache.get_by_email(email)
+    if cached is not CACHE_MISS:
+        logger.info(
+            "service.user.get_by_email.completed",
+            extra={"email": email, "found": cached is not None, "cached": True},
+        )
+        return cached
+
+    version = user_cache.version()
     user = db.query(User).filter(User.email == email).first()
+    if user:
+        record = UserRecord.from_model(user)
+        user_cache.put(record, version)
+    else:
+        record = None
+        user_cache.put_missing_email(email, version)
     logger.info(
         "service.user.get_by_email.completed",
-        extra={"email": email, "found": user is not None},
+        extra={"email": email, "found": record is not None, "cached": False},
     )
-    return user
+    return record
 
+@traced
 def create_user(
     db: Session,
     user_data: UserCreate,
@@ -54,6 +184,7 @@ def create_user(
 
     db.add(user)
     _commit_and_refresh(db, user)
+    user_cache.invalidate(user_id=user.id, email=user.email)
     logger.info(
         "service.user.create.succeeded",
         extra={"user_id": str(user.id), "email": user.email},
@@ -61,16 +192,48 @@ def create_user(
     return user
 
 
-def get_user(db: Session, user_id: UUID) -> User | None:
+@traced
+def update_password_hash(db: Session, user: UserRecord, new_hash: str) -> bool:
+    """Replace a user's password hash if it is still the one ``user`` was read with.
+
+    Used to upgrade hashes on login; a concurrent password change wins.
+    """
+    result = db.execute(
+        update(User)
+        .where(User.id == user.id, User.hashed_password == user.hashed_password)
+        .values(hashed_password=new_hash)
+    )
+    db.commit()
+    user_cache.invalidate(user_id=user.id, email=user.email)
+    updated = result.rowcount == 1
+    logger.info("service.user.password_rehashed", extra={"user_id": str(user.id), "updated": updated})
+    return updated
+
+
+@traced
+def get_user(db: Session, user_id: UUID) -> UserRecord | None:
     logger.info("service.user.get.started", extra={"user_id": str(user_id)})
+    cached = user_cache.get_by_id(user_id)
+    if cached is not CACHE_MISS:
+        logger.info(
+            "service.user.get.completed",
+            extra={"user_id": str(user_id), "found": True, "cached": True},
+        )
+        return cached
+
+    version = user_cache.version()
     user = db.query(User).filter(User.id == user_id).first()
+    record = UserRecord.from_model(user) if user else None
+    if record:
+        user_cache.put(record, version)
     logger.info(
         "service.user.get.completed",
-        extra={"user_id": str(user_id), "found": user is not None},
+        extra={"user_id": str(user_id), "found": record is not None, "cached": False},
     )
-    return user
+    return record
 
 
+@traced
 def list_users(db: Session, skip: int = 0, limit: int = 100) -> list[User]:
     logger.info("service.user.list.started", extra={"skip": skip, "limit": limit})
     users = db.query(User).offset(skip).limit(limit).all()
@@ -79,6 +242,7 @@ def list_users(db: Session, skip: int = 0, limit: int = 100) -> list[User]:
 
 
 
+@traced
 def create_order(
     db: Session,
     order_data: OrderCreate,
@@ -88,22 +252,72 @@ def create_order(
     Create order securely.
     - customer_id comes ONLY from authenticated user
     - idempotency supported
+    - retried as a whole on transient DB errors
+    - with ``pay_from_wallet``, the wallet is locked and debited in the same
+      transaction and the order is created as paid; insufficient funds roll
+      back both
     """
-
-    if order_data.idempotency_key:
-        existing = db.query(Order).filter(
-            Order.idempotency_key == order_data.idempotency_key
-        ).first()
-        if existing:
-            logger.info(
-                "service.order.idempotent_hit",
-                extra={
-                    "user_id": str(user_id),
-                    "order_id": str(existing.id),
-                    "idempotency_key": order_data.idempotency_key,
+    if order_data.pay_from_wallet and order_data.currency != settings.wallet_currency:
+        raise ValueError(f"Wallet payments must be in {settings.wallet_currency}")
+
+    def create() -> tuple[Order, bool]:
+        # Lock the wallet before the idempotency check, so concurrent retries
+        # of one payment serialize here and the second one finds the order.
+        wallet = _get_wallet_for_update(db, user_id) if order_data.pay_from_wallet else None
+        if order_data.idempotency_key:
+            existing = db.query(Order).filter(
+                Order.idempotency_key == order_data.idempotency_key
+            ).first()
+            if existing:
+                return existing, False
+
+        amount = order_data.stored_amount
+        if wallet is not None and wallet.balance < amount:
+            logger.warning(
+                "service.order.payment.insufficient_funds",
+                extra={"user_id": str(user_id), "amount": str(amount), "balance": str(wallet.balance)},
+            )
+            raise ValueError("Insufficient balance")
+
+        lock_customer_events(db, user_id)
+        order = Order(
+            id=uuid.uuid4(),
+            customer_id=user_id,
+            amount=amount,
+            currency=order_data.currency,
+            idempotency_key=order_data.idempotency_key,
+            status=settlement.ORDER_PAID if wallet is not None else settlement.ORDER_CREATED
+        )
+        db.add(order)
+        with pipeline(db):
+            # Both INSERTs have client-side keys, so they go out in one round trip on psycopg 3.
+            db.flush()
+            if wallet is not None:
+                _write_wallet_balance(db, wallet, wallet.balance - amount)
+                record_event(
+                    db,
+                    WALLET_CHANGED,
+                    user_id,
+                    {
+                        "change": "order_payment",
+                        "amount": order_data.amount,
+                        "balance": wallet.balance_major,
+                        "order_id": order.id,
+                    },
+                )
+            record_event(
+                db,
+                ORDER_CREATED,
+                user_id,
+                {
+                    "order_id": order.id,
+                    "amount": order_data.amount,
+                    "currency": order.currency,
+                    "status": order.status,
+                    "idempotency_key": order.idempotency_key,
                 },
             )
-            return existing
+        return order, True
 
     logger.info(
         "service.order.create.started",
@@ -114,17 +328,22 @@ def create_order(
             "idempotency_key": order_data.idempotency_key,
         },
     )
-    order = Order(
-        id=uuid.uuid4(),
-        customer_id=user_id,
-        amount=order_data.amount,
-        currency=order_data.currency,
-        idempotency_key=order_data.idempotency_key,
-        status="created"
-    )
+    order, created = run_in_transaction(db, "create_order", create)
+    if not created:
+        logger.info(
+            "service.order.idempotent_hit",
+            extra={
+                "user_id": str(user_id),
+                "order_id": str(order.id),
+                "idempotency_key": order_data.idempotency_key,
+            },
+        )
+        return order
 
-    db.add(order)
-    _commit_and_refresh(db, order)
+    db.refresh(order)
+    read_flight.forget_prefix(("orders", user_id))
+    if order_data.pay_from_wallet:
+        read_flight.forget(("wallet", user_id))
     logger.info(
         "service.order.create.succeeded",
         extra={"user_id": str(user_id), "order_id": str(order.id)},
@@ -132,17 +351,90 @@ def create_order(
     return order
 
 
-def get_orders_by_customer(db: Session, customer_id: UUID) -> list[Order]:
+def _orders_for_customer(
+    query,
+    customer_id: UUID,
+    created_from: datetime | None,
+    created_to: datetime | None,
+):
+    """Filter by customer and, when given, a created_at range [from, to).
+
+    The range lets PostgreSQL prune monthly order partitions at plan time.
+    """
+    query = query.filter(Order.customer_id == customer_id)
+    if created_from is not None:
+        query = query.filter(Order.created_at >= created_from)
+    if created_to is not None:
+        query = query.filter(Order.created_at < created_to)
+    return query
+
+
+def _order_list_columns(db: Session) -> tuple:
+    """Columns of get_orders_by_customer rows: id, amount, currency, status,
+    idempotency_key, created_at, updated_at."""
+    order_id = Order.id
+    if db.get_bind().dialect.name == "postgresql":
+        # psycopg2 builds a uuid.UUID per value; callers only need the text form.
+        order_id = cast(Order.id, Text)
+    return (
+        order_id,
+        Order.amount,
+        Order.currency,
+        Order.status,
+        Order.idempotency_key,
+        Order.created_at,
+        Order.updated_at,
+    )
+
+
+@traced
+def get_orders_by_customer(
+    db: Session,
+    customer_id: UUID,
+    created_from: datetime | None = None,
+    created_to: datetime | None = None,
+) -> list[Row]:
+    """List a customer's orders as Core rows (see ``_order_list_columns``).
+
+    The query runs on the session's connection, skipping ORM instance
+    construction and identity-map bookkeeping; being immutable, the rows are
+    safe to share between coalesced callers. ``customer_id`` is not selected
+    since the caller already has it. Concurrent identical calls share one query.
+    """
     logger.info("service.order.list.started", extra={"user_id": str(customer_id)})
-    orders = db.query(Order).filter(
-        Order.customer_id == customer_id
-    ).all()
+    orders = _coalesced_read(
+        ("orders", customer_id, created_from, created_to),
+        lambda: db.connection().execute(
+            _orders_for_customer(select(*_order_list_columns(db)), customer_id, created_from, created_to)
+        ).all(),
+    )
     logger.info(
         "service.order.list.completed",
         extra={"user_id": str(customer_id), "count": len(orders)},
     )
     return orders
 
+@traced
+def get_orders_version(
+    db: Session,
+    customer_id: UUID,
+    created_from: datetime | None = None,
+    created_to: datetime | None = None,
+) -> tuple[int, object]:
+    """Return (count, max updated_at) of a customer's orders without loading them."""
+    count, latest = _orders_for_customer(
+        db.query(func.count(Order.id), func.max(Order.updated_at)),
+        customer_id,
+        created_from,
+        created_to,
+    ).one()
+    logger.info(
+        "service.order.version.completed",
+        extra={"user_id": str(customer_id), "count": count},
+    )
+    return count, latest
+
+
 def _get_wallet_for_update(
     db: Session,
     customer_id: UUID
@@ -153,6 +445,7 @@ def _get_wallet_for_update(
     """
 
     logger.info("service.wallet.lock_fetch.started", extra={"user_id": str(customer_id)})
+    started = perf_counter()
     wallet = db.query(Wallet)\
         .filter(Wallet.customer_id == customer_id)\
         .with_for_update()\
@@ -161,54 +454,131 @@ def _get_wallet_for_update(
     if not wallet:
         wallet = Wallet(
             customer_id=customer_id,
-            balance=Decimal("0.00")
+            balance=ZERO
         )
         db.add(wallet)
         db.flush()
         logger.info("service.wallet.lock_fetch.created", extra={"user_id": str(customer_id)})
 
+    wallet_locks.acquired(db, customer_id, perf_counter() - started)
     logger.info("service.wallet.lock_fetch.completed", extra={"user_id": str(customer_id)})
     return wallet
 
 
-def get_wallet(db: Session, customer_id: UUID) -> Wallet:
+def _write_wallet_balance(db: Session, wallet: Wallet, balance):
+    """Store a locked wallet's new balance with a Core UPDATE, pipeline-safe.
+
+    The ORM would check the UPDATE rowcount straight away, which a pipeline
+    cannot answer; the row is locked, so the write cannot miss.
+    """
+    now = utcnow_naive()
+    db.execute(
+        update(Wallet)
+        .where(Wallet.customer_id == wallet.customer_id)
+        .values(balance=balance, updated_at=now)
+        .execution_options(synchronize_session=False)
+    )
+    set_committed_value(wallet, "balance", balance)
+    set_committed_value(wallet, "updated_at", now)
+
+
+class WalletRecord(NamedTuple):
+    """Immutable snapshot of a wallet row, safe to share between coalesced readers."""
+
+    customer_id: UUID
+    balance: Decimal | int
+    updated_at: datetime
+
+    @property
+    def balance_major(self) -> Decimal:
+        return from_storage(self.balance, settings.wallet_currency)
+
+
+@traced
+def get_wallet(db: Session, customer_id: UUID) -> WalletRecord:
+    """Fetch (or lazily create) a wallet; concurrent identical reads share one query.
+
+    Only the read is coalesced, and it returns a plain snapshot rather than
+    an ORM object bound to the leader's session. A missing wallet is created
+    by each caller in its own session.
+    """
     logger.info("service.wallet.get.started", extra={"user_id": str(customer_id)})
-    wallet = db.query(Wallet).filter(
+    wallet = _coalesced_read(("wallet", customer_id), lambda: _load_wallet(db, customer_id))
+    if wallet is None:
+        wallet = _create_wallet(db, customer_id)
+    logger.info("service.wallet.get.succeeded", extra={"user_id": str(customer_id)})
+    return wallet
+
+
+def _load_wallet(db: Session, customer_id: UUID) -> WalletRecord | None:
+    row = db.query(Wallet.customer_id, Wallet.balance, Wallet.updated_at).filter(
         Wallet.customer_id == customer_id
     ).first()
+    return WalletRecord(*row) if row else None
 
-    if not wallet:
-        wallet = Wallet(
-            customer_id=customer_id,
-            balance=Decimal("0.00")
-        )
-        db.add(wallet)
+
+def _create_wallet(db: Session, customer_id: UUID) -> WalletRecord:
+    wallet = Wallet(customer_id=customer_id, balance=ZERO)
+    db.add(wallet)
+    try:
         _commit_and_refresh(db, wallet)
-        logger.info("service.wallet.created", extra={"user_id": str(customer_id)})
+    except IntegrityError:
+        # A concurrent request created it first.
+        return _load_wallet(db, customer_id)
+    logger.info("service.wallet.created", extra={"user_id": str(customer_id)})
+    return WalletRecord(wallet.customer_id, wallet.balance, wallet.updated_at)
 
-    logger.info("service.wallet.get.succeeded", extra={"user_id": str(customer_id)})
-    return wallet
+
+@traced
+def get_wallet_version(db: Session, customer_id: UUID) -> tuple[object, Decimal | int] | None:
+    """Return (updated_at, balance) for a wallet, or None if it does not exist yet."""
+    row = db.query(Wallet.updated_at, Wallet.balance).filter(
+        Wallet.customer_id == customer_id
+    ).first()
+    logger.info(
+        "service.wallet.version.completed",
+        extra={"user_id": str(customer_id), "found": row is not None},
+    )
+    return (row.updated_at, row.balance) if row else None
 
 
+@traced
 def credit_wallet(
     db: Session,
     customer_id: UUID,
-    amount: Decimal
+    amount: Decimal | int
 ) -> Wallet:
     """
     Safe wallet credit using row-level locking.
     Prevents race conditions and lost updates.
+    Retried as a whole on transient DB errors.
+    ``amount`` is in storage units (``WalletOperation.stored_amount``).
     """
 
+    def credit() -> Wallet:
+        wallet = _get_wallet_for_update(db, customer_id)
+        lock_customer_events(db, customer_id)
+        with pipeline(db):
+            _write_wallet_balance(db, wallet, wallet.balance + amount)
+            record_event(
+                db,
+                WALLET_CHANGED,
+                customer_id,
+                {
+                    "change": "credit",
+                    "amount": from_storage(amount, settings.wallet_currency),
+                    "balance": wallet.balance_major,
+                },
+            )
+        return wallet
+
     logger.info(
         "service.wallet.credit.started",
         extra={"user_id": str(customer_id), "amount": str(amount)},
     )
-    wallet = _get_wallet_for_update(db, customer_id)
-
-    wallet.balance += amount
-
-    _commit_and_refresh(db, wallet)
+    wallet = run_in_transaction(db, "credit_wallet", credit)
+    db.refresh(wallet)
+    read_flight.forget(("wallet", customer_id))
     logger.info(
         "service.wallet.credit.succeeded",
         extra={"user_id": str(customer_id), "balance": str(wallet.balance)},
@@ -216,41 +586,286 @@ def credit_wallet(
     return wallet
 
 
+@traced
 def debit_wallet(
     db: Session,
     customer_id: UUID,
-    amount: Decimal
+    amount: Decimal | int
 ) -> Wallet:
     """
     Safe wallet debit with:
     - row-level locking
     - sufficient funds validation
-    - atomic commit
+    - atomic commit, retried as a whole on transient DB errors
+    ``amount`` is in storage units (``WalletOperation.stored_amount``).
     """
 
+    def debit() -> Wallet:
+        wallet = _get_wallet_for_update(db, customer_id)
+        if wallet.balance < amount:
+            logger.warning(
+                "service.wallet.debit.insufficient_funds",
+                extra={
+                    "user_id": str(customer_id),
+                    "amount": str(amount),
+                    "balance": str(wallet.balance),
+                },
+            )
+            raise ValueError("Insufficient balance")
+
+        lock_customer_events(db, customer_id)
+        with pipeline(db):
+            _write_wallet_balance(db, wallet, wallet.balance - amount)
+            record_event(
+                db,
+                WALLET_CHANGED,
+                customer_id,
+                {
+                    "change": "debit",
+                    "amount": from_storage(amount, settings.wallet_currency),
+                    "balance": wallet.balance_major,
+                },
+            )
+        return wallet
+
     logger.info(
         "service.wallet.debit.started",
         extra={"user_id": str(customer_id), "amount": str(amount)},
     )
-    wallet = _get_wallet_for_update(db, customer_id)
+    wallet = run_in_transaction(db, "debit_wallet", debit)
+    db.refresh(wallet)
+    read_flight.forget(("wallet", customer_id))
+    logger.info(
+        "service.wallet.debit.succeeded",
+        extra={"user_id": str(customer_id), "balance": str(wallet.balance)},
+    )
+    return wallet
 
-    if wallet.balance < amount:
-        db.rollback()
-        logger.warning(
-            "service.wallet.debit.insufficient_funds",
+
+def _find_transfer(db: Session, from_customer_id: UUID, idempotency_key: str) -> WalletTransfer | None:
+    return db.query(WalletTransfer).filter(
+        WalletTransfer.from_customer_id == from_customer_id,
+        WalletTransfer.idempotency_key == idempotency_key,
+    ).first()
+
+
+@traced
+def transfer_wallet(
+    db: Session,
+    from_customer_id: UUID,
+    to_customer_id: UUID,
+    amount: Decimal | int,
+    idempotency_key: str | None = None,
+) -> tuple[WalletTransfer, Wallet]:
+    """
+    Move funds between two wallets in one transaction:
+    - both rows locked in customer_id order, so opposite transfers cannot deadlock
+    - sufficient funds validated under the lock
+    - one commit for both balances, the transfer row and its events
+    - idempotent per sender and ``idempotency_key``
+    ``amount`` is in storage units (``WalletTransferCreate.stored_amount``).
+    Returns the transfer and the sender's wallet.
+    """
+    if from_customer_id == to_customer_id:
+        raise ValueError("Cannot transfer to the same wallet")
+
+    def transfer() -> tuple[WalletTransfer, bool]:
+        if idempotency_key:
+            existing = _find_transfer(db, from_customer_id, idempotency_key)
+            if existing:
+                return existing, False
+        if db.get(User, to_customer_id) is None:
+            raise LookupError("Recipient not found")
+
+        locked = {
+            customer_id: _get_wallet_for_update(db, customer_id)
+            for customer_id in sorted((from_customer_id, to_customer_id))
+        }
+        sender, recipient = locked[from_customer_id], locked[to_customer_id]
+        if sender.balance < amount:
+            logger.warning(
+                "service.wallet.transfer.insufficient_funds",
+                extra={
+                    "user_id": str(from_customer_id),
+                    "amount": str(amount),
+                    "balance": str(sender.balance),
+                },
+            )
+            raise ValueError("Insufficient balance")
+
+        lock_customer_events(db, from_customer_id, to_customer_id)
+        record = WalletTransfer(
+            id=uuid.uuid4(),
+            from_customer_id=from_customer_id,
+            to_customer_id=to_customer_id,
+            amount=amount,
+            idempotency_key=idempotency_key,
+            created_at=utcnow_naive(),
+        )
+        db.add(record)
+        with pipeline(db):
+            db.flush()
+            _write_wallet_balance(db, sender, sender.balance - amount)
+            _write_wallet_balance(db, recipient, recipient.balance + amount)
+            for wallet, change in ((sender, "transfer_out"), (recipient, "transfer_in")):
+                record_event(
+                    db,
+                    WALLET_CHANGED,
+                    wallet.customer_id,
+                    {
+                        "change": change,
+                        "amount": from_storage(amount, settings.wallet_currency),
+                        "balance": wallet.balance_major,
+                        "transfer_id": record.id,
+                    },
+                )
+        return record, True
+
+    logger.info(
+        "service.wallet.transfer.started",
+        extra={
+            "user_id": str(from_customer_id),
+            "to_user_id": str(to_customer_id),
+            "amount": str(amount),
+            "idempotency_key": idempotency_key,
+        },
+    )
+    try:
+        record, created = run_in_transaction(db, "transfer_wallet", transfer)
+    except IntegrityError:
+        # A concurrent request with the same key committed first.
+        existing = _find_transfer(db, from_customer_id, idempotency_key) if idempotency_key else None
+        if existing is None:
+            raise
+        record, created = existing, False
+
+    if created:
+        read_flight.forget(("wallet", from_customer_id))
+        read_flight.forget(("wallet", to_customer_id))
+        logger.info(
+            "service.wallet.transfer.succeeded",
+            extra={"user_id": str(from_customer_id), "transfer_id": str(record.id)},
+        )
+    else:
+        logger.info(
+            "service.wallet.transfer.idempotent_hit",
             extra={
-                "user_id": str(customer_id),
-                "amount": str(amount),
-                "balance": str(wallet.balance),
+                "user_id": str(from_customer_id),
+                "transfer_id": str(record.id),
+                "idempotency_key": idempotency_key,
             },
         )
-        raise ValueError("Insufficient balance")
+    sender = db.query(Wallet).filter(Wallet.customer_id == from_customer_id).one()
+    return record, sender
+
+
+def _refresh_token_hash(raw_token: str) -> str:
+    # Refresh tokens are 256 random bits, so a fast hash is enough (no KDF).
+    return hashlib.sha256(raw_token.encode("utf-8")).hexdigest()
+
+
+def _new_refresh_token(db: Session, user_id: UUID, family_id: UUID) -> str:
+    raw_token = secrets.token_urlsafe(32)
+    now = utcnow_naive()
+    db.add(
+        RefreshToken(
+            user_id=user_id,
+            family_id=family_id,
+            token_hash=_refresh_token_hash(raw_token),
+            created_at=now,
+            expires_at=now + timedelta(days=settings.refresh_token_expire_days),
+        )
+    )
+    return raw_token
+
+
+def _revoke_family(db: Session, family_id: UUID):
+    db.execute(
+        update(RefreshToken)
+        .where(RefreshToken.family_id == family_id, RefreshToken.revoked_at.is_(None))
+        .values(revoked_at=utcnow_naive())
+    )
+
+
+@traced
+def issue_refresh_token(db: Session, user_id: UUID) -> tuple[str, UUID]:
+    """Start a login session; returns the raw refresh token and the session (family) id."""
+    family_id = uuid.uuid4()
+    raw_token = _new_refresh_token(db, user_id, family_id)
+    db.commit()
+    logger.info("service.refresh_token.issued", extra={"user_id": str(user_id), "session_id": str(family_id)})
+    return raw_token, family_id
+
+
+@traced
+def rotate_refresh_token(db: Session, raw_token: str) -> tuple[str, UUID, UUID]:
+    """Exchange a refresh token for its successor: ``(raw_token, user_id, session_id)``.
+
+    Raises LookupError for unknown, expired or revoked tokens. A token that
+    was already rotated is being replayed, by an attacker or by the client
+    it was stolen from, so its whole session is revoked before raising.
+    """
+    token = (
+        db.query(RefreshToken)
+        .filter(RefreshToken.token_hash == _refresh_token_hash(raw_token))
+        .with_for_update()
+        .first()
+    )
+    now = utcnow_naive()
+    if token is None or token.revoked_at is not None or token.expires_at <= now:
+        db.rollback()
+        metrics.increment("auth.refresh.rejected")
+        raise LookupError("Invalid refresh token")
+    if token.used_at is not None:
+        _revoke_family(db, token.family_id)
+        db.commit()
+        revoked_sessions.add(token.family_id)
+        metrics.increment("auth.refresh.reuse_detected")
+        logger.warning(
+            "service.refresh_token.reuse_detected",
+            extra={"user_id": str(token.user_id), "session_id": str(token.family_id)},
+        )
+        raise LookupError("Invalid refresh token")
+
+    token.used_at = now
+    user_id, family_id = token.user_id, token.family_id
+    new_token = _new_refresh_token(db, user_id, family_id)
+    db.commit()
+    metrics.increment("auth.refresh.rotated")
+    logger.info("service.refresh_token.rotated", extra={"user_id": str(user_id), "session_id": str(family_id)})
+    return new_token, user_id, family_id
+
 
-    wallet.balance -= amount
+def purge_expired_refresh_tokens(db: Session, batch_size: int) -> int:
+    """Delete up to ``batch_size`` refresh tokens that expired over an access-token lifetime ago.
 
-    _commit_and_refresh(db, wallet)
+    The grace period keeps revoked families visible to ``RevokedSessions.reload``
+    until every access token issued from them has expired. Returns the number
+    of rows deleted; call again until it is below ``batch_size``.
+    """
+    cutoff = utcnow_naive() - timedelta(minutes=settings.access_token_expire_minutes)
+    expired = select(RefreshToken.id).where(RefreshToken.expires_at < cutoff).limit(batch_size)
+    deleted = db.execute(
+        delete(RefreshToken)
+        .where(RefreshToken.id.in_(expired.scalar_subquery()))
+        .execution_options(synchronize_session=False)
+    ).rowcount
+    db.commit()
+    metrics.increment("auth.refresh.purged", deleted)
+    return deleted
+
+
+@traced
+def revoke_refresh_token(db: Session, raw_token: str) -> bool:
+    """Log out: revoke the session a refresh token belongs to. False if it is unknown."""
+    token = db.query(RefreshToken).filter(RefreshToken.token_hash == _refresh_token_hash(raw_token)).first()
+    if token is None:
+        return False
+    _revoke_family(db, token.family_id)
+    db.commit()
+    revoked_sessions.add(token.family_id)
     logger.info(
-        "service.wallet.debit.succeeded",
-        extra={"user_id": str(customer_id), "balance": str(wallet.balance)},
+        "service.refresh_token.revoked",
+        extra={"user_id": str(token.user_id), "session_id": str(token.family_id)},
     )
-    return wallet
+    return True
@@ -0,0 +1,142 @@
+import logging
+import time
+from datetime import timedelta
+from sqlalchemy import select, tuple_, update
+from sqlalchemy.orm import Session
+from app.models import Order, utcnow_naive
+
+logger = logging.getLogger(__name__)
+
+ORDER_CREATED = "created"
+ORDER_PAID = "paid"
+ORDER_SETTLED = "settled"
+
+# Allowed order status changes. Terminal states have no outgoing edges.
+# Orders paid from the wallet at creation start out as paid.
+ORDER_TRANSITIONS = {
+    ORDER_CREATED: frozenset({ORDER_SETTLED}),
+    ORDER_PAID: frozenset({ORDER_SETTLED}),
+    ORDER_SETTLED: frozenset(),
+}
+
+
+def can_transition(current: str, target: str) -> bool:
+    return target in ORDER_TRANSITIONS.get(current, frozenset())
+
+
+# The settle UPDATE only matches these, so it never moves an order along an edge
+# ORDER_TRANSITIONS does not allow.
+SETTLEABLE_STATUSES = tuple(status for status in ORDER_TRANSITIONS if can_transition(status, ORDER_SETTLED))
+
+
+def settle_due_orders(db: Session, batch_size: int, window_seconds: int) -> int:
+    """Claim up to ``batch_size`` due orders and settle them in one transaction.
+
+    An order is due once it has been in a settleable status for
+    ``window_seconds``. Rows are claimed with ``FOR UPDATE SKIP LOCKED`` so
+    any number of workers can run side by side without claiming the same
+    order or waiting on each other. Returns the number of orders settled.
+    """
+    now = utcnow_naive()
+    cutoff = now - timedelta(seconds=window_seconds)
+    try:
+        claimed = db.execute(
+            select(Order.id, Order.created_at)
+            .where(Order.status.in_(SETTLEABLE_STATUSES), Order.created_at <= cutoff)
+            .order_by(Order.created_at)
+            .limit(batch_size)
+            .with_for_update(skip_locked=True)
+        ).all()
+        if claimed:
+            db.execute(
+                update(Order)
+                .where(tuple_(Order.id, Order.created_at).in_([tuple(row) for row in claimed]))
+                .where(Order.status.in_(SETTLEABLE_STATUSES))
+                .values(status=ORDER_SETTLED, updated_at=now)
+                .execution_options(synchronize_session=False)
+            )
+        db.commit()
+    except Exception:
+        db.rollback()
+        logger.exception("settlement.batch.failed", extra={"batch_size": batch_size})
+        raise
+    return len(claimed)
+
+
+class SettlementWorker:
+    """Poll for due orders and settle them batch by batch until stopped."""
+
+    def __init__(
+        self,
+        session_factory,
+        batch_size: int,
+        window_seconds: int,
+        poll_interval_seconds: float,
+        report_interval_seconds: float = 10.0,
+    ):
+        self.session_factory = session_factory
+        self.batch_size = batch_size
+        self.window_seconds = window_seconds
+        self.poll_interval_seconds = poll_interval_seconds
+        self.report_interval_seconds = report_interval_seconds
+        self.settled = 0
+        self.batches = 0
+        self.batch_seconds = 0.0
+        self._running = False
+
+    def run_once(self) -> int:
+        """Settle one batch; returns how many orders it settled."""
+        start = time.perf_counter()
+        with self.session_factory() as db:
+            settled = settle_due_orders(db, self.batch_size, self.window_seconds)
+        if settled:
+            self.batches += 1
+            self.settled += settled
+            self.batch_seconds += time.perf_counter() - start
+        return settled
+
+    def run(self, max_batches: int | None = None, stop_when_idle: bool = False):
+        """Settle until stopped; ``max_batches`` caps attempts, including empty and failed ones."""
+        self._running = True
+        started = time.perf_counter()
+        last_report = started
+        attempts = 0
+        logger.info(
+            "settlement.worker.started",
+            extra={"batch_size": self.batch_size, "window_seconds": self.window_seconds},
+        )
+        while self._running:
+            attempts += 1
+            try:
+                settled = self.run_once()
+            except Exception:
+                # The batch was rolled back and its orders stay due; back off and retry.
+                logger.exception("settlement.worker.batch_failed", extra={"batch_size": self.batch_size})
+                if max_batches is not None and attempts >= max_batches:
+                    break
+                time.sleep(self.poll_interval_seconds)
+                continue
+            if max_batches is not None and attempts >= max_batches:
+                break
+            if settled < self.batch_size:
+                if stop_when_idle:
+                    break
+                time.sleep(self.poll_interval_seconds)
+            if time.perf_counter() - last_report >= self.report_interval_seconds:
+                self.log_stats(time.perf_counter() - started)
+                last_report = time.perf_counter()
+        self.log_stats(time.perf_counter() - started)
+
+    def stop(self):
+        self._running = False
+
+    def stats(self, elapsed_seconds: float) -> dict:
+        return {
+            "settled": self.settled,
+            "batches": self.batches,
+            "orders_per_second": round(self.settled / elapsed_seconds, 1) if elapsed_seconds else 0.0,
+            "avg_batch_ms": round(self.batch_seconds / self.batches * 1000, 2) if self.batches else 0.0,
+        }
+
+    def log_stats(self, elapsed_seconds: float):
+        logger.info("settlement.worker.stats", extra=self.stats(elapsed_seconds))
@@ -0,0 +1,120 @@
+import asyncio
+import functools
+from threading import Event, Lock
+from typing import Any, Awaitable, Callable, Hashable
+
+
+class _Call:
+    __slots__ = ("event", "result", "error")
+
+    def __init__(self):
+        self.event = Event()
+        self.result = None
+        self.error: BaseException | None = None
+
+
+class SingleFlight:
+    """Collapse concurrent identical calls into one execution sharing its result.
+
+    ``do`` is for blocking callables run on worker threads; ``do_async`` is for
+    coroutines on an event loop. Results are shared between callers, so they
+    must be treated as read-only. Writers call ``forget`` after committing so
+    later readers start a fresh flight instead of joining one that began
+    before the write.
+    """
+
+    def __init__(self, name: str):
+        self.name = name
+        self._calls: dict[Hashable, _Call] = {}
+        self._async_calls: dict[tuple[int, Hashable], asyncio.Future] = {}
+        self._tasks: set[asyncio.Task] = set()
+        self._lock = Lock()
+        self.executions = 0
+        self.coalesced = 0
+
+    def do(self, key: Hashable, fn: Callable[[], Any]) -> Any:
+        with self._lock:
+            call = self._calls.get(key)
+            leader = call is None
+            if leader:
+                call = _Call()
+                self._calls[key] = call
+                self.executions += 1
+            else:
+                self.coalesced += 1
+
+        if not leader:
+            call.event.wait()
+            if call.error is not None:
+                raise call.error
+            return call.result
+
+        try:
+            call.result = fn()
+            return call.result
+        except BaseException as exc:
+            call.error = exc
+            raise
+        finally:
+            with self._lock:
+                if self._calls.get(key) is call:
+                    del self._calls[key]
+            call.event.set()
+
+    async def do_async(self, key: Hashable, fn: Callable[[], Awaitable[Any]]) -> Any:
+        loop = asyncio.get_running_loop()
+        flight_key = (id(loop), key)
+        with self._lock:
+            future = self._async_calls.get(flight_key)
+            if future is None:
+                future = loop.create_future()
+                self._async_calls[flight_key] = future
+                self.executions += 1
+                # The work runs in its own task, so a caller that goes away, even
+                # the one that started it, stops waiting without cancelling the rest.
+                task = loop.create_task(fn())
+                self._tasks.add(task)
+                task.add_done_callback(functools.partial(self._settle, flight_key, future))
+            else:
+                self.coalesced += 1
+        return await asyncio.shield(future)
+
+    def _settle(self, flight_key: tuple[int, Hashable], future: asyncio.Future, task: asyncio.Task):
+        self._tasks.discard(task)
+        with self._lock:
+            if self._async_calls.get(flight_key) is future:
+                del self._async_calls[flight_key]
+        if task.cancelled():
+            future.cancel()
+        elif task.exception() is not None:
+            future.set_exception(task.exception())
+            # Mark retrieved so an exception nobody else awaited is not logged as lost.
+            future.exception()
+        else:
+            future.set_result(task.result())
+
+    def forget(self, key: Hashable):
+        """Detach the in-flight call for ``key`` so new callers start over."""
+        with self._lock:
+            self._calls.pop(key, None)
+            for flight_key in [k for k in self._async_calls if k[1] == key]:
+                del self._async_calls[flight_key]
+
+    def forget_prefix(self, prefix: tuple):
+        """``forget`` every tuple key that starts with ``prefix``."""
+        size = len(prefix)
+        with self._lock:
+            for key in [k for k in self._calls if isinstance(k, tuple) and k[:size] == prefix]:
+                del self._calls[key]
+            for flight_key in [
+                k for k in self._async_calls if isinstance(k[1], tuple) and k[1][:size] == prefix
+            ]:
+                del self._async_calls[flight_key]
+
+    def stats(self) -> dict:
+        with self._lock:
+            return {
+                "in_flight": len(self._calls) + len(self._async_calls),
+                "executions": self.executions,
+                "coalesced": self.coalesced,
+            }
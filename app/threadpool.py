@@ -0,0 +1,179 @@
+import asyncio
+import logging
+import sys
+import threading
+import traceback
+from collections import deque
+from threading import Lock
+from time import monotonic, perf_counter
+import anyio.to_thread
+from app.config import settings
+from app.metrics import metrics, percentiles
+
+logger = logging.getLogger(__name__)
+
+
+def worker_thread_count() -> int:
+    """``WORKER_THREADS``, or one thread per pooled DB connection when it is 0."""
+    return settings.worker_threads or settings.db_pool_size + settings.db_max_overflow
+
+
+def configure_worker_threads():
+    """Size AnyIO's default thread limiter, which runs every sync route and dependency.
+
+    Must be called from the event loop (the limiter is per loop). Each sync
+    request holds at most one DB connection, so more threads than
+    ``DB_POOL_SIZE + DB_MAX_OVERFLOW`` only move the queue from the thread
+    limiter to the pool, where the extra threads sit for up to
+    ``DB_POOL_TIMEOUT`` seconds each.
+    """
+    threads = worker_thread_count()
+    connections = settings.db_pool_size + settings.db_max_overflow
+    limiter = anyio.to_thread.current_default_thread_limiter()
+    limiter.total_tokens = threads
+    extra = {"worker_threads": threads, "db_connections": connections}
+    if threads > connections:
+        logger.warning("threadpool.exceeds_db_pool", extra=extra)
+    else:
+        logger.info("threadpool.configured", extra=extra)
+    return limiter
+
+
+class ThreadPoolTelemetry:
+    """How long work waits for a worker-thread token, sampled without hooking any calls.
+
+    A task on the loop reads the limiter's occupancy every
+    ``interval_seconds`` and sends a no-op probe through the same limiter,
+    timing how long it queues before it starts in a worker thread. That is
+    the wait a sync endpoint or dependency submitted at the same moment
+    would have seen. Percentiles cover the most recent ``sample_size``
+    probes; only one probe is in flight at a time.
+    """
+
+    def __init__(self, sample_size: int, interval_seconds: float = 0.1):
+        self.interval_seconds = interval_seconds
+        self.waits = deque(maxlen=sample_size)
+        self.probes = 0
+        self.peak_waiting = 0
+        self.limiter = None
+        self._lock = Lock()
+        self._task = None
+
+    async def start(self, limiter):
+        """Start sampling ``limiter``, the loop's default limiter; call from the event loop."""
+        self.limiter = limiter
+        if self._task is None:
+            self._task = asyncio.create_task(self._sample(), name="threadpool-telemetry")
+
+    async def stop(self):
+        if self._task is None:
+            return
+        self._task.cancel()
+        try:
+            await self._task
+        except asyncio.CancelledError:
+            pass
+        self._task = None
+
+    async def _sample(self):
+        while True:
+            waiting = self.limiter.statistics().tasks_waiting
+            submitted = perf_counter()
+            started = await anyio.to_thread.run_sync(perf_counter, limiter=self.limiter)
+            self._record(started - submitted, waiting)
+            await asyncio.sleep(self.interval_seconds)
+
+    def _record(self, wait_seconds: float, waiting: int):
+        with self._lock:
+            self.probes += 1
+            self.waits.append(wait_seconds)
+            self.peak_waiting = max(self.peak_waiting, waiting)
+
+    def report(self) -> dict:
+        report = {"probes": self.probes}
+        if self.limiter is not None:
+            stats = self.limiter.statistics()
+            report.update(
+                {"total_tokens": stats.total_tokens, "borrowed": stats.borrowed_tokens, "waiting": stats.tasks_waiting}
+            )
+        with self._lock:
+            report["peak_waiting"] = self.peak_waiting
+            report["wait_ms"] = percentiles(self.waits)
+        return report
+
+    def reset(self):
+        with self._lock:
+            self.probes = 0
+            self.peak_waiting = 0
+            self.waits.clear()
+
+
+class LoopStallWatchdog:
+    """Log event-loop stalls longer than ``threshold_ms`` with the loop thread's stack.
+
+    A task on the loop stamps a heartbeat every ``interval_seconds``; a
+    daemon thread checks it and, when the heartbeat is older than the
+    interval plus the threshold, logs ``event_loop.stalled`` once per stall
+    with the stack the loop thread is executing at that moment.
+    """
+
+    def __init__(self, threshold_ms: float, interval_seconds: float = 0.05):
+        self.threshold_seconds = threshold_ms / 1000
+        self.interval_seconds = interval_seconds
+        self._heartbeat = monotonic()
+        self._loop_thread_id = None
+        self._task = None
+        self._thread = None
+        self._stopping = threading.Event()
+
+    async def start(self):
+        if not self.threshold_seconds or self._task is not None:
+            return
+        self._loop_thread_id = threading.get_ident()
+        self._heartbeat = monotonic()
+        self._stopping.clear()
+        self._task = asyncio.create_task(self._beat(), name="loop-stall-heartbeat")
+        self._thread = threading.Thread(target=self._watch, name="loop-stall-watchdog", daemon=True)
+        self._thread.start()
+        logger.info("event_loop.watchdog.started", extra={"threshold_ms": self.threshold_seconds * 1000})
+
+    async def stop(self):
+        if self._task is None:
+            return
+        self._stopping.set()
+        self._task.cancel()
+        try:
+            await self._task
+        except asyncio.CancelledError:
+            pass
+        self._task = None
+        self._thread.join(timeout=1)
+        self._thread = None
+        logger.info("event_loop.watchdog.stopped")
+
+    async def _beat(self):
+        while True:
+            self._heartbeat = monotonic()
+            await asyncio.sleep(self.interval_seconds)
+
+    def _watch(self):
+        reported = None
+        while not self._stopping.wait(self.interval_seconds):
+            heartbeat = self._heartbeat
+            stalled = monotonic() - heartbeat - self.interval_seconds
+            if stalled < self.threshold_seconds or heartbeat == reported:
+                continue
+            reported = heartbeat
+            frame = sys._current_frames().get(self._loop_thread_id)
+            metrics.increment("event_loop.stalls")
+            logger.warning(
+                "event_loop.stalled",
+                extra={
+                    "stalled_ms": round(stalled * 1000, 1),
+                    "stack": "".join(traceback.format_stack(frame)) if frame is not None else None,
+                },
+            )
+
+
+threadpool_telemetry = ThreadPoolTelemetry(settings.threadpool_sample_size)
+metrics.register_collector("threadpool", threadpool_telemetry.report)
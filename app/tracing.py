@@ -0,0 +1,328 @@
+import contextvars
+import functools
+import json
+import logging
+import random
+import time
+from collections import deque
+from contextlib import contextmanager
+from threading import Lock
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
+from sqlalchemy.pool import QueuePool
+from app.config import settings
+from app.metrics import metrics
+
+logger = logging.getLogger(__name__)
+
+SERVICE_NAME = "payment-api"
+# OTLP span kinds and status codes.
+KIND_INTERNAL = 1
+KIND_SERVER = 2
+KIND_CLIENT = 3
+STATUS_ERROR = 2
+# Why a trace was recorded: exported unconditionally, or only if slow/failed.
+HEAD = "head"
+TAIL = "tail"
+MAX_STATEMENT_LENGTH = 2048
+
+
+class Span:
+    __slots__ = ("name", "span_id", "parent_id", "kind", "start_ns", "end_ns", "attributes", "error")
+
+    def __init__(self, name: str, span_id: str, parent_id: str, kind: int, attributes: dict):
+        self.name = name
+        self.span_id = span_id
+        self.parent_id = parent_id
+        self.kind = kind
+        self.attributes = attributes
+        self.start_ns = time.time_ns()
+        self.end_ns = None
+        self.error = None
+
+    def set_attribute(self, key: str, value):
+        self.attributes[key] = value
+
+    def end(self, error: BaseException | None = None):
+        self.end_ns = time.time_ns()
+        if error is not None:
+            self.error = f"{type(error).__name__}: {error}"
+
+
+class Trace:
+    """Spans of one recorded request. Only created for traces a sampler picked."""
+
+    __slots__ = ("trace_id", "reason", "spans", "_lock")
+
+    def __init__(self, trace_id: str, reason: str):
+        self.trace_id = trace_id
+        self.reason = reason
+        self.spans: list[Span] = []
+        self._lock = Lock()
+
+    def start_span(self, name: str, parent: Span | None, kind: int, attributes: dict, parent_id: str = "") -> Span:
+        span = Span(name, _new_id(8), parent.span_id if parent else parent_id, kind, attributes)
+        with self._lock:
+            self.spans.append(span)
+        return span
+
+
+# (trace, current span) for the running request; None when not recording.
+_active: contextvars.ContextVar[tuple[Trace, Span] | None] = contextvars.ContextVar("trace_span", default=None)
+
+
+def _new_id(num_bytes: int) -> str:
+    return random.getrandbits(num_bytes * 8).to_bytes(num_bytes, "big").hex()
+
+
+def _otlp_value(value) -> dict:
+    if isinstance(value, bool):
+        return {"boolValue": value}
+    if isinstance(value, int):
+        return {"intValue": str(value)}
+    if isinstance(value, float):
+        return {"doubleValue": value}
+    return {"stringValue": str(value)}
+
+
+def _otlp_attributes(attributes: dict) -> list[dict]:
+    return [{"key": key, "value": _otlp_value(value)} for key, value in attributes.items()]
+
+
+def to_otlp(traces) -> dict:
+    """Encode traces as an OTLP/JSON ``ExportTraceServiceRequest``."""
+    spans = []
+    for trace in traces:
+        for span in trace.spans:
+            otlp = {
+                "traceId": trace.trace_id,
+                "spanId": span.span_id,
+                "parentSpanId": span.parent_id,
+                "name": span.name,
+                "kind": span.kind,
+                "startTimeUnixNano": str(span.start_ns),
+                "endTimeUnixNano": str(span.end_ns or span.start_ns),
+                "attributes": _otlp_attributes(span.attributes),
+            }
+            if span.error:
+                otlp["status"] = {"code": STATUS_ERROR, "message": span.error}
+            spans.append(otlp)
+    return {
+        "resourceSpans": [
+            {
+                "resource": {"attributes": _otlp_attributes({"service.name": SERVICE_NAME})},
+                "scopeSpans": [{"scope": {"name": __name__}, "spans": spans}],
+            }
+        ]
+    }
+
+
+class RingBufferExporter:
+    """Keeps the most recent kept traces in memory for ``GET /admin/traces``."""
+
+    def __init__(self, capacity: int):
+        self._traces = deque(maxlen=max(capacity, 1))
+        self._lock = Lock()
+
+    def export(self, trace: Trace):
+        with self._lock:
+            self._traces.append(trace)
+
+    def recent(self, limit: int) -> list[Trace]:
+        with self._lock:
+            return list(self._traces)[-limit:]
+
+    def clear(self):
+        with self._lock:
+            self._traces.clear()
+
+
+class OtlpJsonFileExporter:
+    """Appends one OTLP/JSON request per kept trace to a file (JSON lines)."""
+
+    def __init__(self, path: str):
+        self.path = path
+        self._lock = Lock()
+
+    def export(self, trace: Trace):
+        line = json.dumps(to_otlp([trace]), separators=(",", ":"))
+        with self._lock, open(self.path, "a", encoding="utf-8") as handle:
+            handle.write(line + "\n")
+
+
+class Tracer:
+    """Head-sampled tracing with a tail-based keeper for slow or failed requests.
+
+    At the root span each request is either recorded because the head
+    sampler picked it (``sample_rate``; always exported), recorded
+    speculatively (``tail_sample_rate``; exported only if it took at least
+    ``slow_ms`` or failed), or not recorded at all. Unrecorded requests
+    cost one context variable lookup per instrumentation point.
+    """
+
+    def __init__(self, enabled: bool, sample_rate: float, tail_sample_rate: float, slow_ms: float, exporters: list):
+        self.enabled = enabled
+        self.sample_rate = sample_rate
+        self.tail_sample_rate = tail_sample_rate
+        self.slow_ns = int(slow_ms * 1_000_000)
+        self.exporters = exporters
+
+    def _decide(self, parent_sampled: bool) -> str | None:
+        draw = random.random()
+        if parent_sampled or draw < self.sample_rate:
+            return HEAD
+        if draw < self.sample_rate + self.tail_sample_rate:
+            return TAIL
+        return None
+
+    def start_trace(self, name: str, attributes: dict, traceparent: str | None = None):
+        """Open the root span for a request; returns a token for ``finish_trace`` or None."""
+        if not self.enabled:
+            return None
+        trace_id, parent_id, parent_sampled = _parse_traceparent(traceparent)
+        reason = self._decide(parent_sampled)
+        if reason is None:
+            metrics.increment("tracing.traces.unsampled")
+            return None
+        trace = Trace(trace_id or _new_id(16), reason)
+        root = trace.start_span(name, None, KIND_SERVER, attributes, parent_id=parent_id)
+        return trace, root, _active.set((trace, root))
+
+    def finish_trace(self, token, status_code: int, error: BaseException | None = None):
+        if token is None:
+            return
+        trace, root, context_token = token
+        _active.reset(context_token)
+        root.set_attribute("http.status_code", status_code)
+        root.end(error)
+        slow = root.end_ns - root.start_ns >= self.slow_ns
+        if trace.reason == TAIL and not (slow or error is not None or status_code >= 500):
+            metrics.increment("tracing.traces.tail_discarded")
+            return
+        metrics.increment(f"tracing.traces.kept_{trace.reason}")
+        for exporter in self.exporters:
+            try:
+                exporter.export(trace)
+            except Exception:
+                logger.exception("tracing.export.failed", extra={"exporter": type(exporter).__name__})
+
+
+def _parse_traceparent(header: str | None) -> tuple[str | None, str, bool]:
+    """W3C ``traceparent`` (version-trace_id-parent_id-flags) from an upstream caller."""
+    if not header:
+        return None, "", False
+    parts = header.strip().split("-")
+    if len(parts) != 4 or len(parts[1]) != 32 or len(parts[2]) != 16:
+        return None, "", False
+    try:
+        sampled = int(parts[3], 16) & 1 == 1
+        int(parts[1], 16), int(parts[2], 16)
+    except ValueError:
+        return None, "", False
+    return parts[1], parts[2], sampled
+
+
+class _NoopSpan:
+    def set_attribute(self, key, value):
+        pass
+
+
+_NOOP_SPAN = _NoopSpan()
+
+
+@contextmanager
+def _recording_span(trace: Trace, parent: Span, name: str, kind: int, attributes: dict):
+    span = trace.start_span(name, parent, kind, attributes)
+    context_token = _active.set((trace, span))
+    try:
+        yield span
+    except BaseException as exc:
+        span.end(exc)
+        raise
+    else:
+        span.end()
+    finally:
+        _active.reset(context_token)
+
+
+@contextmanager
+def _noop_span():
+    yield _NOOP_SPAN
+
+
+def span(name: str, kind: int = KIND_INTERNAL, **attributes):
+    """Child span of the current one; a shared no-op when the request is not recorded."""
+    active = _active.get()
+    if active is None:
+        return _noop_span()
+    return _recording_span(active[0], active[1], name, kind, attributes)
+
+
+def traced(func):
+    """Run ``func`` inside a span named after its module and function."""
+    name = f"{func.__module__.rsplit('.', 1)[-1]}.{func.__name__}"
+
+    @functools.wraps(func)
+    def wrapper(*args, **kwargs):
+        active = _active.get()
+        if active is None:
+            return func(*args, **kwargs)
+        with _recording_span(active[0], active[1], name, KIND_INTERNAL, {}):
+            return func(*args, **kwargs)
+
+    return wrapper
+
+
+class TracedQueuePool(QueuePool):
+    """QueuePool that times connection checkout, including waiting for a free slot."""
+
+    def _do_get(self):
+        active = _active.get()
+        if active is None:
+            return super()._do_get()
+        with _recording_span(active[0], active[1], "db.pool.checkout", KIND_INTERNAL, {}):
+            return super()._do_get()
+
+
+@event.listens_for(Engine, "before_cursor_execute")
+def _sql_started(conn, cursor, statement, parameters, context, executemany):
+    active = _active.get()
+    if active is None or context is None:
+        return
+    trace, parent = active
+    context._trace_span = trace.start_span(
+        "db.query",
+        parent,
+        KIND_CLIENT,
+        {
+            "db.system": conn.dialect.name,
+            "db.statement": statement[:MAX_STATEMENT_LENGTH],
+            "db.executemany": executemany,
+        },
+    )
+
+
+@event.listens_for(Engine, "after_cursor_execute")
+def _sql_finished(conn, cursor, statement, parameters, context, executemany):
+    sql_span = getattr(context, "_trace_span", None)
+    if sql_span is not None:
+        sql_span.end()
+        context._trace_span = None
+
+
+@event.listens_for(Engine, "handle_error")
+def _sql_failed(exception_context):
+    sql_span = getattr(exception_context.execution_context, "_trace_span", None)
+    if sql_span is not None:
+        sql_span.end(exception_context.original_exception)
+        exception_context.execution_context._trace_span = None
+
+
+trace_buffer = RingBufferExporter(settings.trace_buffer_size)
+tracer = Tracer(
+    enabled=settings.tracing_enabled,
+    sample_rate=settings.trace_sample_rate,
+    tail_sample_rate=settings.trace_tail_sample_rate,
+    slow_ms=settings.trace_slow_ms,
+    exporters=[trace_buffer] + ([OtlpJsonFileExporter(settings.trace_export_path)] if settings.trace_export_path else []),
+)
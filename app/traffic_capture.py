@@ -0,0 +1,130 @@
+import hashlib
+import hmac
+import json
+import logging
+import os
+import random
+import time
+from jose import JWTError, jwt
+from starlette.requests import Request
+from app.config import settings
+from app.metrics import metrics
+
+logger = logging.getLogger(__name__)
+
+MAX_BODY_BYTES = 64 * 1024
+REDACTED = "<redacted>"
+# Body fields kept verbatim; every other string is replaced by a token.
+KEPT_FIELDS = {"amount", "currency"}
+SECRET_FIELDS = {"password", "access_token"}
+USER_FIELDS = {"to_customer_id", "customer_id", "user_id"}
+
+
+class TrafficCapture:
+    """Append a sample of requests to a JSON lines file for ``scripts/replay_traffic.py``.
+
+    Each sampled request is written after its response as one line holding
+    its wall-clock start, method, path, query, matched route template,
+    status and duration. The JSON body is included with personal data
+    tokenized: emails, names, idempotency keys, refresh tokens and user ids
+    become keyed hashes, so the same value always maps to the same token.
+    Passwords are dropped. The bearer token is replaced by a token of its
+    subject, so replay can substitute one synthetic user per real user.
+    Lines go out with a single ``O_APPEND`` write, so several worker
+    processes can share the file.
+    """
+
+    def __init__(self, path: str, sample_rate: float, key: bytes):
+        self.path = path
+        self.sample_rate = sample_rate
+        self._key = key
+        self._fd: int | None = None
+
+    @classmethod
+    def from_settings(cls) -> "TrafficCapture":
+        key = hashlib.sha256(b"traffic-capture:" + settings.secret_key.encode()).digest()
+        return cls(settings.traffic_capture_path, settings.traffic_capture_sample_rate, key)
+
+    @property
+    def enabled(self) -> bool:
+        return bool(self.path) and self.sample_rate > 0
+
+    def token(self, value: str) -> str:
+        return hmac.new(self._key, value.encode(), hashlib.sha256).hexdigest()[:16]
+
+    def redact(self, value, field: str | None = None):
+        if isinstance(value, dict):
+            return {key: self.redact(item, key) for key, item in value.items()}
+        if isinstance(value, list):
+            return [self.redact(item, field) for item in value]
+        if not isinstance(value, str) or field in KEPT_FIELDS:
+            return value
+        if field in SECRET_FIELDS:
+            return REDACTED
+        token = self.token(value)
+        if field in USER_FIELDS:
+            return f"user:{token}"
+        if field == "email":
+            return f"email-{token}@example.com"
+        if field == "phone":
+            return "+" + str(int(token, 16))[:12]
+        if field == "refresh_token":
+            return f"refresh:{token}"
+        return f"{field or 'value'}-{token}"
+
+    def _subject(self, request: Request) -> str | None:
+        scheme, _, credentials = request.headers.get("authorization", "").partition(" ")
+        if scheme.lower() != "bearer" or not credentials:
+            return None
+        try:
+            subject = jwt.get_unverified_claims(credentials).get("sub")
+        except JWTError:
+            return None
+        return self.token(str(subject)) if subject else None
+
+    async def begin(self, request: Request) -> dict | None:
+        """Sample ``request``; for a sampled one, return its record without the outcome."""
+        if random.random() >= self.sample_rate:
+            return None
+        record = {
+            "ts": round(time.time(), 6),
+            "method": request.method,
+            "path": request.url.path,
+            "query": request.url.query,
+            "user": self._subject(request),
+            "admin": "x-admin-key" in request.headers,
+            "body": None,
+        }
+        if request.headers.get("content-type", "").startswith("application/json"):
+            raw = await request.body()
+            if raw and len(raw) <= MAX_BODY_BYTES:
+                try:
+                    record["body"] = self.redact(json.loads(raw))
+                except ValueError:
+                    record["body"] = None
+        return record
+
+    def finish(self, record: dict, request: Request, status_code: int, duration_ms: float):
+        route = request.scope.get("route")
+        record.update(
+            route=getattr(route, "path", None),
+            status=status_code,
+            duration_ms=duration_ms,
+        )
+        line = (json.dumps(record, separators=(",", ":")) + "\n").encode()
+        try:
+            if self._fd is None:
+                self._fd = os.open(self.path, os.O_WRONLY | os.O_APPEND | os.O_CREAT, 0o600)
+            os.write(self._fd, line)
+        except OSError:
+            logger.exception("traffic_capture.write_failed", extra={"path": self.path})
+            return
+        metrics.increment("traffic_capture.recorded")
+
+    def close(self):
+        if self._fd is not None:
+            os.close(self._fd)
+            self._fd = None
+
+
+traffic_capture = TrafficCapture.from_settings()
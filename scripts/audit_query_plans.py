@@ -0,0 +1,264 @@
+#!/usr/bin/env python3
+"""EXPLAIN every captured service query and flag plans that will not scale.
+
+1. Capture statements by running the tests or a benchmark with
+   ``QUERY_CAPTURE_PATH`` set (statements are compiled for PostgreSQL even
+   when the run uses SQLite):
+
+       QUERY_CAPTURE_PATH=queries.jsonl python -m pytest -q
+
+2. Audit them against a seeded PostgreSQL database (``scripts/generate_data.py``):
+
+       python scripts/audit_query_plans.py queries.jsonl --database-url postgresql://... --report plans.json
+
+Each statement runs under ``EXPLAIN (ANALYZE, BUFFERS, FORMAT JSON)`` in
+its own transaction, which is rolled back, so DML changes nothing (DML
+that violates a constraint on the seeded data is planned without ANALYZE).
+Findings:
+
+- ``seq_scan``: a sequential scan of a table with at least ``--min-rows`` rows
+- ``sort``: an explicit Sort of at least ``--min-rows`` rows, i.e. the order is
+  not coming from an index
+- ``unused_index``: a non-unique index on an app table that no plan used
+- ``index_drift``: an index declared in ``app/models.py`` but not in
+  ``sql/schema.sql``, or the reverse
+- ``error``: a statement that could not be explained
+
+The exit status is 1 when a finding of a ``--fail-on`` kind is not listed
+in ``--baseline`` (a previous ``--report``), so CI fails on new problems only.
+"""
+import argparse
+import json
+import logging
+import os
+import re
+import sys
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+
+from sqlalchemy import create_engine, text
+from sqlalchemy.dialects import postgresql
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.schema import CreateIndex
+
+from app.config import settings
+from app.models import Base
+
+logging.basicConfig(
+    level=logging.INFO,
+    format="%(asctime)s | %(name)s | %(levelname)s | %(message)s",
+)
+logger = logging.getLogger(__name__)
+
+FINDING_KINDS = ("seq_scan", "sort", "unused_index", "index_drift", "error")
+SCHEMA_SQL = os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "sql", "schema.sql")
+INDEX_DDL = re.compile(
+    r"CREATE\s+(?:UNIQUE\s+)?INDEX\s+(?:IF\s+NOT\s+EXISTS\s+)?(\w+)\s+ON\s+(\w+)\s*\((.*?)\)\s*(WHERE\s+[^;]+)?;?$",
+    re.IGNORECASE | re.DOTALL,
+)
+
+
+def load_statements(paths: list[str]) -> list[dict]:
+    """Distinct captured statements across files, in first-seen order."""
+    statements = {}
+    for path in paths:
+        with open(path, encoding="utf-8") as handle:
+            for line in handle:
+                if line.strip():
+                    record = json.loads(line)
+                    statements.setdefault(record["sql"], record)
+    return list(statements.values())
+
+
+def _bind_value(value):
+    # JSON payload parameters are stored as objects; everything else was stringified.
+    return json.dumps(value) if isinstance(value, (dict, list)) else value
+
+
+def explain(engine, statement: dict, options: str = "ANALYZE, BUFFERS, FORMAT JSON") -> dict:
+    with engine.connect() as conn:
+        transaction = conn.begin()
+        try:
+            params = {key: _bind_value(value) for key, value in statement["params"].items()}
+            return conn.exec_driver_sql(f"EXPLAIN ({options}) " + statement["sql"], params).scalar()[0]
+        finally:
+            transaction.rollback()
+
+
+def walk(node: dict):
+    yield node
+    for child in node.get("Plans", ()):
+        yield from walk(child)
+
+
+def table_rows(engine) -> dict[str, float]:
+    with engine.connect() as conn:
+        rows = conn.execute(
+            text("SELECT relname, reltuples FROM pg_class WHERE relkind IN ('r', 'p') AND relnamespace = 'public'::regnamespace")
+        ).all()
+    return {name: tuples for name, tuples in rows}
+
+
+def index_roots(engine) -> dict[str, str]:
+    """Every index name mapped to its top-level index (partition indexes to the parent's)."""
+    with engine.connect() as conn:
+        rows = conn.execute(
+            text(
+                "SELECT c.relname, COALESCE(pg_partition_root(c.oid), c.oid)::regclass::text "
+                "FROM pg_class c WHERE c.relkind IN ('i', 'I') AND c.relnamespace = 'public'::regnamespace"
+            )
+        ).all()
+    return {name: root for name, root in rows}
+
+
+def app_indexes(engine) -> list[tuple[str, str, bool]]:
+    """``(index, table, unique_or_primary)`` for top-level indexes on the app's tables."""
+    with engine.connect() as conn:
+        rows = conn.execute(
+            text(
+                "SELECT i.indexrelid::regclass::text, i.indrelid::regclass::text, i.indisunique OR i.indisprimary "
+                "FROM pg_index i JOIN pg_class c ON c.oid = i.indexrelid "
+                "WHERE i.indrelid::regclass::text = ANY(:tables) AND NOT c.relispartition"
+            ),
+            {"tables": list(Base.metadata.tables)},
+        ).all()
+    return [tuple(row) for row in rows]
+
+
+def _index_key(table: str, columns: str, where: str | None) -> tuple[str, str, str]:
+    normalize = lambda value: re.sub(r"[\s\"]+", "", (value or "").lower())
+    return table.lower(), normalize(columns), normalize(where)
+
+
+def index_drift(schema_path: str) -> list[dict]:
+    """Indexes declared only in the models or only in schema.sql, compared by table, columns and predicate."""
+    dialect = postgresql.dialect()
+    declared = {}
+    for table in Base.metadata.tables.values():
+        for index in table.indexes:
+            match = INDEX_DDL.match(str(CreateIndex(index).compile(dialect=dialect)).strip())
+            if match:
+                declared[_index_key(match.group(2), match.group(3), match.group(4))] = (index.name, match.group(3))
+    with open(schema_path, encoding="utf-8") as handle:
+        schema = handle.read()
+    in_sql = {}
+    for ddl in re.findall(r"CREATE\s+(?:UNIQUE\s+)?INDEX[^;]+;", schema, re.IGNORECASE):
+        match = INDEX_DDL.match(ddl.strip())
+        if match:
+            in_sql[_index_key(match.group(2), match.group(3), match.group(4))] = (match.group(1), match.group(3))
+
+    findings = []
+    for key in sorted(declared.keys() - in_sql.keys()):
+        name, columns = declared[key]
+        findings.append(_finding("index_drift", f"models-only:{name}", f"{name} on {key[0]}({columns}) is not in schema.sql"))
+    for key in sorted(in_sql.keys() - declared.keys()):
+        name, columns = in_sql[key]
+        findings.append(_finding("index_drift", f"schema-only:{name}", f"{name} on {key[0]}({columns}) is not in app/models.py"))
+    return findings
+
+
+def _finding(kind: str, fingerprint: str, detail: str, sql: str | None = None) -> dict:
+    finding = {"kind": kind, "id": f"{kind}:{fingerprint}", "detail": detail}
+    if sql is not None:
+        finding["sql"] = sql
+    return finding
+
+
+def _fingerprint(sql: str) -> str:
+    return re.sub(r"\s+", " ", sql).strip()[:160]
+
+
+def audit(engine, statements: list[dict], min_rows: int) -> tuple[list[dict], list[dict]]:
+    rows_by_table = table_rows(engine)
+    roots = index_roots(engine)
+    used = set()
+    findings, plans = [], []
+    for statement in statements:
+        sql = statement["sql"]
+        try:
+            plan = explain(engine, statement)
+        except IntegrityError:
+            # Captured DML can reference rows the seeded database lacks; the plan is still useful.
+            plan = explain(engine, statement, "FORMAT JSON")
+        except Exception as exc:
+            findings.append(_finding("error", _fingerprint(sql), str(exc).splitlines()[0], sql))
+            continue
+        plans.append({"sql": sql, "execution_ms": plan.get("Execution Time"), "plan": plan["Plan"]})
+        for node in walk(plan["Plan"]):
+            if "Index Name" in node:
+                used.add(roots.get(node["Index Name"], node["Index Name"]))
+            if node["Node Type"] == "Seq Scan":
+                relation = node.get("Relation Name", "?")
+                if rows_by_table.get(relation, 0) >= min_rows:
+                    findings.append(
+                        _finding(
+                            "seq_scan",
+                            f"{relation}:{_fingerprint(sql)}",
+                            f"Seq Scan on {relation} (~{int(rows_by_table[relation])} rows)",
+                            sql,
+                        )
+                    )
+            elif node["Node Type"] == "Sort":
+                sorted_rows = node.get("Actual Rows", node["Plan Rows"])
+                if sorted_rows >= min_rows:
+                    keys = ", ".join(node.get("Sort Key", []))
+                    findings.append(
+                        _finding("sort", f"{keys}:{_fingerprint(sql)}", f"Sort of {sorted_rows} rows on {keys}", sql)
+                    )
+
+    for index, table, unique in app_indexes(engine):
+        if not unique and index not in used:
+            findings.append(_finding("unused_index", index, f"{index} on {table} was not used by any captured statement"))
+    return findings, plans
+
+
+def main():
+    parser = argparse.ArgumentParser(description="EXPLAIN ANALYZE captured statements and flag bad plans")
+    parser.add_argument("captured", nargs="+", help="QUERY_CAPTURE_PATH files")
+    parser.add_argument("--database-url", default=settings.database_url, help="Seeded PostgreSQL database")
+    parser.add_argument("--min-rows", type=int, default=1000, help="Ignore scans and sorts smaller than this")
+    parser.add_argument("--schema", default=SCHEMA_SQL, help="SQL schema to compare model indexes against")
+    parser.add_argument("--report", help="Write findings and plans as JSON")
+    parser.add_argument("--baseline", help="Previous --report whose findings are accepted")
+    parser.add_argument(
+        "--fail-on",
+        default="seq_scan,sort,index_drift,error",
+        help=f"Comma-separated finding kinds that fail the run ({', '.join(FINDING_KINDS)})",
+    )
+    args = parser.parse_args()
+
+    fail_on = {kind.strip() for kind in args.fail_on.split(",") if kind.strip()}
+    if fail_on - set(FINDING_KINDS):
+        parser.error(f"unknown finding kinds: {', '.join(sorted(fail_on - set(FINDING_KINDS)))}")
+    engine = create_engine(args.database_url)
+    if engine.dialect.name != "postgresql":
+        raise SystemExit("The plan audit needs a PostgreSQL database.")
+
+    statements = load_statements(args.captured)
+    with engine.begin() as conn:
+        conn.exec_driver_sql("ANALYZE")
+    findings, plans = audit(engine, statements, args.min_rows)
+    findings += index_drift(args.schema)
+
+    accepted = set()
+    if args.baseline:
+        with open(args.baseline, encoding="utf-8") as handle:
+            accepted = {finding["id"] for finding in json.load(handle)["findings"]}
+    failures = [f for f in findings if f["kind"] in fail_on and f["id"] not in accepted]
+
+    for finding in findings:
+        marker = "FAIL" if finding in failures else ("ok  " if finding["id"] in accepted else "warn")
+        logger.info("%s %-12s %s", marker, finding["kind"], finding["detail"])
+        if finding.get("sql") and finding in failures:
+            logger.info("     %s", _fingerprint(finding["sql"]))
+    counts = {kind: sum(f["kind"] == kind for f in findings) for kind in FINDING_KINDS}
+    logger.info("%d statements explained; findings: %s; %d failing", len(plans), counts, len(failures))
+
+    if args.report:
+        with open(args.report, "w", encoding="utf-8") as handle:
+            json.dump({"findings": findings, "plans": plans}, handle, indent=2, default=str)
+    sys.exit(1 if failures else 0)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,325 @@
+#!/usr/bin/env python3
+"""In-process load benchmarks for the Payment API.
+
+Runs the FastAPI app through TestClient against a throwaway database and
+reports wall time and SQL statement counts per scenario, so changes to the
+hot path can be compared without standing up a server.
+"""
+import argparse
+import logging
+import os
+import sys
+import tempfile
+import time
+from contextlib import contextmanager
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+
+logging.basicConfig(
+    level=logging.INFO,
+    format="%(asctime)s | %(name)s | %(levelname)s | %(message)s",
+)
+logger = logging.getLogger("benchmark")
+
+PASSWORD = "secret123"
+
+
+class QueryCounter:
+    """Counts statements sent to the database by an engine."""
+
+    def __init__(self, engine):
+        from sqlalchemy import event
+
+        self.count = 0
+        event.listen(engine, "before_cursor_execute", self._on_execute)
+
+    def _on_execute(self, conn, cursor, statement, parameters, context, executemany):
+        self.count += 1
+
+    @contextmanager
+    def measure(self, label: str, operations: int):
+        start_count = self.count
+        start = time.perf_counter()
+        yield
+        elapsed = time.perf_counter() - start
+        queries = self.count - start_count
+        logger.info(
+            "%s: %d ops in %.3fs (%.1f ops/s), %d queries (%.2f/op)",
+            label,
+            operations,
+            elapsed,
+            operations / elapsed if elapsed else 0.0,
+            queries,
+            queries / operations if operations else 0.0,
+        )
+
+
+class BenchmarkApp:
+    def __init__(self, client, counter):
+        self.client = client
+        self.counter = counter
+
+    def signup_and_login(self, email: str) -> dict:
+        self.client.post(
+            "/users/signup",
+            json={"email": email, "full_name": "Bench User", "phone": None, "password": PASSWORD},
+        )
+        login = self.client.post("/users/login", json={"email": email, "password": PASSWORD})
+        if login.status_code != 200:
+            raise RuntimeError(f"Login failed: {login.status_code} {login.text}")
+        return {"Authorization": f"Bearer {login.json()['access_token']}"}
+
+
+def scenario_user_cache(bench: BenchmarkApp, iterations: int):
+    """Profile reads and failed logins on unknown emails, with and without the user cache."""
+    from app import services
+    from app.cache import UserCache
+    from app.config import settings
+
+    headers = bench.signup_and_login("cache.bench@example.com")
+    original_cache = services.user_cache
+    for label, max_entries in (("user_cache disabled", 0), ("user_cache enabled", settings.user_cache_max_entries)):
+        services.user_cache = UserCache(
+            max_entries=max_entries,
+            ttl_seconds=settings.user_cache_ttl_seconds,
+            negative_ttl_seconds=settings.user_cache_negative_ttl_seconds,
+        )
+        with bench.counter.measure(f"{label} GET /users/me", iterations):
+            for _ in range(iterations):
+                bench.client.get("/users/me", headers=headers)
+        attempts = iterations // 10 or 1
+        with bench.counter.measure(f"{label} failed logins", attempts * 3):
+            for i in range(attempts):
+                for _ in range(3):
+                    bench.client.post(
+                        "/users/login",
+                        json={"email": f"unknown-{max_entries}-{i}@example.com", "password": "wrong-password"},
+                    )
+    services.user_cache = original_cache
+
+
+def scenario_polling(bench: BenchmarkApp, iterations: int):
+    """Clients polling GET /orders and /wallet/me, unconditionally versus with If-None-Match."""
+    headers = bench.signup_and_login("poll.bench@example.com")
+    bench.client.post("/wallet/me/credit", headers=headers, json={"amount": 100})
+    for i in range(200):
+        bench.client.post(
+            "/orders",
+            headers=headers,
+            json={"amount": 10 + i, "currency": "USD", "idempotency_key": f"poll-bench-{i}"},
+        )
+
+    for path in ("/orders", "/wallet/me"):
+        for label, conditional in (("unconditional", False), ("if-none-match", True)):
+            etag = bench.client.get(path, headers=headers).headers.get("etag")
+            poll_headers = {**headers, "If-None-Match": etag} if conditional and etag else headers
+            transferred = 0
+            with bench.counter.measure(f"{label} GET {path}", iterations):
+                for _ in range(iterations):
+                    transferred += len(bench.client.get(path, headers=poll_headers).content)
+            logger.info("%s GET %s: %.1f body bytes/op", label, path, transferred / iterations)
+
+
+def scenario_burst(bench: BenchmarkApp, iterations: int):
+    """Bursts of identical concurrent GET /orders and /wallet/me for one user."""
+    from concurrent.futures import ThreadPoolExecutor
+    from app.config import settings
+    from app.services import read_flight
+
+    headers = bench.signup_and_login("burst.bench@example.com")
+    # Create the wallet up front; lazy creation on concurrent first reads races on the key.
+    bench.client.post("/wallet/me/credit", headers=headers, json={"amount": 100})
+    for i in range(50):
+        bench.client.post("/orders", headers=headers, json={"amount": 1 + i, "currency": "USD"})
+
+    bursts = max(iterations // 20, 1)
+    original = settings.read_coalescing_enabled
+    with ThreadPoolExecutor(max_workers=20) as pool:
+        for enabled in (False, True):
+            settings.read_coalescing_enabled = enabled
+            before = read_flight.stats()
+            label = "coalescing " + ("enabled" if enabled else "disabled")
+            for path in ("/orders", "/wallet/me"):
+                with bench.counter.measure(f"{label} burst GET {path}", bursts * 20):
+                    for _ in range(bursts):
+                        list(pool.map(lambda _: bench.client.get(path, headers=headers), range(20)))
+            after = read_flight.stats()
+            logger.info(
+                "%s: %d executions, %d coalesced",
+                label,
+                after["executions"] - before["executions"],
+                after["coalesced"] - before["coalesced"],
+            )
+    settings.read_coalescing_enabled = original
+
+
+def scenario_order_list(bench: BenchmarkApp, iterations: int):
+    """GET /orders at 1k, 10k and 100k rows: ORM plus response_model versus Core rows plus orjson."""
+    import uuid
+    from typing import List
+    from pydantic import TypeAdapter
+    from sqlalchemy import insert
+    from app import services
+    from app.db import SessionLocal, engine
+    from app.models import Order, utcnow_naive
+    from app.schemas import OrderDetail
+    from app.serializers import orders_json
+
+    headers = bench.signup_and_login("list.bench@example.com")
+    customer_id = uuid.UUID(bench.client.get("/users/me", headers=headers).json()["id"])
+    adapter = TypeAdapter(List[OrderDetail])
+
+    def orm_pipeline(db):
+        orders = db.query(Order).filter(Order.customer_id == customer_id).all()
+        return adapter.dump_json(adapter.validate_python(orders, from_attributes=True))
+
+    def core_pipeline(db):
+        return orders_json(customer_id, services.get_orders_by_customer(db, customer_id))
+
+    seeded = 0
+    for size in (1_000, 10_000, 100_000):
+        now = utcnow_naive()
+        with engine.begin() as conn:
+            conn.execute(
+                insert(Order),
+                [
+                    {
+                        "id": uuid.uuid4(),
+                        "customer_id": customer_id,
+                        "amount": 10 + i % 100,
+                        "currency": "USD",
+                        "status": "created",
+                        "idempotency_key": None,
+                        "created_at": now,
+                        "updated_at": now,
+                    }
+                    for i in range(seeded, size)
+                ],
+            )
+        seeded = size
+        repeats = max(iterations * 100 // size, 1)
+        for label, pipeline in (("ORM + response_model", orm_pipeline), ("Core rows + orjson", core_pipeline)):
+            with SessionLocal() as db, bench.counter.measure(f"{size} rows {label}", repeats):
+                for _ in range(repeats):
+                    body = pipeline(db)
+                    db.expunge_all()
+            logger.info("%d rows %s: %d body bytes", size, label, len(body))
+        with bench.counter.measure(f"{size} rows GET /orders", repeats):
+            for _ in range(repeats):
+                bench.client.get("/orders", headers=headers)
+
+
+def scenario_db_paths(bench: BenchmarkApp, iterations: int):
+    """Order and wallet service calls straight against the database, without HTTP."""
+    import uuid
+    from app import services
+    from app.db import SessionLocal
+    from app.schemas import OrderCreate, WalletOperation
+
+    headers = bench.signup_and_login("paths.bench@example.com")
+    customer_id = uuid.UUID(bench.client.get("/users/me", headers=headers).json()["id"])
+    order = OrderCreate(amount="12.50", currency="USD")
+    credit = WalletOperation(amount="10.00").stored_amount
+    debit = WalletOperation(amount="5.00").stored_amount
+    paths = (
+        ("create_order", lambda db: services.create_order(db, order, customer_id)),
+        ("credit_wallet", lambda db: services.credit_wallet(db, customer_id, credit)),
+        ("debit_wallet", lambda db: services.debit_wallet(db, customer_id, debit)),
+        ("get_orders_version", lambda db: services.get_orders_version(db, customer_id)),
+        ("get_wallet_version", lambda db: services.get_wallet_version(db, customer_id)),
+    )
+    for label, path in paths:
+        # One session per path, like a request holding one pooled connection.
+        with SessionLocal() as db, bench.counter.measure(label, iterations):
+            for _ in range(iterations):
+                path(db)
+                db.expunge_all()
+
+
+def scenario_order_payment(bench: BenchmarkApp, iterations: int):
+    """Paying for an order: POST /orders then POST /wallet/me/debit versus one pay_from_wallet call."""
+    from app.config import settings
+
+    headers = bench.signup_and_login("pay.bench@example.com")
+    bench.client.post("/wallet/me/credit", headers=headers, json={"amount": 10 * iterations})
+    order = {"amount": "5.00", "currency": settings.wallet_currency}
+
+    def two_calls(i):
+        bench.client.post("/orders", headers=headers, json={**order, "idempotency_key": f"two-call-{i}"})
+        bench.client.post("/wallet/me/debit", headers=headers, json={"amount": order["amount"]})
+
+    def one_call(i):
+        bench.client.post(
+            "/orders",
+            headers=headers,
+            json={**order, "idempotency_key": f"one-call-{i}", "pay_from_wallet": True},
+        )
+
+    for label, flow in (("POST /orders + POST /wallet/me/debit", two_calls), ("POST /orders pay_from_wallet", one_call)):
+        latencies = []
+        with bench.counter.measure(label, iterations):
+            for i in range(iterations):
+                start = time.perf_counter()
+                flow(i)
+                latencies.append(time.perf_counter() - start)
+        latencies.sort()
+        logger.info(
+            "%s: p50 %.2f ms, p95 %.2f ms, p99 %.2f ms",
+            label,
+            latencies[len(latencies) // 2] * 1000,
+            latencies[int(len(latencies) * 0.95)] * 1000,
+            latencies[int(len(latencies) * 0.99)] * 1000,
+        )
+
+
+SCENARIOS = {
+    "user_cache": scenario_user_cache,
+    "polling": scenario_polling,
+    "burst": scenario_burst,
+    "order_list": scenario_order_list,
+    "db_paths": scenario_db_paths,
+    "order_payment": scenario_order_payment,
+}
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Run in-process benchmarks against the Payment API")
+    parser.add_argument("--scenario", choices=[*SCENARIOS, "all"], default="all")
+    parser.add_argument("--iterations", type=int, default=500)
+    parser.add_argument(
+        "--database-url",
+        default=os.environ.get("BENCHMARK_DATABASE_URL"),
+        help="Database to run against; defaults to a temporary SQLite file. Tables are dropped and recreated.",
+    )
+    args = parser.parse_args()
+
+    database_url = args.database_url or "sqlite+pysqlite:///" + os.path.join(
+        tempfile.mkdtemp(prefix="payment-api-bench-"), "bench.db"
+    )
+    os.environ["DATABASE_URL"] = database_url
+    os.environ.setdefault("SECRET_KEY", "benchmark-secret-key")
+    os.environ.setdefault("LOG_LEVEL", "ERROR")
+
+    from fastapi.testclient import TestClient
+    from app.db import engine, init_db
+    from app.main import app
+    from app.models import Base
+
+    # setup_logging() runs on import; keep request logs quiet but our report visible.
+    logging.getLogger("app.access").setLevel(logging.WARNING)
+    logger.setLevel(logging.INFO)
+
+    Base.metadata.drop_all(bind=engine)
+    init_db()
+    counter = QueryCounter(engine)
+
+    with TestClient(app) as client:
+        bench = BenchmarkApp(client, counter)
+        for name, scenario in SCENARIOS.items():
+            if args.scenario in (name, "all"):
+                logger.info("=== %s ===", name)
+                scenario(bench, args.iterations)
+
+
+if __name__ == "__main__":
+    main()
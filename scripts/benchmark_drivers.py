@@ -0,0 +1,58 @@
+#!/usr/bin/env python3
+"""A/B the psycopg2 and psycopg 3 drivers on the order and wallet paths.
+
+Runs the ``db_paths`` benchmark scenario once per driver in a fresh process
+(the engine is built at import time) against the same PostgreSQL database.
+Tables in that database are dropped and recreated.
+"""
+import argparse
+import os
+import subprocess
+import sys
+
+from sqlalchemy.engine import make_url
+
+DRIVERS = {
+    "psycopg2": "postgresql+psycopg2",
+    "psycopg3": "postgresql+psycopg",
+}
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Compare PostgreSQL drivers on the order and wallet paths")
+    parser.add_argument("--database-url", required=True, help="Any PostgreSQL URL; the driver part is replaced")
+    parser.add_argument("--iterations", type=int, default=2000)
+    parser.add_argument("--scenario", default="db_paths")
+    parser.add_argument(
+        "--env",
+        action="append",
+        default=[],
+        metavar="NAME=VALUE",
+        help="Extra settings for both runs, e.g. DB_PIPELINE_ENABLED=false",
+    )
+    args = parser.parse_args()
+
+    benchmark = os.path.join(os.path.dirname(os.path.abspath(__file__)), "benchmark.py")
+    env = dict(os.environ, **dict(item.split("=", 1) for item in args.env))
+    base = make_url(args.database_url)
+    for label, drivername in DRIVERS.items():
+        url = base.set(drivername=drivername).render_as_string(hide_password=False)
+        print(f"=== {label} ({drivername}) ===", flush=True)
+        subprocess.run(
+            [
+                sys.executable,
+                benchmark,
+                "--scenario",
+                args.scenario,
+                "--iterations",
+                str(args.iterations),
+                "--database-url",
+                url,
+            ],
+            env=env,
+            check=True,
+        )
+
+
+if __name__ == "__main__":
+    main()
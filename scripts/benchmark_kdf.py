@@ -0,0 +1,69 @@
+#!/usr/bin/env python3
+"""Login hashing throughput per core under each password KDF policy.
+
+For PBKDF2 and scrypt, at the configured minimum cost and calibrated to
+``--target-ms``, reports the chosen cost, the time of one verify and how
+many logins per second that leaves each core. With ``--threads`` > 1 the
+verifies also run concurrently (hashlib releases the GIL) to show the
+aggregate rate. Bounds come from the ``PASSWORD_*`` settings.
+"""
+import argparse
+import logging
+import os
+import sys
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+
+logging.basicConfig(
+    level=logging.INFO,
+    format="%(asctime)s | %(name)s | %(levelname)s | %(message)s",
+)
+logger = logging.getLogger("benchmark")
+
+
+def logins_per_second(policy, stored_hash: str, verifies: int, threads: int) -> float:
+    def verify(_):
+        if not policy.verify("benchmark-password", stored_hash):
+            raise RuntimeError("benchmark hash did not verify")
+
+    start = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=threads) as executor:
+        list(executor.map(verify, range(verifies)))
+    return verifies / (time.perf_counter() - start)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark login hashing under each KDF policy")
+    parser.add_argument("--target-ms", type=float, default=100.0, help="Calibration latency target per hash")
+    parser.add_argument("--verifies", type=int, default=20, help="Verifies per policy and thread count")
+    parser.add_argument("--threads", type=int, default=os.cpu_count() or 1)
+    args = parser.parse_args()
+
+    os.environ.setdefault("LOG_LEVEL", "WARNING")
+    from app.config import settings
+    from app.kdf import PBKDF2, SCRYPT, KdfPolicy
+
+    bounds = {
+        "pbkdf2_bounds": (settings.password_pbkdf2_min_iterations, settings.password_pbkdf2_max_iterations),
+        "scrypt_bounds": (settings.password_scrypt_min_n, settings.password_scrypt_max_n),
+    }
+    logger.info("%d CPU(s); verifying with 1 and %d thread(s)", os.cpu_count() or 1, args.threads)
+    for scheme in (PBKDF2, SCRYPT):
+        for label, target_ms in (("minimum", 0), ("calibrated", args.target_ms)):
+            policy = KdfPolicy(scheme, target_ms=target_ms, **bounds)
+            params = policy.calibrate()
+            stored_hash = policy.hash("benchmark-password")
+            single = logins_per_second(policy, stored_hash, args.verifies, 1)
+            line = "%-13s %-10s cost=%-8d %7.1f ms/verify  %6.1f logins/s/core"
+            values = [scheme, label, params.cost, 1000 / single, single]
+            if args.threads > 1:
+                concurrent = logins_per_second(policy, stored_hash, args.verifies * args.threads, args.threads)
+                line += "  %6.1f logins/s with %d threads"
+                values += [concurrent, args.threads]
+            logger.info(line, *values)
+
+
+if __name__ == "__main__":
+    main()
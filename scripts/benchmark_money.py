@@ -0,0 +1,109 @@
+#!/usr/bin/env python3
+"""Compare per-write cost of NUMERIC/Decimal money against BIGINT minor units.
+
+The CPU pass times what one wallet write does with an amount: parse the
+request body, convert it for storage, add it to the balance, encode the
+parameter for the driver and convert the balance back for the response.
+With --database-url (PostgreSQL) it also times UPDATE round trips against
+a NUMERIC(10, 2) and a BIGINT temporary table.
+"""
+import argparse
+import logging
+import os
+import sys
+import time
+from decimal import Decimal
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+
+logging.basicConfig(
+    level=logging.INFO,
+    format="%(asctime)s | %(name)s | %(levelname)s | %(message)s",
+)
+logger = logging.getLogger("benchmark")
+
+
+def _report(label: str, operations: int, elapsed: float):
+    logger.info(
+        "%s: %d writes in %.3fs (%.0f writes/s, %.2f us/write)",
+        label,
+        operations,
+        elapsed,
+        operations / elapsed if elapsed else 0.0,
+        elapsed / operations * 1_000_000 if operations else 0.0,
+    )
+
+
+def cpu_pass(iterations: int):
+    from psycopg2.extensions import adapt
+    from app.money import from_minor, to_minor
+    from app.schemas import WalletOperation
+
+    body = '{"amount": "12.34"}'
+
+    balance = Decimal("0.00")
+    start = time.perf_counter()
+    for _ in range(iterations):
+        amount = WalletOperation.model_validate_json(body).amount
+        balance += amount
+        adapt(balance).getquoted()
+        str(balance)
+    _report("numeric (Decimal)", iterations, time.perf_counter() - start)
+
+    balance = 0
+    start = time.perf_counter()
+    for _ in range(iterations):
+        amount = to_minor(WalletOperation.model_validate_json(body).amount, "USD")
+        balance += amount
+        adapt(balance).getquoted()
+        str(from_minor(balance, "USD"))
+    _report("minor units (int)", iterations, time.perf_counter() - start)
+
+
+def database_pass(database_url: str, iterations: int):
+    from sqlalchemy import create_engine, text
+
+    engine = create_engine(database_url)
+    if engine.dialect.name != "postgresql":
+        logger.warning("Database pass skipped: PostgreSQL only")
+        return
+    for label, column_type, amount in (
+        ("numeric UPDATE", "NUMERIC(10, 2)", Decimal("12.34")),
+        ("bigint UPDATE", "BIGINT", 1234),
+    ):
+        with engine.connect() as conn:
+            conn.execute(text(f"CREATE TEMPORARY TABLE bench_wallet (id INT PRIMARY KEY, balance {column_type})"))
+            conn.execute(text("INSERT INTO bench_wallet VALUES (1, 0)"))
+            conn.commit()
+            raw = conn.connection.dbapi_connection
+            cursor = raw.cursor()
+            start = time.perf_counter()
+            for _ in range(iterations):
+                cursor.execute(
+                    "UPDATE bench_wallet SET balance = balance + %s WHERE id = 1 RETURNING balance", (amount,)
+                )
+                cursor.fetchone()
+            raw.commit()
+            _report(label, iterations, time.perf_counter() - start)
+            cursor.close()
+            conn.execute(text("DROP TABLE bench_wallet"))
+            conn.commit()
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark Decimal versus minor-unit money handling")
+    parser.add_argument("--iterations", type=int, default=100_000)
+    parser.add_argument("--db-iterations", type=int, default=10_000)
+    parser.add_argument("--database-url", default=os.environ.get("BENCHMARK_DATABASE_URL"))
+    args = parser.parse_args()
+
+    os.environ.setdefault("DATABASE_URL", args.database_url or "sqlite://")
+    os.environ.setdefault("SECRET_KEY", "benchmark-secret-key")
+
+    cpu_pass(args.iterations)
+    if args.database_url:
+        database_pass(args.database_url, args.db_iterations)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,97 @@
+#!/usr/bin/env python3
+"""Count password KDF runs per active user per hour with and without refresh tokens.
+
+Simulates ``--users`` clients staying signed in for ``--hours``, each
+needing a fresh access token every ``ACCESS_TOKEN_EXPIRE_MINUTES``. In
+``password`` mode every renewal is a ``POST /users/login``; in ``refresh``
+mode the first is a login and the rest are ``POST /users/token/refresh``.
+KDF executions are read from the ``kdf.verify`` and ``kdf.hash`` counters
+and latencies are measured per call, against the database configured by
+``DATABASE_URL`` (existing tables are dropped).
+"""
+import argparse
+import logging
+import os
+import statistics
+import sys
+import time
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+
+logging.basicConfig(
+    level=logging.INFO,
+    format="%(asctime)s | %(name)s | %(levelname)s | %(message)s",
+)
+logger = logging.getLogger("benchmark")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Compare KDF load of password logins and refresh tokens")
+    parser.add_argument("--users", type=int, default=20)
+    parser.add_argument("--hours", type=float, default=8)
+    args = parser.parse_args()
+
+    os.environ.setdefault("LOG_LEVEL", "WARNING")
+    from fastapi.testclient import TestClient
+    from app.config import settings
+    from app.db import engine, init_db
+    from app.main import app
+    from app.metrics import metrics
+    from app.models import Base
+
+    # setup_logging() runs on import; keep request logs quiet but our report visible.
+    logging.getLogger("app.access").setLevel(logging.WARNING)
+    logger.setLevel(logging.INFO)
+    Base.metadata.drop_all(bind=engine)
+    init_db()
+    renewals = max(int(args.hours * 60 / settings.access_token_expire_minutes), 1)
+    emails = [f"refresh-bench-{i}@example.com" for i in range(args.users)]
+
+    with TestClient(app) as client:
+        for email in emails:
+            client.post(
+                "/users/signup",
+                json={"email": email, "full_name": "Refresh Bench", "phone": None, "password": "bench-password"},
+            )
+
+        for mode in ("password", "refresh"):
+            metrics.reset()
+            latencies = {"login": [], "refresh": []}
+            refresh_tokens = {}
+            for renewal in range(renewals):
+                for email in emails:
+                    start = time.perf_counter()
+                    if mode == "refresh" and renewal > 0:
+                        response = client.post("/users/token/refresh", json={"refresh_token": refresh_tokens[email]})
+                        kind = "refresh"
+                    else:
+                        response = client.post("/users/login", json={"email": email, "password": "bench-password"})
+                        kind = "login"
+                    latencies[kind].append(time.perf_counter() - start)
+                    response.raise_for_status()
+                    refresh_tokens[email] = response.json()["refresh_token"]
+
+            counters = metrics.snapshot()["counters"]
+            kdf_runs = counters.get("kdf.verify", 0) + counters.get("kdf.hash", 0)
+            logger.info(
+                "%-8s %d users x %d renewals over %.1fh: %d KDF runs = %.3f per user per hour",
+                mode,
+                args.users,
+                renewals,
+                args.hours,
+                kdf_runs,
+                kdf_runs / args.users / args.hours,
+            )
+            for kind, samples in latencies.items():
+                if samples:
+                    logger.info("         %-7s p50 %.2f ms over %d calls", kind, statistics.median(samples) * 1000, len(samples))
+
+    logger.info(
+        "refresh mode, steady state: one login per %d-day refresh token = %.4f KDF runs per user per hour",
+        settings.refresh_token_expire_days,
+        1 / (settings.refresh_token_expire_days * 24),
+    )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,102 @@
+#!/usr/bin/env python3
+"""Seed due orders directly in the database and time the settlement workers."""
+import argparse
+import logging
+import os
+import sys
+import time
+import uuid
+from argparse import Namespace
+from datetime import timedelta
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+
+logging.basicConfig(
+    level=logging.INFO,
+    format="%(asctime)s | %(name)s | %(levelname)s | %(message)s",
+)
+logger = logging.getLogger("benchmark")
+
+
+def seed_due_orders(engine, count: int, customers: int, chunk_size: int = 10_000):
+    from sqlalchemy import insert
+    from app.models import Order, User, utcnow_naive
+
+    now = utcnow_naive()
+    customer_ids = [uuid.uuid4() for _ in range(customers)]
+    with engine.begin() as conn:
+        conn.execute(
+            insert(User),
+            [
+                {
+                    "id": customer_id,
+                    "email": f"settle-{customer_id}@example.com",
+                    "full_name": "Settlement Bench",
+                    "hashed_password": "!",
+                    "created_at": now,
+                    "is_active": True,
+                }
+                for customer_id in customer_ids
+            ],
+        )
+    for start in range(0, count, chunk_size):
+        rows = [
+            {
+                "id": uuid.uuid4(),
+                "customer_id": customer_ids[i % customers],
+                "amount": 10,
+                "currency": "USD",
+                "status": "created",
+                "created_at": now - timedelta(seconds=3600 + i % 86_400),
+                "updated_at": now,
+            }
+            for i in range(start, min(start + chunk_size, count))
+        ]
+        with engine.begin() as conn:
+            conn.execute(insert(Order), rows)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark order settlement throughput")
+    parser.add_argument("--orders", type=int, default=1_000_000)
+    parser.add_argument("--customers", type=int, default=1_000)
+    parser.add_argument("--processes", type=int, default=4)
+    parser.add_argument("--batch-size", type=int, default=1_000)
+    parser.add_argument("--skip-seed", action="store_true")
+    args = parser.parse_args()
+
+    os.environ.setdefault("LOG_LEVEL", "WARNING")
+    from app.db import engine, init_db
+    from app.models import Base
+    from settlement_worker import run_workers
+
+    if not args.skip_seed:
+        Base.metadata.drop_all(bind=engine)
+        init_db()
+        start = time.perf_counter()
+        seed_due_orders(engine, args.orders, args.customers)
+        logger.info("Seeded %d orders in %.1fs", args.orders, time.perf_counter() - start)
+
+    worker_args = Namespace(
+        batch_size=args.batch_size,
+        window_seconds=0,
+        poll_interval=0.1,
+        report_interval=30.0,
+        max_batches=None,
+        once=True,
+    )
+    start = time.perf_counter()
+    # Always settle in child processes so every run pays the same startup cost.
+    settled = run_workers(worker_args, args.processes)
+    elapsed = time.perf_counter() - start
+    logger.info(
+        "Settled %d orders with %d process(es) in %.1fs (%.0f orders/s)",
+        settled,
+        args.processes,
+        elapsed,
+        settled / elapsed if elapsed else 0.0,
+    )
+
+
+if __name__ == "__main__":
+    main()
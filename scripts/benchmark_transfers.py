@@ -0,0 +1,141 @@
+#!/usr/bin/env python3
+"""Benchmark wallet-to-wallet transfers between a few hot wallets.
+
+Threads move money back and forth between ``--wallets`` wallets in the
+database configured by ``DATABASE_URL`` (existing tables are dropped).
+Every pair gets traffic in both directions, the pattern that deadlocks
+when two transactions lock the same rows in opposite orders. Reports
+throughput, retries and the server's deadlock counter, and checks that
+the total balance did not change. ``--naive`` locks sender then recipient
+instead of going through ``services.transfer_wallet``, for comparison.
+"""
+import argparse
+import logging
+import os
+import random
+import sys
+import threading
+import time
+import uuid
+from collections import Counter
+from concurrent.futures import ThreadPoolExecutor
+from decimal import Decimal
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+
+logging.basicConfig(
+    level=logging.INFO,
+    format="%(asctime)s | %(name)s | %(levelname)s | %(message)s",
+)
+logger = logging.getLogger("benchmark")
+
+
+def naive_transfer(db, from_customer_id, to_customer_id, amount):
+    """Lock in request order, as two separate debit/credit lock calls would."""
+    from app import services
+
+    def work():
+        sender = services._get_wallet_for_update(db, from_customer_id)
+        recipient = services._get_wallet_for_update(db, to_customer_id)
+        services._write_wallet_balance(db, sender, sender.balance - amount)
+        services._write_wallet_balance(db, recipient, recipient.balance + amount)
+
+    services.run_in_transaction(db, "naive_transfer", work)
+
+
+def deadlock_count(engine) -> int | None:
+    from sqlalchemy import text
+
+    if engine.dialect.name != "postgresql":
+        return None
+    with engine.connect() as conn:
+        return conn.execute(
+            text("SELECT deadlocks FROM pg_stat_database WHERE datname = current_database()")
+        ).scalar()
+
+
+def total_balance(session_factory):
+    from sqlalchemy import func
+    from app.models import Wallet
+
+    with session_factory() as db:
+        return db.query(func.sum(Wallet.balance)).scalar()
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark cross-transfers between hot wallets")
+    parser.add_argument("--wallets", type=int, default=4)
+    parser.add_argument("--threads", type=int, default=16)
+    parser.add_argument("--transfers", type=int, default=5_000)
+    parser.add_argument("--naive", action="store_true", help="Lock sender then recipient (unordered)")
+    parser.add_argument("--seed", type=int, default=7)
+    args = parser.parse_args()
+
+    os.environ.setdefault("LOG_LEVEL", "WARNING")
+    from app import services
+    from app.db import SessionLocal, engine, init_db
+    from app.metrics import metrics
+    from app.models import Base, User
+    from app.money import to_storage
+    from app.config import settings
+
+    Base.metadata.drop_all(bind=engine)
+    init_db()
+    customer_ids = [uuid.uuid4() for _ in range(args.wallets)]
+    with SessionLocal() as db:
+        for customer_id in customer_ids:
+            db.add(User(id=customer_id, email=f"transfer-{customer_id}@example.com", full_name="Transfer Bench", hashed_password="!"))
+        db.commit()
+        for customer_id in customer_ids:
+            services.credit_wallet(db, customer_id, to_storage(Decimal("1000000.00"), settings.wallet_currency))
+
+    amount = to_storage(Decimal("1.00"), settings.wallet_currency)
+    rng = random.Random(args.seed)
+    pairs = [tuple(rng.sample(customer_ids, 2)) for _ in range(args.transfers)]
+    outcomes = Counter()
+    outcomes_lock = threading.Lock()
+    transfer = naive_transfer if args.naive else services.transfer_wallet
+
+    def run(pair):
+        with SessionLocal() as db:
+            try:
+                transfer(db, pair[0], pair[1], amount)
+                outcome = "ok"
+            except Exception as exc:
+                outcome = type(exc).__name__
+        with outcomes_lock:
+            outcomes[outcome] += 1
+
+    before_total = total_balance(SessionLocal)
+    before_deadlocks = deadlock_count(engine)
+    metrics.reset()
+    start = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=args.threads) as executor:
+        list(executor.map(run, pairs))
+    elapsed = time.perf_counter() - start
+    after_deadlocks = deadlock_count(engine)
+
+    name = "naive_transfer" if args.naive else "transfer_wallet"
+    retries = {key: value for key, value in metrics.snapshot()["counters"].items() if key.startswith(f"db_retry.{name}.")}
+    logger.info(
+        "%s transfers across %d wallets, %d threads: %d in %.2fs (%.0f transfers/s)",
+        "naive" if args.naive else "ordered",
+        args.wallets,
+        args.threads,
+        args.transfers,
+        elapsed,
+        outcomes["ok"] / elapsed if elapsed else 0.0,
+    )
+    logger.info("Outcomes: %s", dict(outcomes))
+    logger.info("Retries: %s", retries or "none")
+    if before_deadlocks is not None:
+        logger.info("Server deadlocks during run: %d", after_deadlocks - before_deadlocks)
+    after_total = total_balance(SessionLocal)
+    if after_total != before_total:
+        logger.error("Total balance changed: %s -> %s", before_total, after_total)
+        sys.exit(1)
+    logger.info("Total balance unchanged: %s", after_total)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,219 @@
+#!/usr/bin/env python3
+"""Bulk-load synthetic users, wallets and orders straight into the database.
+
+For index, pagination and settlement testing at sizes the HTTP seeder
+(scripts/seed_data.py) cannot reach. Rows are streamed in chunks with COPY on
+PostgreSQL (psycopg2 or psycopg 3) and with batched executemany elsewhere.
+Output depends only on --seed: every user shares one password hash whose salt
+comes from the seed, ids come from the seeded generator, and timestamps are
+offsets from a fixed --end date.
+
+Distributions:
+- orders per customer are Zipf-skewed (--skew), so a few customers own most orders
+- order ages lean towards --end (recent months hold most rows)
+- amounts are log-normal, currencies weighted towards USD
+- orders older than --settled-after-days are settled, newer ones still created
+"""
+import argparse
+import csv
+import io
+import itertools
+import logging
+import math
+import os
+import random
+import sys
+import time
+import uuid
+from datetime import datetime, timedelta
+from decimal import Decimal
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+
+from sqlalchemy import create_engine, insert
+
+from app.auth import hash_password
+from app.config import settings
+from app.models import Base, Order, User, Wallet
+from app.money import STORE_MINOR_UNITS, exponent, from_minor
+from app.settlement import ORDER_CREATED, ORDER_SETTLED
+
+logging.basicConfig(
+    level=logging.INFO,
+    format="%(asctime)s | %(name)s | %(levelname)s | %(message)s",
+)
+logger = logging.getLogger("generate_data")
+
+CURRENCY_WEIGHTS = {"USD": 60, "EUR": 20, "INR": 12, "GBP": 5, "JPY": 3}
+USER_COLUMNS = ("id", "email", "full_name", "phone", "hashed_password", "created_at", "is_active")
+WALLET_COLUMNS = ("customer_id", "balance", "updated_at")
+ORDER_COLUMNS = ("id", "customer_id", "amount", "currency", "idempotency_key", "status", "created_at", "updated_at")
+# NUMERIC(10, 2) holds at most 99,999,999.99.
+MAX_MINOR_UNITS = 9_999_999_999
+
+
+class Generator:
+    """Deterministic row source; the same arguments always produce the same rows."""
+
+    def __init__(self, seed: int, users: int, days: int, skew: float, settled_after_days: int, end: datetime):
+        self.rng = random.Random(seed)
+        self.seed = seed
+        self.days = days
+        self.settled_after = timedelta(days=settled_after_days)
+        self.end = end
+        self.user_ids = [self._uuid() for _ in range(users)]
+        # Zipf weights by rank; ranks map onto users in generation order, which is random.
+        self.cum_weights = list(itertools.accumulate(1.0 / (rank + 1) ** skew for rank in range(users)))
+        self.currencies = list(CURRENCY_WEIGHTS)
+        self.currency_weights = list(itertools.accumulate(CURRENCY_WEIGHTS.values()))
+
+    def _uuid(self) -> uuid.UUID:
+        return uuid.UUID(int=self.rng.getrandbits(128), version=4)
+
+    def _age(self) -> timedelta:
+        # Squaring a uniform draw puts most rows in the recent end of the window.
+        return timedelta(seconds=int(self.days * 86_400 * self.rng.random() ** 2))
+
+    def _money(self, minor_units: int, currency: str) -> Decimal | int:
+        minor_units = max(1, min(minor_units, MAX_MINOR_UNITS))
+        return minor_units if STORE_MINOR_UNITS else from_minor(minor_units, currency)
+
+    def _minor_amount(self, currency: str, median_major: float, sigma: float) -> int:
+        major = self.rng.lognormvariate(math.log(median_major), sigma)
+        return int(major * 10 ** exponent(currency))
+
+    def users(self, hashed_password: str):
+        for index, user_id in enumerate(self.user_ids):
+            created_at = self.end - timedelta(days=self.days) - self._age()
+            yield (user_id, f"bulk-{self.seed}-{index}@example.com", f"Bulk User {index}", None, hashed_password, created_at, True)
+
+    def wallets(self):
+        currency = settings.wallet_currency
+        for user_id in self.user_ids:
+            balance = self._money(self._minor_amount(currency, 500.0, 1.5), currency)
+            yield (user_id, balance, self.end - self._age())
+
+    def orders(self, count: int, chunk_size: int):
+        for start in range(0, count, chunk_size):
+            size = min(chunk_size, count - start)
+            customers = self.rng.choices(self.user_ids, cum_weights=self.cum_weights, k=size)
+            currencies = self.rng.choices(self.currencies, cum_weights=self.currency_weights, k=size)
+            for offset, (customer_id, currency) in enumerate(zip(customers, currencies)):
+                age = self._age()
+                created_at = self.end - age
+                settled = age > self.settled_after
+                idempotency_key = f"bulk-{self.seed}-{start + offset}" if self.rng.random() < 0.5 else None
+                yield (
+                    self._uuid(),
+                    customer_id,
+                    self._money(self._minor_amount(currency, 40.0, 1.0), currency),
+                    currency,
+                    idempotency_key,
+                    ORDER_SETTLED if settled else ORDER_CREATED,
+                    created_at,
+                    created_at + timedelta(hours=1) if settled else created_at,
+                )
+
+
+def _chunks(rows, size: int):
+    iterator = iter(rows)
+    while chunk := list(itertools.islice(iterator, size)):
+        yield chunk
+
+
+def copy_rows(engine, table: str, columns, rows, chunk_size: int) -> int:
+    """Stream rows into a PostgreSQL table with COPY, one transaction per chunk."""
+    statement = f"COPY {table} ({', '.join(columns)}) FROM STDIN WITH (FORMAT csv)"
+    written = 0
+    for chunk in _chunks(rows, chunk_size):
+        buffer = io.StringIO()
+        # csv writes None as an unquoted empty field, which COPY reads as NULL.
+        csv.writer(buffer).writerows(chunk)
+        buffer.seek(0)
+        raw = engine.raw_connection()
+        try:
+            cursor = raw.cursor()
+            if engine.dialect.driver == "psycopg":
+                with cursor.copy(statement) as copy:
+                    copy.write(buffer.getvalue())
+            else:
+                cursor.copy_expert(statement, buffer)
+            raw.commit()
+        finally:
+            raw.close()
+        written += len(chunk)
+    return written
+
+
+def insert_rows(engine, table, columns, rows, chunk_size: int) -> int:
+    """Batched executemany through SQLAlchemy Core, for SQLite and other backends."""
+    written = 0
+    for chunk in _chunks(rows, chunk_size):
+        with engine.begin() as conn:
+            conn.execute(insert(table), [dict(zip(columns, row)) for row in chunk])
+        written += len(chunk)
+    return written
+
+
+def load(engine, label: str, table, columns, rows, chunk_size: int) -> int:
+    start = time.perf_counter()
+    if engine.dialect.name == "postgresql":
+        written = copy_rows(engine, table.name, columns, rows, chunk_size)
+    else:
+        written = insert_rows(engine, table, columns, rows, chunk_size)
+    elapsed = time.perf_counter() - start
+    logger.info(
+        "%s: %d rows in %.1fs (%.0f rows/s)", label, written, elapsed, written / elapsed if elapsed else 0.0
+    )
+    return written
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Bulk-generate synthetic users, wallets and orders")
+    parser.add_argument("--database-url", default=settings.database_url)
+    parser.add_argument("--users", type=int, default=100_000)
+    parser.add_argument("--orders", type=int, default=10_000_000)
+    parser.add_argument("--days", type=int, default=365, help="Spread order created_at over this many days")
+    parser.add_argument("--end", default="2026-01-01", help="Newest created_at (ISO date); fixed for determinism")
+    parser.add_argument("--skew", type=float, default=1.0, help="Zipf exponent for orders per customer")
+    parser.add_argument("--settled-after-days", type=int, default=2)
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--password", default="secret123", help="Password every generated user logs in with")
+    parser.add_argument("--chunk-size", type=int, default=50_000)
+    parser.add_argument("--reset", action="store_true", help="Drop and recreate all tables first")
+    args = parser.parse_args()
+
+    engine = create_engine(args.database_url)
+    if args.reset:
+        Base.metadata.drop_all(bind=engine)
+    Base.metadata.create_all(bind=engine)
+    end = datetime.fromisoformat(args.end)
+    if engine.dialect.name == "postgresql":
+        from app.partitions import ensure_order_partitions
+
+        # Monthly partitions for the whole window; there may be no default partition.
+        ensure_order_partitions(
+            engine, months_ahead=0, months_back=args.days // 28 + 1, today=end.date()
+        )
+
+    generator = Generator(args.seed, args.users, args.days, args.skew, args.settled_after_days, end)
+    # One PBKDF2 run for every user; the salt comes from the seed too.
+    hashed_password = hash_password(args.password, salt=generator.rng.randbytes(16))
+
+    start = time.perf_counter()
+    total = load(engine, "users", User.__table__, USER_COLUMNS, generator.users(hashed_password), args.chunk_size)
+    total += load(engine, "wallets", Wallet.__table__, WALLET_COLUMNS, generator.wallets(), args.chunk_size)
+    total += load(
+        engine,
+        "orders",
+        Order.__table__,
+        ORDER_COLUMNS,
+        generator.orders(args.orders, args.chunk_size),
+        args.chunk_size,
+    )
+    elapsed = time.perf_counter() - start
+    logger.info("Total: %d rows in %.1fs (%.0f rows/s)", total, elapsed, total / elapsed if elapsed else 0.0)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,69 @@
+#!/usr/bin/env python3
+import argparse
+import logging
+import os
+import sys
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+
+from app.config import settings
+from app.db import engine
+from app.partitions import archive_order_partitions, ensure_order_partitions, list_order_partitions
+
+logging.basicConfig(
+    level=logging.INFO,
+    format="%(asctime)s | %(name)s | %(levelname)s | %(message)s",
+)
+logger = logging.getLogger(__name__)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Maintain monthly partitions of the orders table")
+    subparsers = parser.add_subparsers(dest="command", required=True)
+
+    subparsers.add_parser("list", help="Show attached order partitions")
+
+    create = subparsers.add_parser("create", help="Create monthly partitions ahead of time")
+    create.add_argument("--months-ahead", type=int, default=settings.orders_partition_months_ahead)
+    create.add_argument("--months-back", type=int, default=0)
+    create.add_argument("--lock-timeout-ms", type=int, default=5000)
+
+    archive = subparsers.add_parser("archive", help="Archive partitions older than the retention window")
+    archive.add_argument("--retain-months", type=int, required=True)
+    archive.add_argument("--mode", choices=["move", "detach"], default="move")
+    archive.add_argument("--batch-size", type=int, default=5000)
+    archive.add_argument("--max-partitions", type=int, default=1)
+    archive.add_argument("--lock-timeout-ms", type=int, default=2000)
+    args = parser.parse_args()
+
+    if engine.dialect.name != "postgresql":
+        raise SystemExit("Order partitioning requires PostgreSQL.")
+
+    if args.command == "list":
+        with engine.connect() as conn:
+            for name, month in sorted(list_order_partitions(conn).items()):
+                logger.info("%s %s", name, month.isoformat() if month else "(default)")
+    elif args.command == "create":
+        created = ensure_order_partitions(
+            engine,
+            months_ahead=args.months_ahead,
+            months_back=args.months_back,
+            lock_timeout_ms=args.lock_timeout_ms,
+            default_partition=settings.orders_default_partition,
+        )
+        logger.info("Created %d partition(s): %s", len(created), ", ".join(created) or "-")
+    else:
+        archived = archive_order_partitions(
+            engine,
+            retain_months=args.retain_months,
+            mode=args.mode,
+            batch_size=args.batch_size,
+            max_partitions=args.max_partitions,
+            lock_timeout_ms=args.lock_timeout_ms,
+            keep_default=settings.orders_default_partition,
+        )
+        logger.info("Archived %d partition(s): %s", len(archived), ", ".join(archived) or "-")
+
+
+if __name__ == "__main__":
+    main()
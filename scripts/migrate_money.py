@@ -0,0 +1,121 @@
+#!/usr/bin/env python3
+"""Convert stored order amounts, wallet balances and transfer amounts between NUMERIC and BIGINT minor units.
+
+PostgreSQL only. Orders, archived orders (``orders_archive``, when it exists),
+wallets and wallet transfers are rewritten under an ACCESS EXCLUSIVE lock in
+one transaction, so run it in a maintenance window with the API stopped,
+then restart the API with the matching MONEY_STORAGE.
+"""
+import argparse
+import logging
+import os
+import sys
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+
+from sqlalchemy import create_engine, text
+
+from app.config import settings
+from app.money import CURRENCY_EXPONENTS, DEFAULT_EXPONENT, MINOR_UNITS, NUMERIC, exponent
+from app.partitions import ARCHIVE_TABLE
+
+logging.basicConfig(
+    level=logging.INFO,
+    format="%(asctime)s | %(name)s | %(levelname)s | %(message)s",
+)
+logger = logging.getLogger("migrate_money")
+
+
+def _exponent_case(column: str) -> str:
+    whens = " ".join(f"WHEN '{currency}' THEN {exp}" for currency, exp in sorted(CURRENCY_EXPONENTS.items()))
+    return f"CASE {column} {whens} ELSE {DEFAULT_EXPONENT} END"
+
+
+def _order_scale() -> str:
+    return f"power(10::numeric, {_exponent_case('currency')})"
+
+
+def _wallet_scale(wallet_currency: str) -> str:
+    return f"power(10::numeric, {exponent(wallet_currency)})"
+
+
+def lossy_row_checks(wallet_currency: str, archived: bool = False) -> dict[str, str]:
+    """Queries counting rows whose value has more decimals than their currency allows."""
+    order_tables = ["orders", ARCHIVE_TABLE] if archived else ["orders"]
+    return {
+        **{
+            table: f"SELECT count(*) FROM {table} WHERE amount * {_order_scale()} <> round(amount * {_order_scale()})"
+            for table in order_tables
+        },
+        "wallets": (
+            f"SELECT count(*) FROM wallets "
+            f"WHERE balance * {_wallet_scale(wallet_currency)} <> round(balance * {_wallet_scale(wallet_currency)})"
+        ),
+        "wallet_transfers": (
+            f"SELECT count(*) FROM wallet_transfers "
+            f"WHERE amount * {_wallet_scale(wallet_currency)} <> round(amount * {_wallet_scale(wallet_currency)})"
+        ),
+    }
+
+
+def migration_statements(target: str, wallet_currency: str) -> list[str]:
+    # orders_archive is created by LIKE orders, so it keeps the column type it was created with.
+    if target == MINOR_UNITS:
+        return [
+            f"ALTER TABLE orders ALTER COLUMN amount TYPE BIGINT "
+            f"USING round(amount * {_order_scale()})::bigint",
+            f"ALTER TABLE IF EXISTS {ARCHIVE_TABLE} ALTER COLUMN amount TYPE BIGINT "
+            f"USING round(amount * {_order_scale()})::bigint",
+            f"ALTER TABLE wallets ALTER COLUMN balance TYPE BIGINT "
+            f"USING round(balance * {_wallet_scale(wallet_currency)})::bigint",
+            f"ALTER TABLE wallet_transfers ALTER COLUMN amount TYPE BIGINT "
+            f"USING round(amount * {_wallet_scale(wallet_currency)})::bigint",
+        ]
+    return [
+        f"ALTER TABLE orders ALTER COLUMN amount TYPE NUMERIC(10, 2) "
+        f"USING amount / {_order_scale()}",
+        f"ALTER TABLE IF EXISTS {ARCHIVE_TABLE} ALTER COLUMN amount TYPE NUMERIC(10, 2) "
+        f"USING amount / {_order_scale()}",
+        f"ALTER TABLE wallets ALTER COLUMN balance TYPE NUMERIC(10, 2) "
+        f"USING balance / {_wallet_scale(wallet_currency)}",
+        f"ALTER TABLE wallet_transfers ALTER COLUMN amount TYPE NUMERIC(10, 2) "
+        f"USING amount / {_wallet_scale(wallet_currency)}",
+    ]
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Migrate money columns between NUMERIC and BIGINT minor units")
+    parser.add_argument("--to", choices=[MINOR_UNITS, NUMERIC], required=True)
+    parser.add_argument("--wallet-currency", default=settings.wallet_currency)
+    parser.add_argument("--lock-timeout-ms", type=int, default=5000)
+    parser.add_argument("--dry-run", action="store_true", help="Print the statements without running them")
+    parser.add_argument("--force", action="store_true", help="Round values that do not fit their currency")
+    args = parser.parse_args()
+
+    statements = migration_statements(args.to, args.wallet_currency)
+    if args.dry_run:
+        for statement in statements:
+            print(statement + ";")
+        return
+
+    engine = create_engine(settings.database_url)
+    if engine.dialect.name != "postgresql":
+        parser.error("money migration is PostgreSQL only; recreate SQLite databases instead")
+
+    with engine.begin() as conn:
+        conn.execute(text(f"SET LOCAL lock_timeout = '{int(args.lock_timeout_ms)}ms'"))
+        if args.to == MINOR_UNITS:
+            archived = conn.execute(text("SELECT to_regclass(:table) IS NOT NULL"), {"table": ARCHIVE_TABLE}).scalar()
+            checks = lossy_row_checks(args.wallet_currency, archived)
+            lossy = {table: conn.execute(text(query)).scalar() for table, query in checks.items()}
+            if any(lossy.values()) and not args.force:
+                logger.error("Rows would be rounded, rerun with --force to accept: %s", lossy)
+                sys.exit(1)
+        for statement in statements:
+            logger.info("Running: %s", statement.split(" USING ")[0])
+            conn.execute(text(statement))
+    logger.info("Money columns now stored as %s; set MONEY_STORAGE=%s and restart the API", args.to, args.to)
+
+
+if __name__ == "__main__":
+    main()
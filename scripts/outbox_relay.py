@@ -0,0 +1,52 @@
+#!/usr/bin/env python3
+import argparse
+import os
+import signal
+import sys
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+
+from app.config import settings
+from app.logging_config import setup_logging
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description="Publish order and wallet events from the transactional outbox."
+    )
+    parser.add_argument(
+        "--sink",
+        default=settings.outbox_sink,
+        help="Registered sink name (ndjson) or package.module:Factory",
+    )
+    parser.add_argument("--path", default=settings.outbox_sink_path, help="Sink target; '-' is stdout for ndjson")
+    parser.add_argument("--batch-size", type=int, default=settings.outbox_batch_size)
+    parser.add_argument("--poll-interval", type=float, default=settings.outbox_poll_interval_seconds)
+    parser.add_argument("--report-interval", type=float, default=10.0)
+    parser.add_argument("--max-batches", type=int, default=None, help="Exit after this many batch attempts")
+    parser.add_argument("--once", action="store_true", help="Exit when the outbox is empty")
+    args = parser.parse_args()
+
+    setup_logging(settings.log_level, settings.log_format)
+    from app.db import SessionLocal
+    from app.outbox import OutboxRelay, build_sink
+
+    sink = build_sink(args.sink, args.path)
+    relay = OutboxRelay(
+        session_factory=SessionLocal,
+        sink=sink,
+        batch_size=args.batch_size,
+        poll_interval_seconds=args.poll_interval,
+        report_interval_seconds=args.report_interval,
+    )
+    signal.signal(signal.SIGTERM, lambda *_: relay.stop())
+    try:
+        relay.run(max_batches=args.max_batches, stop_when_idle=args.once)
+    except KeyboardInterrupt:
+        relay.stop()
+    finally:
+        sink.close()
+
+
+if __name__ == "__main__":
+    main()
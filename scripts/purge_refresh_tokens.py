@@ -0,0 +1,36 @@
+#!/usr/bin/env python3
+"""Delete expired refresh tokens in batches; run it on a schedule, e.g. daily from cron."""
+import argparse
+import logging
+import os
+import sys
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+
+from app.db import SessionLocal
+from app.services import purge_expired_refresh_tokens
+
+logging.basicConfig(
+    level=logging.INFO,
+    format="%(asctime)s | %(name)s | %(levelname)s | %(message)s",
+)
+logger = logging.getLogger(__name__)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Delete refresh tokens past their expiry and the access-token TTL")
+    parser.add_argument("--batch-size", type=int, default=5000, help="Rows deleted per transaction")
+    args = parser.parse_args()
+
+    total = 0
+    with SessionLocal() as db:
+        while True:
+            deleted = purge_expired_refresh_tokens(db, args.batch_size)
+            total += deleted
+            if deleted < args.batch_size:
+                break
+    logger.info("Purged %d expired refresh token(s)", total)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,303 @@
+#!/usr/bin/env python3
+"""Replay a TRAFFIC_CAPTURE_PATH capture against a running instance and compare latencies.
+
+Requests are sent on the captured schedule: each one starts at its
+original offset from the first, divided by ``--speed`` (1 = real time,
+10 = ten times faster). ``--speed 0`` sends them back to back, at most
+``--concurrency`` at a time. Before the clock starts, the script creates
+one synthetic user per captured user:
+- users behind bearer tokens and ``user:`` references in bodies are signed up and logged in
+- emails that log in without signing up in the capture are signed up
+- each distinct captured refresh token gets a fresh session
+
+Tokenized values are then substituted. Passwords are ``REPLAY_PASSWORD``,
+or a wrong one where the captured login failed, so a replay against the
+same starting database is deterministic.
+
+Per route template it reports p50/p95/p99 latency and how many responses
+differ from the captured status. ``--results`` saves the samples and
+``--baseline`` compares a run with a saved one, so two builds can be
+replayed with the same capture and compared:
+
+    python scripts/replay_traffic.py traffic.jsonl --speed 10 --results before.json
+    python scripts/replay_traffic.py traffic.jsonl --speed 10 --baseline before.json --fail-above 20
+"""
+import argparse
+import asyncio
+import contextlib
+import json
+import logging
+import os
+import sys
+import time
+from collections import Counter, defaultdict
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+
+import httpx
+
+from app.metrics import percentiles
+
+logging.basicConfig(
+    level=logging.INFO,
+    format="%(asctime)s | %(name)s | %(levelname)s | %(message)s",
+)
+logger = logging.getLogger("replay")
+logging.getLogger("httpx").setLevel(logging.WARNING)
+
+REPLAY_PASSWORD = "replay-password"
+WRONG_PASSWORD = "replay-wrong-password"
+# Below this many samples a route's percentiles are too noisy to gate on.
+MIN_SAMPLES = 20
+
+
+def load_capture(paths: list[str]) -> list[dict]:
+    records = []
+    for path in paths:
+        with open(path, encoding="utf-8") as handle:
+            records.extend(json.loads(line) for line in handle if line.strip())
+    records.sort(key=lambda record: record["ts"])
+    return records
+
+
+def client_key(record: dict) -> str | None:
+    """The captured client a request belongs to, if it can be told."""
+    if record["user"]:
+        return record["user"]
+    body = record["body"] if isinstance(record["body"], dict) else {}
+    return body.get("email") or body.get("refresh_token")
+
+
+def references(value, prefix: str):
+    """Every string in a redacted body that starts with ``prefix``."""
+    if isinstance(value, dict):
+        for item in value.values():
+            yield from references(item, prefix)
+    elif isinstance(value, list):
+        for item in value:
+            yield from references(item, prefix)
+    elif isinstance(value, str) and value.startswith(prefix):
+        yield value
+
+
+class Identities:
+    """Synthetic users and sessions standing in for the tokenized ones in a capture."""
+
+    def __init__(self, client: httpx.AsyncClient, fund: str | None):
+        self.client = client
+        self.fund = fund
+        self.access_tokens: dict[str, str] = {}
+        self.user_ids: dict[str, str] = {}
+        self.refresh_tokens: dict[str, str] = {}
+
+    async def _login(self, email: str, full_name: str) -> dict:
+        await self.client.post(
+            "/users/signup",
+            json={"email": email, "full_name": full_name, "phone": None, "password": REPLAY_PASSWORD},
+        )
+        response = await self.client.post("/users/login", json={"email": email, "password": REPLAY_PASSWORD})
+        response.raise_for_status()
+        return response.json()
+
+    async def prepare(self, records: list[dict]):
+        users, emails, refresh = set(), set(), set()
+        signed_up = {r["body"]["email"] for r in records if r["route"] == "/users/signup" and r["body"]}
+        for record in records:
+            if record["user"]:
+                users.add(record["user"])
+            users.update(ref.removeprefix("user:") for ref in references(record["body"], "user:"))
+            refresh.update(references(record["body"], "refresh:"))
+            if record["route"] == "/users/login" and record["body"]:
+                emails.add(record["body"]["email"])
+
+        for user in sorted(users):
+            tokens = await self._login(f"replay-{user}@example.com", f"Replay {user}")
+            self.access_tokens[user] = tokens["access_token"]
+            me = await self.client.get("/users/me", headers=self.auth(user))
+            me.raise_for_status()
+            self.user_ids[user] = me.json()["id"]
+            if self.fund:
+                response = await self.client.post("/wallet/me/credit", json={"amount": self.fund}, headers=self.auth(user))
+                response.raise_for_status()
+        for email in sorted(emails - signed_up):
+            await self.client.post(
+                "/users/signup",
+                json={"email": email, "full_name": "Replay Login", "phone": None, "password": REPLAY_PASSWORD},
+            )
+        for value in sorted(refresh):
+            self.refresh_tokens[value] = (await self._login("replay-sessions@example.com", "Replay Sessions"))["refresh_token"]
+        logger.info(
+            "Prepared %d synthetic users, %d login-only emails, %d refresh sessions",
+            len(users),
+            len(emails - signed_up),
+            len(refresh),
+        )
+
+    def auth(self, user: str | None) -> dict:
+        return {"Authorization": f"Bearer {self.access_tokens[user]}"} if user else {}
+
+    def resolve(self, value, record: dict):
+        if isinstance(value, dict):
+            return {key: self.resolve(item, record) for key, item in value.items()}
+        if isinstance(value, list):
+            return [self.resolve(item, record) for item in value]
+        if not isinstance(value, str):
+            return value
+        if value.startswith("user:"):
+            return self.user_ids[value.removeprefix("user:")]
+        if value.startswith("refresh:"):
+            return self.refresh_tokens[value]
+        if value == "<redacted>":
+            failed_login = record["route"] == "/users/login" and record["status"] != 200
+            return WRONG_PASSWORD if failed_login else REPLAY_PASSWORD
+        return value
+
+
+async def send(client, identities: Identities, record: dict, admin_key: str | None) -> dict:
+    headers = identities.auth(record["user"])
+    if record["admin"] and admin_key:
+        headers["X-Admin-Key"] = admin_key
+    body = identities.resolve(record["body"], record) if record["body"] is not None else None
+    url = record["path"] + (f"?{record['query']}" if record["query"] else "")
+    start = time.perf_counter()
+    try:
+        response = await client.request(record["method"], url, json=body, headers=headers)
+        status = response.status_code
+    except httpx.HTTPError:
+        status = None
+    return {
+        "route": f"{record['method']} {record['route'] or record['path']}",
+        "latency": time.perf_counter() - start,
+        "status": status,
+        "expected_status": record["status"],
+    }
+
+
+async def replay(records: list[dict], args) -> tuple[list[dict], float]:
+    limits = httpx.Limits(max_connections=args.concurrency, max_keepalive_connections=args.concurrency)
+    async with httpx.AsyncClient(base_url=args.base_url, limits=limits, timeout=args.timeout) as client:
+        identities = Identities(client, args.fund)
+        await identities.prepare(records)
+        gate = asyncio.Semaphore(args.concurrency)
+        # A client waits for its previous response, so a sped-up replay cannot
+        # log in before the signup finished. asyncio locks wake waiters in order.
+        clients = defaultdict(asyncio.Lock)
+
+        async def run(record):
+            key = client_key(record)
+            async with clients[key] if key else contextlib.nullcontext():
+                async with gate:
+                    return await send(client, identities, record, args.admin_key)
+
+        loop = asyncio.get_running_loop()
+        first_ts, started = records[0]["ts"], loop.time()
+        tasks, max_lag = [], 0.0
+        for record in records:
+            if args.speed > 0:
+                due = started + (record["ts"] - first_ts) / args.speed
+                delay = due - loop.time()
+                if delay > 0:
+                    await asyncio.sleep(delay)
+                else:
+                    max_lag = max(max_lag, -delay)
+            tasks.append(asyncio.create_task(run(record)))
+        results = await asyncio.gather(*tasks)
+        return results, max_lag
+
+
+def summarize(results: list[dict]) -> dict:
+    by_route = defaultdict(list)
+    for result in results:
+        by_route[result["route"]].append(result)
+    summary = {}
+    for route, samples in sorted(by_route.items()):
+        summary[route] = {
+            "count": len(samples),
+            "status_mismatches": dict(
+                Counter(f"{s['expected_status']}->{s['status']}" for s in samples if s["status"] != s["expected_status"])
+            ),
+            "latencies": [s["latency"] for s in samples],
+            **percentiles([s["latency"] for s in samples]),
+        }
+    return summary
+
+
+def compare(summary: dict, baseline: dict, fail_above: float | None) -> list[str]:
+    """Log per-route percentile changes and return the routes whose p95 regressed past ``fail_above``."""
+    regressed = []
+    for route, current in summary.items():
+        before = baseline.get(route)
+        if before is None:
+            logger.info("%-40s new route, no baseline", route)
+            continue
+        changes = []
+        for name in ("p50", "p95", "p99"):
+            change = (current[name] - before[name]) / before[name] * 100 if before[name] else 0.0
+            changes.append(f"{name} {before[name]:.2f} -> {current[name]:.2f} ms ({change:+.1f}%)")
+            if (
+                name == "p95"
+                and fail_above is not None
+                and change > fail_above
+                and min(current["count"], before["count"]) >= MIN_SAMPLES
+            ):
+                regressed.append(route)
+        logger.info("%-40s %s", route, ", ".join(changes))
+    return regressed
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Replay captured traffic and compare latency distributions")
+    parser.add_argument("capture", nargs="+", help="TRAFFIC_CAPTURE_PATH files")
+    parser.add_argument("--base-url", default="http://127.0.0.1:8000")
+    parser.add_argument("--speed", type=float, default=1.0, help="Timing multiplier; 0 sends as fast as possible")
+    parser.add_argument("--concurrency", type=int, default=64, help="Maximum requests in flight")
+    parser.add_argument("--timeout", type=float, default=30.0, help="Per-request timeout in seconds")
+    parser.add_argument("--admin-key", help="Sent on requests that carried X-Admin-Key")
+    parser.add_argument("--fund", help="Credit each synthetic user's wallet with this amount before replaying")
+    parser.add_argument("--results", help="Write per-route samples and percentiles as JSON")
+    parser.add_argument("--baseline", help="Results of a previous run to compare against")
+    parser.add_argument("--fail-above", type=float, help="Exit 1 if a route's p95 regressed by more than this percent")
+    args = parser.parse_args()
+
+    records = load_capture(args.capture)
+    if not records:
+        raise SystemExit("Capture is empty.")
+    span = records[-1]["ts"] - records[0]["ts"]
+    logger.info("Replaying %d requests captured over %.1fs at speed %s", len(records), span, args.speed or "max")
+
+    started = time.perf_counter()
+    results, max_lag = asyncio.run(replay(records, args))
+    elapsed = time.perf_counter() - started
+    summary = summarize(results)
+    for route, stats in summary.items():
+        logger.info(
+            "%-40s n=%-6d p50 %.2f p95 %.2f p99 %.2f ms, status mismatches %s",
+            route,
+            stats["count"],
+            stats["p50"],
+            stats["p95"],
+            stats["p99"],
+            stats["status_mismatches"] or "none",
+        )
+    logger.info(
+        "%d requests in %.1fs (%.0f req/s); sends fell behind schedule by up to %.1f ms",
+        len(results),
+        elapsed,
+        len(results) / elapsed if elapsed else 0.0,
+        max_lag * 1000,
+    )
+
+    if args.results:
+        with open(args.results, "w", encoding="utf-8") as handle:
+            json.dump({"speed": args.speed, "routes": summary}, handle)
+    regressed = []
+    if args.baseline:
+        with open(args.baseline, encoding="utf-8") as handle:
+            regressed = compare(summary, json.load(handle)["routes"], args.fail_above)
+    if regressed:
+        logger.error("p95 regressed by more than %.0f%% on: %s", args.fail_above, ", ".join(regressed))
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,271 @@
+#!/usr/bin/env python3
+"""Per-customer daily order and wallet-transfer aggregates, computed offline.
+
+Point ``--database-url`` at a replica so finance reports do not compete
+with ``create_order`` on the primary. Each day in ``[--start, --end)`` is
+read with a server-side cursor, ``--chunk-size`` rows at a time, and folded
+into columnar accumulators. These hold one array per output column and one
+slot per group. Each day is then written as
+``orders_YYYY-MM-DD`` and ``wallet_YYYY-MM-DD`` (CSV, or Parquet when
+pyarrow is installed) in ``--output-dir``. Memory is bounded by one day's
+distinct groups, whatever the number of rows. Days whose files already
+exist are skipped, so an interrupted run resumes where it stopped.
+Orders moved to ``orders_archive`` by ``scripts/manage_partitions.py
+archive`` are included; partitions archived with ``--mode detach`` are not.
+"""
+import argparse
+import csv
+import logging
+import os
+import sys
+import time
+from array import array
+from datetime import date, datetime, timedelta
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+
+from sqlalchemy import column, create_engine, func, inspect, select, table, union_all
+
+from app.config import settings
+from app.models import Order, WalletTransfer
+from app.money import STORE_MINOR_UNITS, exponent, from_minor
+from app.partitions import ARCHIVE_TABLE
+from app.settlement import ORDER_SETTLED
+
+try:
+    import pyarrow
+    import pyarrow.parquet
+except ImportError:  # optional: CSV output only
+    pyarrow = None
+
+logging.basicConfig(
+    level=logging.INFO,
+    format="%(asctime)s | %(name)s | %(levelname)s | %(message)s",
+)
+logger = logging.getLogger(__name__)
+
+SUM, MIN, MAX = "sum", "min", "max"
+# orders_archive is created with LIKE orders and is not mapped; name the columns the report reads.
+ORDERS_ARCHIVE = table(
+    ARCHIVE_TABLE,
+    *(column(name, Order.__table__.c[name].type) for name in ("customer_id", "currency", "amount", "status", "created_at")),
+)
+
+
+class ColumnarAggregator:
+    """Group-by accumulator with one ``array('q')`` per aggregate column.
+
+    ``add`` maps a group key to a slot index once, then updates each
+    column's slot in place, so a group costs a few machine words per
+    column instead of a Python object per value. Amounts must be integer
+    minor units.
+    """
+
+    def __init__(self, key_names: tuple[str, ...], columns: dict[str, str]):
+        self.key_names = key_names
+        self.columns = columns
+        self._ops = tuple(columns.values())
+        self._slots: dict[tuple, int] = {}
+        self.keys: list[tuple] = []
+        self.values = tuple(array("q") for _ in columns)
+
+    def add(self, key: tuple, row_values: tuple[int, ...]):
+        slot = self._slots.get(key)
+        if slot is None:
+            self._slots[key] = len(self.keys)
+            self.keys.append(key)
+            for column, value in zip(self.values, row_values):
+                column.append(value)
+            return
+        for op, column, value in zip(self._ops, self.values, row_values):
+            if op == SUM:
+                column[slot] += value
+            elif op == MIN:
+                if value < column[slot]:
+                    column[slot] = value
+            elif value > column[slot]:
+                column[slot] = value
+
+    def __len__(self) -> int:
+        return len(self.keys)
+
+    def column_names(self) -> list[str]:
+        return list(self.key_names) + list(self.columns)
+
+    def rows(self):
+        for slot, key in enumerate(self.keys):
+            yield key + tuple(column[slot] for column in self.values)
+
+
+def minor_units(amount, currency: str, scales: dict) -> int:
+    if STORE_MINOR_UNITS:
+        return amount
+    scale = scales.get(currency)
+    if scale is None:
+        scale = scales[currency] = 10 ** exponent(currency)
+    return int(amount * scale)
+
+
+def stream(engine, query, chunk_size: int):
+    """Yield result chunks from a server-side cursor inside a read-only transaction."""
+    with engine.connect() as conn:
+        if engine.dialect.name == "postgresql":
+            conn.exec_driver_sql("SET TRANSACTION READ ONLY")
+        result = conn.execution_options(yield_per=chunk_size).execute(query)
+        yield from result.partitions()
+
+
+def archived_until(engine) -> date | None:
+    """Day of the newest archived order, or None when nothing has been archived."""
+    if not inspect(engine).has_table(ARCHIVE_TABLE):
+        return None
+    with engine.connect() as conn:
+        newest = conn.execute(select(func.max(ORDERS_ARCHIVE.c.created_at))).scalar()
+    return newest.date() if newest else None
+
+
+def aggregate_orders(engine, day: date, chunk_size: int, archived: bool = False) -> tuple[ColumnarAggregator, int]:
+    """Aggregate one day of orders; ``archived`` also reads ``orders_archive``."""
+    start = datetime.combine(day, datetime.min.time())
+    sources = [Order.__table__, ORDERS_ARCHIVE] if archived else [Order.__table__]
+    selects = [
+        select(source.c.customer_id, source.c.currency, source.c.amount, source.c.status)
+        .where(source.c.created_at >= start, source.c.created_at < start + timedelta(days=1))
+        for source in sources
+    ]
+    query = union_all(*selects) if archived else selects[0]
+    totals = ColumnarAggregator(
+        ("customer_id", "currency"),
+        {"orders": SUM, "settled_orders": SUM, "amount": SUM, "min_amount": MIN, "max_amount": MAX},
+    )
+    scales, rows = {}, 0
+    for chunk in stream(engine, query, chunk_size):
+        rows += len(chunk)
+        for customer_id, currency, amount, status in chunk:
+            units = minor_units(amount, currency, scales)
+            totals.add((customer_id, currency), (1, status == ORDER_SETTLED, units, units, units))
+    return totals, rows
+
+
+def aggregate_wallet(engine, day: date, chunk_size: int) -> tuple[ColumnarAggregator, int]:
+    start = datetime.combine(day, datetime.min.time())
+    query = (
+        select(WalletTransfer.from_customer_id, WalletTransfer.to_customer_id, WalletTransfer.amount)
+        .where(WalletTransfer.created_at >= start, WalletTransfer.created_at < start + timedelta(days=1))
+    )
+    totals = ColumnarAggregator(
+        ("customer_id",),
+        {"transfers_out": SUM, "amount_out": SUM, "transfers_in": SUM, "amount_in": SUM},
+    )
+    currency, scales, rows = settings.wallet_currency, {}, 0
+    for chunk in stream(engine, query, chunk_size):
+        rows += len(chunk)
+        for from_customer_id, to_customer_id, amount in chunk:
+            units = minor_units(amount, currency, scales)
+            totals.add((from_customer_id,), (1, units, 0, 0))
+            totals.add((to_customer_id,), (0, 0, 1, units))
+    return totals, rows
+
+
+def output_rows(totals: ColumnarAggregator, day: date, amount_columns: set[str], currency_of):
+    """Rows with the day prepended and minor-unit amounts converted back to major units."""
+    names = totals.column_names()
+    for row in totals.rows():
+        currency = currency_of(row)
+        yield [day.isoformat(), str(row[0])] + [
+            str(from_minor(value, currency)) if name in amount_columns else value
+            for name, value in zip(names[1:], row[1:])
+        ]
+
+
+def write_rows(path: str, names: list[str], rows, output_format: str):
+    """Write atomically (temp file then rename) so a partial file never looks finished."""
+    tmp_path = path + ".tmp"
+    if output_format == "parquet":
+        rows = list(rows)
+        table = pyarrow.table({name: [row[i] for row in rows] for i, name in enumerate(names)})
+        pyarrow.parquet.write_table(table, tmp_path, compression="zstd")
+    else:
+        with open(tmp_path, "w", newline="", encoding="utf-8") as handle:
+            writer = csv.writer(handle)
+            writer.writerow(names)
+            writer.writerows(rows)
+    os.replace(tmp_path, path)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Write per-customer daily order and wallet aggregates")
+    parser.add_argument("--database-url", default=settings.database_url, help="Preferably a read replica")
+    parser.add_argument("--start", required=True, help="First day (ISO date)")
+    parser.add_argument("--end", required=True, help="Day after the last one (ISO date)")
+    parser.add_argument("--output-dir", default="reports")
+    parser.add_argument("--format", choices=["auto", "csv", "parquet"], default="auto")
+    parser.add_argument("--chunk-size", type=int, default=10_000)
+    parser.add_argument("--overwrite", action="store_true", help="Recompute days that already have output")
+    args = parser.parse_args()
+
+    output_format = args.format
+    if output_format == "auto":
+        output_format = "parquet" if pyarrow is not None else "csv"
+    elif output_format == "parquet" and pyarrow is None:
+        parser.error("--format parquet needs pyarrow installed")
+    os.makedirs(args.output_dir, exist_ok=True)
+    engine = create_engine(args.database_url)
+    archive_end = archived_until(engine)
+
+    day, end = date.fromisoformat(args.start), date.fromisoformat(args.end)
+    total_rows, started = 0, time.perf_counter()
+    while day < end:
+        paths = {
+            kind: os.path.join(args.output_dir, f"{kind}_{day.isoformat()}.{output_format}")
+            for kind in ("orders", "wallet")
+        }
+        if not args.overwrite and all(os.path.exists(path) for path in paths.values()):
+            logger.info("%s: already reported, skipping", day)
+            day += timedelta(days=1)
+            continue
+
+        day_started = time.perf_counter()
+        archived = archive_end is not None and day <= archive_end
+        orders, order_rows = aggregate_orders(engine, day, args.chunk_size, archived)
+        wallet, transfer_rows = aggregate_wallet(engine, day, args.chunk_size)
+        write_rows(
+            paths["orders"],
+            ["day"] + orders.column_names(),
+            output_rows(orders, day, {"amount", "min_amount", "max_amount"}, lambda row: row[1]),
+            output_format,
+        )
+        write_rows(
+            paths["wallet"],
+            ["day"] + wallet.column_names(),
+            output_rows(wallet, day, {"amount_out", "amount_in"}, lambda row: settings.wallet_currency),
+            output_format,
+        )
+        elapsed = time.perf_counter() - day_started
+        rows = order_rows + transfer_rows
+        total_rows += rows
+        logger.info(
+            "%s: %d orders, %d transfers -> %d order groups, %d wallet groups in %.2fs (%.0f rows/s)",
+            day,
+            order_rows,
+            transfer_rows,
+            len(orders),
+            len(wallet),
+            elapsed,
+            rows / elapsed if elapsed else 0.0,
+        )
+        day += timedelta(days=1)
+
+    elapsed = time.perf_counter() - started
+    logger.info(
+        "Total: %d rows in %.1fs (%.0f rows/s), %s output in %s",
+        total_rows,
+        elapsed,
+        total_rows / elapsed if elapsed else 0.0,
+        output_format,
+        args.output_dir,
+    )
+
+
+if __name__ == "__main__":
+    main()
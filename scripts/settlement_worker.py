@@ -0,0 +1,88 @@
+#!/usr/bin/env python3
+import argparse
+import logging
+import multiprocessing
+import os
+import signal
+import sys
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+
+from app.config import settings
+from app.logging_config import setup_logging
+
+logger = logging.getLogger("app.settlement_worker")
+
+
+def run_worker(args, settled_total=None):
+    from app.db import SessionLocal
+    from app.settlement import SettlementWorker
+
+    setup_logging(settings.log_level, settings.log_format)
+
+    worker = SettlementWorker(
+        session_factory=SessionLocal,
+        batch_size=args.batch_size,
+        window_seconds=args.window_seconds,
+        poll_interval_seconds=args.poll_interval,
+        report_interval_seconds=args.report_interval,
+    )
+    signal.signal(signal.SIGTERM, lambda *_: worker.stop())
+    try:
+        worker.run(max_batches=args.max_batches, stop_when_idle=args.once)
+    except KeyboardInterrupt:
+        worker.stop()
+    if settled_total is not None:
+        with settled_total.get_lock():
+            settled_total.value += worker.settled
+    return worker.settled
+
+
+def run_workers(args, processes: int) -> int:
+    """Run ``processes`` workers side by side and return how many orders they settled."""
+    # Spawned processes build their own engine and connection pool. Plain
+    # processes rather than a Pool: workers treat SIGTERM as "finish the
+    # current batch and exit", which Pool.terminate() cannot wait out.
+    context = multiprocessing.get_context("spawn")
+    settled_total = context.Value("q", 0)
+    children = [
+        context.Process(target=run_worker, args=(args, settled_total), name=f"settlement-worker-{i}")
+        for i in range(processes)
+    ]
+    for child in children:
+        child.start()
+    try:
+        for child in children:
+            child.join()
+    except KeyboardInterrupt:
+        for child in children:
+            child.terminate()
+        for child in children:
+            child.join()
+    return settled_total.value
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description="Settle due orders in batches. Run several copies (or --processes N) to scale out."
+    )
+    parser.add_argument("--batch-size", type=int, default=settings.settlement_batch_size)
+    parser.add_argument("--window-seconds", type=int, default=settings.transaction_settlement_window)
+    parser.add_argument("--poll-interval", type=float, default=settings.settlement_poll_interval_seconds)
+    parser.add_argument("--report-interval", type=float, default=10.0)
+    parser.add_argument("--processes", type=int, default=1)
+    parser.add_argument("--max-batches", type=int, default=None, help="Exit after this many batch attempts")
+    parser.add_argument("--once", action="store_true", help="Exit when no due orders are left")
+    args = parser.parse_args()
+
+    setup_logging(settings.log_level, settings.log_format)
+    if args.processes == 1:
+        run_worker(args)
+        return
+
+    settled = run_workers(args, args.processes)
+    logger.info("settlement.workers.finished", extra={"processes": args.processes, "settled": settled})
+
+
+if __name__ == "__main__":
+    main()
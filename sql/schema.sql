@@ -3,6 +3,10 @@
 
 CREATE EXTENSION IF NOT EXISTS pgcrypto;
 
+DROP TABLE IF EXISTS outbox_events CASCADE;
+DROP TABLE IF EXISTS refresh_tokens CASCADE;
+DROP TABLE IF EXISTS wallet_transfers CASCADE;
+DROP TABLE IF EXISTS orders_archive CASCADE;
 DROP TABLE IF EXISTS orders CASCADE;
 DROP TABLE IF EXISTS wallets CASCADE;
 DROP TABLE IF EXISTS users CASCADE;
@@ -31,20 +35,86 @@ CREATE TABLE wallets (
 
 CREATE INDEX idx_wallets_updated_at ON wallets(updated_at DESC);
 
-CREATE TABLE orders (
+CREATE TABLE wallet_transfers (
     id UUID PRIMARY KEY DEFAULT gen_random_uuid(),
+    from_customer_id UUID NOT NULL REFERENCES users(id) ON DELETE CASCADE,
+    to_customer_id UUID NOT NULL REFERENCES users(id) ON DELETE CASCADE,
+    -- Wallet currency; BIGINT minor units with MONEY_STORAGE=minor_units.
+    amount NUMERIC(10, 2) NOT NULL,
+    idempotency_key TEXT,
+    created_at TIMESTAMP NOT NULL DEFAULT CURRENT_TIMESTAMP,
+    CONSTRAINT check_transfer_amount_positive CHECK (amount > 0),
+    CONSTRAINT check_transfer_distinct_wallets CHECK (from_customer_id <> to_customer_id),
+    CONSTRAINT uq_transfer_sender_idempotency_key UNIQUE (from_customer_id, idempotency_key)
+);
+
+-- Refresh tokens are stored as SHA-256 hex digests. Rotation marks a token
+-- used and inserts its successor in the same family; reusing a used token
+-- revokes the family.
+CREATE TABLE refresh_tokens (
+    id UUID PRIMARY KEY DEFAULT gen_random_uuid(),
+    user_id UUID NOT NULL REFERENCES users(id) ON DELETE CASCADE,
+    family_id UUID NOT NULL,
+    token_hash VARCHAR(64) NOT NULL UNIQUE,
+    created_at TIMESTAMP NOT NULL DEFAULT CURRENT_TIMESTAMP,
+    expires_at TIMESTAMP NOT NULL,
+    used_at TIMESTAMP,
+    revoked_at TIMESTAMP
+);
+
+CREATE INDEX idx_refresh_tokens_family_id ON refresh_tokens(family_id);
+CREATE INDEX idx_refresh_tokens_revoked_at ON refresh_tokens(revoked_at) WHERE revoked_at IS NOT NULL;
+CREATE INDEX idx_refresh_tokens_expires_at ON refresh_tokens(expires_at);
+
+-- Orders are range-partitioned by month on created_at. Monthly partitions
+-- (orders_YYYY_MM) are created ahead of time and archived by:
+--   python scripts/manage_partitions.py create --months-ahead 3
+--   python scripts/manage_partitions.py archive --retain-months 12
+-- orders_default catches rows outside every monthly range.
+CREATE TABLE orders (
+    id UUID NOT NULL DEFAULT gen_random_uuid(),
     customer_id UUID NOT NULL,
+    -- BIGINT minor units with MONEY_STORAGE=minor_units (scripts/migrate_money.py).
     amount NUMERIC(10, 2) NOT NULL,
     currency VARCHAR(10) NOT NULL,
     idempotency_key TEXT,
     status VARCHAR(50) NOT NULL DEFAULT 'created',
     created_at TIMESTAMP NOT NULL DEFAULT CURRENT_TIMESTAMP,
+    updated_at TIMESTAMP NOT NULL DEFAULT CURRENT_TIMESTAMP,
+    PRIMARY KEY (id, created_at),
     CONSTRAINT fk_order_user
         FOREIGN KEY (customer_id) REFERENCES users(id) ON DELETE CASCADE,
     CONSTRAINT check_order_amount_positive CHECK (amount > 0)
-);
+) PARTITION BY RANGE (created_at);
 
-CREATE INDEX idx_orders_customer_id ON orders(customer_id);
-CREATE INDEX idx_orders_created_at ON orders(created_at DESC);
-CREATE INDEX idx_orders_status ON orders(status);
+-- Current and next three months. scripts/manage_partitions.py create keeps
+-- partitions ahead; there is no default partition unless ORDERS_DEFAULT_PARTITION
+-- is set, so old partitions can be detached CONCURRENTLY.
+DO $$
+DECLARE
+    month timestamp := date_trunc('month', now());
+BEGIN
+    FOR i IN 0..3 LOOP
+        EXECUTE format(
+            'CREATE TABLE %I PARTITION OF orders FOR VALUES FROM (%L) TO (%L)',
+            'orders_' || to_char(month + make_interval(months => i), 'YYYY_MM'),
+            month + make_interval(months => i),
+            month + make_interval(months => i + 1)
+        );
+    END LOOP;
+END $$;
+
+CREATE INDEX idx_orders_customer_created ON orders(customer_id, created_at DESC);
 CREATE INDEX idx_orders_idempotency_key ON orders(idempotency_key);
+-- Due-order lookup for the settlement worker (scripts/settlement_worker.py).
+CREATE INDEX idx_orders_unsettled_created ON orders(created_at) WHERE status IN ('created', 'paid');
+
+-- Transactional outbox: written in the same transaction as the order or
+-- wallet change and drained in id order by scripts/outbox_relay.py.
+CREATE TABLE outbox_events (
+    id BIGSERIAL PRIMARY KEY,
+    event_type VARCHAR(50) NOT NULL,
+    customer_id UUID NOT NULL,
+    payload JSONB NOT NULL,
+    created_at TIMESTAMP NOT NULL DEFAULT CURRENT_TIMESTAMP
+);
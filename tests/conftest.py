@@ -7,10 +7,14 @@ from sqlalchemy.pool import StaticPool
 from fastapi.testclient import TestClient
 
 sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+# Hash at the minimum KDF cost instead of calibrating to a login latency target.
+os.environ.setdefault("PASSWORD_HASH_TARGET_MS", "0")
 
 from app.main import app
 from app.db import get_db
 from app.models import Base
+from app.partitions import ensure_order_partitions
+from app import services
 
 
 @pytest.fixture()
@@ -31,6 +35,27 @@ def client():
             db.close()
 
     app.dependency_overrides[get_db] = override_get_db
+    services.user_cache.clear()
     with TestClient(app) as test_client:
         yield test_client
     app.dependency_overrides.clear()
+
+
+@pytest.fixture()
+def pg_engine():
+    """A PostgreSQL engine on an empty schema; skipped unless TEST_POSTGRES_URL is set.
+
+    The ``public`` schema of that database is dropped and recreated, so point
+    it at a scratch database.
+    """
+    url = os.environ.get("TEST_POSTGRES_URL")
+    if not url:
+        pytest.skip("TEST_POSTGRES_URL is not set")
+    engine = create_engine(url)
+    with engine.begin() as conn:
+        conn.exec_driver_sql("DROP SCHEMA public CASCADE")
+        conn.exec_driver_sql("CREATE SCHEMA public")
+    Base.metadata.create_all(bind=engine)
+    ensure_order_partitions(engine, months_ahead=1)
+    yield engine
+    engine.dispose()
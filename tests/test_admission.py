@@ -0,0 +1,72 @@
+import asyncio
+
+import pytest
+
+from app import admission as admission_module
+from app.admission import AdmissionController, AdmissionRejected, CRITICAL, STANDARD, LOW
+from app.config import settings
+
+
+def make_controller(capacity=2, max_queue=10, timeout=0.05):
+    return AdmissionController(
+        limits={CRITICAL: capacity, STANDARD: capacity, LOW: min(capacity, 1)},
+        timeouts={CRITICAL: timeout, STANDARD: timeout, LOW: timeout},
+        max_queue=max_queue,
+    )
+
+
+def test_low_priority_keeps_headroom_for_higher_classes():
+    async def run():
+        controller = make_controller()
+        await controller.acquire(LOW)
+        with pytest.raises(AdmissionRejected):
+            await controller.acquire(LOW)
+        await controller.acquire(CRITICAL)
+        assert controller.in_flight == 2
+
+    asyncio.run(run())
+
+
+def test_released_slot_goes_to_highest_priority_waiter():
+    async def run():
+        controller = make_controller(capacity=1, timeout=1)
+        await controller.acquire(CRITICAL)
+        order = []
+
+        async def waiter(priority):
+            await controller.acquire(priority)
+            order.append(priority)
+            controller.release()
+
+        tasks = [asyncio.create_task(waiter(STANDARD)), asyncio.create_task(waiter(CRITICAL))]
+        await asyncio.sleep(0)
+        controller.release()
+        await asyncio.gather(*tasks)
+        assert order == [CRITICAL, STANDARD]
+        assert controller.in_flight == 0
+
+    asyncio.run(run())
+
+
+def test_full_queue_sheds_immediately():
+    async def run():
+        controller = make_controller(capacity=1, max_queue=0)
+        await controller.acquire(CRITICAL)
+        with pytest.raises(AdmissionRejected) as exc:
+            await controller.acquire(CRITICAL)
+        assert exc.value.reason == "queue full"
+
+    asyncio.run(run())
+
+
+def test_shed_request_gets_503_with_retry_after(client, monkeypatch):
+    monkeypatch.setattr(settings, "enable_graceful_degradation", True)
+    monkeypatch.setattr(admission_module, "admission_controller", make_controller(capacity=0, max_queue=0))
+
+    response = client.post(
+        "/users/signup",
+        json={"email": "shed@example.com", "full_name": "Shed", "phone": None, "password": "secret123"},
+    )
+    assert response.status_code == 503
+    assert response.headers["retry-after"] == str(settings.admission_retry_after_seconds)
+    assert client.get("/metrics").json()["counters"]["admission.low.shed"] >= 1
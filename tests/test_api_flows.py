@@ -1,3 +1,22 @@
+import asyncio
+import uuid
+from contextlib import contextmanager
+from datetime import datetime
+from decimal import Decimal
+from typing import List
+
+from pydantic import TypeAdapter
+
+from app import services
+from app.cache import CACHE_MISS, UserCache
+from app.db import get_db
+from app.main import app, health_monitor
+from app.models import Order
+from app.schemas import OrderDetail
+from app.serializers import orders_json
+from app.settlement import ORDER_SETTLED, SettlementWorker, can_transition
+
+
 def test_signup_login_and_me_flow(client):
     signup_response = client.post(
         "/users/signup",
@@ -58,8 +77,342 @@ def test_wallet_and_order_flow(client):
     assert orders.status_code == 200
     assert len(orders.json()) == 1
 
+    metrics = client.get("/metrics").json()
+    assert metrics["read_coalescing"]["executions"] >= 1
+
 
 def test_health_endpoint(client):
     health = client.get("/health")
     # In tests, real DB healthcheck points to configured DB, so accept healthy/unhealthy status codes.
     assert health.status_code in (200, 503)
+
+
+def test_health_probes_read_monitor_snapshot(client, monkeypatch):
+    assert client.get("/health/live").json() == {"status": "alive"}
+    ready = client.get("/health/ready")
+    assert ready.status_code in (200, 503)
+
+    monkeypatch.setattr("app.health.db_healthcheck", lambda: False)
+    asyncio.run(health_monitor.probe_once())
+    not_ready = client.get("/health/ready")
+    assert not_ready.status_code == 503
+    assert not_ready.json()["detail"]["database"]["status"] == "down"
+    assert "saturation" in not_ready.json()["detail"]["pool"]
+    assert client.get("/health").status_code == 503
+
+
+def test_signup_after_failed_login_invalidates_negative_cache(client):
+    unknown = client.post(
+        "/users/login",
+        json={"email": "late.user@example.com", "password": "secret123"},
+    )
+    assert unknown.status_code == 400
+
+    signup = client.post(
+        "/users/signup",
+        json={
+            "email": "late.user@example.com",
+            "full_name": "Late User",
+            "phone": None,
+            "password": "secret123",
+        },
+    )
+    assert signup.status_code == 201
+
+    login = client.post(
+        "/users/login",
+        json={"email": "late.user@example.com", "password": "secret123"},
+    )
+    assert login.status_code == 200
+    headers = {"Authorization": f"Bearer {login.json()['access_token']}"}
+
+    for _ in range(2):
+        me = client.get("/users/me", headers=headers)
+        assert me.status_code == 200
+        assert me.json()["id"] == signup.json()["id"]
+    assert services.user_cache.stats()["hits"] >= 1
+
+
+def test_negative_fill_is_dropped_after_concurrent_invalidation():
+    cache = UserCache(max_entries=10, ttl_seconds=60, negative_ttl_seconds=60)
+    version = cache.version()
+    # A signup commits and invalidates while the lookup that found nothing is in flight.
+    cache.invalidate(email="racing.user@example.com")
+    cache.put_missing_email("racing.user@example.com", version)
+    assert cache.get_by_email("racing.user@example.com") is CACHE_MISS
+
+    cache.put_missing_email("racing.user@example.com", cache.version())
+    assert cache.get_by_email("racing.user@example.com") is None
+
+
+def test_record_fill_is_dropped_after_concurrent_invalidation(client, monkeypatch):
+    client.post(
+        "/users/signup",
+        json={
+            "email": "rehash.user@example.com",
+            "full_name": "Rehash User",
+            "phone": None,
+            "password": "secret123",
+        },
+    )
+    db = next(iter(app.dependency_overrides[get_db]()))
+    user_id = services.get_user_by_email(db, "rehash.user@example.com").id
+    services.user_cache.invalidate(user_id=user_id)
+
+    real_version = services.user_cache.version
+
+    def version_then_password_change():
+        # The lookup has taken its version; a password change commits before it reads.
+        version = real_version()
+        stale = services.UserRecord.from_model(db.get(services.User, user_id))
+        services.update_password_hash(db, stale, "changed-hash")
+        return version
+
+    monkeypatch.setattr(services.user_cache, "version", version_then_password_change)
+    assert services.get_user(db, user_id).hashed_password == "changed-hash"
+    monkeypatch.undo()
+    assert services.user_cache.get_by_id(user_id) is CACHE_MISS
+
+    assert services.get_user(db, user_id).hashed_password == "changed-hash"
+    assert services.user_cache.get_by_id(user_id).hashed_password == "changed-hash"
+
+
+def test_conditional_get_on_orders_and_wallet(client):
+    client.post(
+        "/users/signup",
+        json={
+            "email": "poll.user@example.com",
+            "full_name": "Poll User",
+            "phone": None,
+            "password": "secret123",
+        },
+    )
+    login = client.post(
+        "/users/login",
+        json={"email": "poll.user@example.com", "password": "secret123"},
+    )
+    headers = {"Authorization": f"Bearer {login.json()['access_token']}"}
+
+    first = client.get("/orders", headers=headers)
+    etag = first.headers["etag"]
+    assert etag.startswith('W/"')
+    assert first.headers["cache-control"] == "private, no-cache"
+
+    unchanged = client.get("/orders", headers={**headers, "If-None-Match": etag})
+    assert unchanged.status_code == 304
+    assert unchanged.content == b""
+
+    client.post("/orders", headers=headers, json={"amount": 5, "currency": "USD"})
+    changed = client.get("/orders", headers={**headers, "If-None-Match": etag})
+    assert changed.status_code == 200
+    assert len(changed.json()) == 1
+    assert changed.headers["etag"] != etag
+
+    wallet = client.get("/wallet/me", headers=headers)
+    wallet_etag = wallet.headers["etag"]
+    assert client.get("/wallet/me", headers={**headers, "If-None-Match": wallet_etag}).status_code == 304
+    client.post("/wallet/me/credit", headers=headers, json={"amount": 10})
+    assert client.get("/wallet/me", headers={**headers, "If-None-Match": wallet_etag}).status_code == 200
+
+    credit = client.post("/wallet/me/credit", headers=headers, json={"amount": 1})
+    assert credit.headers["cache-control"] == "no-store"
+
+
+def test_list_orders_by_created_at_range(client):
+    client.post(
+        "/users/signup",
+        json={
+            "email": "range.user@example.com",
+            "full_name": "Range User",
+            "phone": None,
+            "password": "secret123",
+        },
+    )
+    login = client.post(
+        "/users/login",
+        json={"email": "range.user@example.com", "password": "secret123"},
+    )
+    headers = {"Authorization": f"Bearer {login.json()['access_token']}"}
+    client.post("/orders", headers=headers, json={"amount": 5, "currency": "USD"})
+
+    in_range = client.get(
+        "/orders",
+        headers=headers,
+        params={"created_from": "2000-01-01T00:00:00Z", "created_to": "2100-01-01T00:00:00Z"},
+    )
+    assert len(in_range.json()) == 1
+    future = client.get("/orders", headers=headers, params={"created_from": "2100-01-01T00:00:00"})
+    assert future.json() == []
+    assert future.headers["etag"] != in_range.headers["etag"]
+
+
+def test_settlement_worker_settles_due_orders(client):
+    client.post(
+        "/users/signup",
+        json={
+            "email": "settle.user@example.com",
+            "full_name": "Settle User",
+            "phone": None,
+            "password": "secret123",
+        },
+    )
+    login = client.post(
+        "/users/login",
+        json={"email": "settle.user@example.com", "password": "secret123"},
+    )
+    headers = {"Authorization": f"Bearer {login.json()['access_token']}"}
+    for i in range(3):
+        client.post("/orders", headers=headers, json={"amount": 5 + i, "currency": "USD"})
+    before = client.get("/orders", headers=headers)
+
+    session_factory = app.dependency_overrides[get_db]
+    worker = SettlementWorker(
+        session_factory=lambda: contextmanager(session_factory)(),
+        batch_size=2,
+        window_seconds=0,
+        poll_interval_seconds=0,
+    )
+    worker.run(stop_when_idle=True)
+    assert worker.settled == 3
+    assert worker.batches == 2
+
+    after = client.get("/orders", headers={**headers, "If-None-Match": before.headers["etag"]})
+    assert after.status_code == 200
+    assert {order["status"] for order in after.json()} == {ORDER_SETTLED}
+    assert can_transition("created", ORDER_SETTLED)
+    assert not can_transition(ORDER_SETTLED, "created")
+
+
+def test_settlement_worker_retries_after_a_failed_batch(client):
+    client.post(
+        "/users/signup",
+        json={"email": "settle.retry@example.com", "full_name": "Settle Retry", "phone": None, "password": "secret123"},
+    )
+    login = client.post("/users/login", json={"email": "settle.retry@example.com", "password": "secret123"})
+    headers = {"Authorization": f"Bearer {login.json()['access_token']}"}
+    client.post("/orders", headers=headers, json={"amount": 5, "currency": "USD"})
+
+    session_factory = app.dependency_overrides[get_db]
+    attempts = []
+
+    def flaky_session():
+        attempts.append(1)
+        if len(attempts) == 1:
+            raise ConnectionError("database went away")
+        return contextmanager(session_factory)()
+
+    worker = SettlementWorker(session_factory=flaky_session, batch_size=10, window_seconds=0, poll_interval_seconds=0)
+    worker.run(stop_when_idle=True)
+    assert len(attempts) == 2
+    assert worker.settled == 1
+    assert [order["status"] for order in client.get("/orders", headers=headers).json()] == [ORDER_SETTLED]
+
+
+def test_settlement_worker_max_batches_stops_on_an_empty_queue(client):
+    session_factory = app.dependency_overrides[get_db]
+    worker = SettlementWorker(
+        session_factory=lambda: contextmanager(session_factory)(),
+        batch_size=10,
+        window_seconds=0,
+        poll_interval_seconds=0,
+    )
+    worker.run(max_batches=1)
+    assert worker.settled == 0
+
+
+def test_list_orders_body_matches_order_detail_encoding(client):
+    client.post(
+        "/users/signup",
+        json={
+            "email": "fast.list@example.com",
+            "full_name": "Fast List",
+            "phone": None,
+            "password": "secret123",
+        },
+    )
+    login = client.post("/users/login", json={"email": "fast.list@example.com", "password": "secret123"})
+    headers = {"Authorization": f"Bearer {login.json()['access_token']}"}
+    client.post("/orders", headers=headers, json={"amount": 12.5, "currency": "USD", "idempotency_key": "fast-1"})
+    client.post("/orders", headers=headers, json={"amount": 7, "currency": "EUR"})
+
+    response = client.get("/orders", headers=headers)
+    assert response.status_code == 200
+    assert response.headers["content-type"] == "application/json"
+    with contextmanager(app.dependency_overrides[get_db])() as db:
+        customer_id = uuid.UUID(client.get("/users/me", headers=headers).json()["id"])
+        orders = db.query(Order).filter(Order.customer_id == customer_id).all()
+    expected = TypeAdapter(List[OrderDetail])
+    assert response.content == expected.dump_json(expected.validate_python(orders, from_attributes=True))
+
+    # Whole seconds, unicode and exponent-free decimals encode the same way too.
+    order_id = uuid.uuid4()
+    row = (str(order_id), Decimal("100.00"), "JPY", "settled", "clé-ü", datetime(2026, 1, 2, 3, 4, 5), None)
+    detail = OrderDetail(
+        id=order_id, customer_id=customer_id, amount=row[1], currency=row[2],
+        status=row[3], idempotency_key=row[4], created_at=row[5],
+    )
+    assert orders_json(customer_id, [row]) == TypeAdapter(List[OrderDetail]).dump_json([detail])
+
+
+def test_wallet_transfer_is_atomic_and_idempotent(client):
+    def sign_up(email):
+        client.post(
+            "/users/signup",
+            json={"email": email, "full_name": "Transfer User", "phone": None, "password": "secret123"},
+        )
+        login = client.post("/users/login", json={"email": email, "password": "secret123"})
+        headers = {"Authorization": f"Bearer {login.json()['access_token']}"}
+        return headers, client.get("/users/me", headers=headers).json()["id"]
+
+    sender, _ = sign_up("sender@example.com")
+    recipient, recipient_id = sign_up("recipient@example.com")
+    client.post("/wallet/me/credit", headers=sender, json={"amount": 50})
+
+    body = {"to_customer_id": recipient_id, "amount": "20.00", "idempotency_key": "transfer-1"}
+    first = client.post("/wallet/me/transfer", headers=sender, json=body)
+    assert first.status_code == 201
+    assert Decimal(first.json()["balance"]) == Decimal("30.00")
+
+    replay = client.post("/wallet/me/transfer", headers=sender, json=body)
+    assert replay.json()["transfer_id"] == first.json()["transfer_id"]
+    assert Decimal(client.get("/wallet/me", headers=recipient).json()["balance"]) == Decimal("20.00")
+
+    overdraw = client.post("/wallet/me/transfer", headers=sender, json={"to_customer_id": recipient_id, "amount": 31})
+    assert overdraw.status_code == 400
+    assert Decimal(client.get("/wallet/me", headers=sender).json()["balance"]) == Decimal("30.00")
+
+    unknown = client.post("/wallet/me/transfer", headers=sender, json={"to_customer_id": str(uuid.uuid4()), "amount": 1})
+    assert unknown.status_code == 404
+
+
+def test_pay_order_from_wallet_in_one_transaction(client):
+    client.post(
+        "/users/signup",
+        json={"email": "payer@example.com", "full_name": "Payer", "phone": None, "password": "secret123"},
+    )
+    login = client.post("/users/login", json={"email": "payer@example.com", "password": "secret123"})
+    headers = {"Authorization": f"Bearer {login.json()['access_token']}"}
+    client.post("/wallet/me/credit", headers=headers, json={"amount": 30})
+
+    paid = client.post(
+        "/orders",
+        headers=headers,
+        json={"amount": 20, "currency": "INR", "pay_from_wallet": True, "idempotency_key": "pay-1"},
+    )
+    assert paid.status_code == 201
+    assert paid.json()["status"] == "paid"
+    replay = client.post(
+        "/orders",
+        headers=headers,
+        json={"amount": 20, "currency": "INR", "pay_from_wallet": True, "idempotency_key": "pay-1"},
+    )
+    assert replay.json()["order_id"] == paid.json()["order_id"]
+
+    short = client.post("/orders", headers=headers, json={"amount": 20, "currency": "INR", "pay_from_wallet": True})
+    assert short.status_code == 400
+    wrong_currency = client.post("/orders", headers=headers, json={"amount": 1, "currency": "USD", "pay_from_wallet": True})
+    assert wrong_currency.status_code == 400
+
+    assert Decimal(client.get("/wallet/me", headers=headers).json()["balance"]) == Decimal("10.00")
+    assert [order["status"] for order in client.get("/orders", headers=headers).json()] == ["paid"]
+    assert can_transition("paid", ORDER_SETTLED)
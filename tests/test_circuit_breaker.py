@@ -0,0 +1,99 @@
+import time
+
+import pytest
+from fastapi import HTTPException
+from sqlalchemy import create_engine, event, text
+from sqlalchemy.exc import OperationalError
+from sqlalchemy.orm import sessionmaker
+
+from app import circuit_breaker
+from app import db as db_module
+from app.circuit_breaker import CLOSED, HALF_OPEN, OPEN, CircuitBreaker
+from app.config import settings
+from app.db import get_db
+from app.main import app
+
+
+def test_breaker_opens_then_probes_and_closes():
+    breaker = CircuitBreaker(failure_threshold=2, cooldown_seconds=0.05, half_open_max_probes=1)
+    breaker.record_failure()
+    breaker.record_success()
+    breaker.record_failure()
+    assert breaker.state == CLOSED
+
+    breaker.record_failure()
+    assert breaker.state == OPEN
+    assert breaker.allow() is False
+
+    time.sleep(0.06)
+    assert breaker.allow() is True
+    assert breaker.state == HALF_OPEN
+    assert breaker.allow() is False
+    breaker.record_failure()
+    assert breaker.state == OPEN
+
+    time.sleep(0.06)
+    assert breaker.allow() is True
+    breaker.record_success()
+    breaker.release_probe()
+    assert breaker.state == CLOSED
+    assert breaker.allow() is None
+
+
+def test_connect_failures_open_circuit_and_requests_fail_fast(monkeypatch, tmp_path):
+    breaker = CircuitBreaker(failure_threshold=2, cooldown_seconds=30, half_open_max_probes=1)
+    monkeypatch.setattr(circuit_breaker, "db_breaker", breaker)
+    engine = create_engine(f"sqlite:///{tmp_path}/missing/app.db")
+    circuit_breaker.install(engine)
+    for _ in range(2):
+        with pytest.raises(OperationalError):
+            with engine.connect() as conn:
+                conn.execute(text("SELECT 1"))
+    assert breaker.state == OPEN
+
+    # Without graceful degradation the breaker only reports its state.
+    monkeypatch.setattr(settings, "enable_graceful_degradation", False)
+    assert circuit_breaker.admit() is False
+    monkeypatch.setattr(settings, "enable_graceful_degradation", True)
+    with pytest.raises(HTTPException) as exc:
+        circuit_breaker.admit()
+    assert exc.value.status_code == 503
+    assert 1 <= int(exc.value.headers["Retry-After"]) <= 30
+
+
+def test_circuit_state_is_reported(client):
+    assert client.get("/metrics").json()["db_circuit"]["state"] == CLOSED
+    assert client.get("/health/ready").json()["circuit_breaker"]["state"] == CLOSED
+
+
+def test_get_db_returns_503_with_retry_after_when_database_is_unreachable(client, monkeypatch, tmp_path):
+    client.post(
+        "/users/signup",
+        json={"email": "breaker.user@example.com", "full_name": "Breaker User", "phone": None, "password": "secret123"},
+    )
+    login = client.post("/users/login", json={"email": "breaker.user@example.com", "password": "secret123"})
+    headers = {"Authorization": f"Bearer {login.json()['access_token']}"}
+
+    breaker = CircuitBreaker(failure_threshold=2, cooldown_seconds=30, half_open_max_probes=1)
+    monkeypatch.setattr(circuit_breaker, "db_breaker", breaker)
+    monkeypatch.setattr(settings, "enable_graceful_degradation", True)
+    unreachable = create_engine(f"sqlite:///{tmp_path}/missing/app.db")
+    circuit_breaker.install(unreachable)
+    connects = []
+    event.listen(unreachable, "handle_error", lambda context: connects.append(1))
+    # Use the real get_db, bound to an engine that cannot connect.
+    app.dependency_overrides.pop(get_db)
+    monkeypatch.setattr(db_module, "SessionLocal", sessionmaker(bind=unreachable))
+
+    for _ in range(2):
+        response = client.get("/wallet/me", headers=headers)
+        assert response.status_code == 503
+        assert response.json()["detail"]["error"] == "database_unavailable"
+        assert "Retry-After" in response.headers
+    assert breaker.state == OPEN
+
+    response = client.get("/wallet/me", headers=headers)
+    assert response.status_code == 503
+    assert response.json()["detail"]["circuit"] == OPEN
+    assert 1 <= int(response.headers["Retry-After"]) <= 30
+    assert len(connects) == 2
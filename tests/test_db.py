@@ -0,0 +1,11 @@
+from app.config import settings
+from app.db import _connect_args
+
+
+def test_prepare_threshold_only_applies_to_psycopg3(monkeypatch):
+    monkeypatch.setattr(settings, "db_prepare_threshold", 2)
+    assert _connect_args("postgresql+psycopg://u@h/db") == {"prepare_threshold": 2}
+    assert _connect_args("postgresql+psycopg2://u@h/db") == {}
+    assert _connect_args("sqlite:///:memory:") == {}
+    monkeypatch.setattr(settings, "db_prepare_threshold", -1)
+    assert _connect_args("postgresql+psycopg://u@h/db") == {"prepare_threshold": None}
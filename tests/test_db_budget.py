@@ -0,0 +1,54 @@
+from sqlalchemy.exc import OperationalError
+
+from app import services
+from app.db_budget import LOCK_TIMEOUT, STATEMENT_TIMEOUT, timeout_reason
+from app.metrics import metrics
+
+
+class FakeDriverError(Exception):
+    def __init__(self, pgcode):
+        super().__init__(f"driver error {pgcode}")
+        self.pgcode = pgcode
+
+
+def _auth_headers(client, email):
+    client.post(
+        "/users/signup",
+        json={"email": email, "full_name": "Budget User", "phone": None, "password": "secret123"},
+    )
+    login = client.post("/users/login", json={"email": email, "password": "secret123"})
+    return {"Authorization": f"Bearer {login.json()['access_token']}"}
+
+
+def test_timeout_reason_recognizes_only_budget_timeouts():
+    assert timeout_reason(OperationalError("SELECT", {}, FakeDriverError("55P03"))) == LOCK_TIMEOUT
+    assert timeout_reason(OperationalError("SELECT", {}, FakeDriverError("57014"))) == STATEMENT_TIMEOUT
+    assert timeout_reason(OperationalError("SELECT", {}, FakeDriverError("40P01"))) is None
+    assert timeout_reason(ValueError("Insufficient balance")) is None
+
+
+def test_budget_timeouts_become_retryable_503(client, monkeypatch):
+    headers = _auth_headers(client, "budget.user@example.com")
+    metrics.reset()
+
+    def locked(*args, **kwargs):
+        raise OperationalError("SELECT ... FOR UPDATE", {}, FakeDriverError("55P03"))
+
+    def slow(*args, **kwargs):
+        raise OperationalError("SELECT ...", {}, FakeDriverError("57014"))
+
+    monkeypatch.setattr(services, "credit_wallet", locked)
+    monkeypatch.setattr(services, "create_order", slow)
+
+    response = client.post("/wallet/me/credit", headers=headers, json={"amount": 5})
+    assert response.status_code == 503
+    assert response.headers["retry-after"] == "1"
+    assert response.json()["detail"] == {"error": "db_timeout", "budget": "wallet_write", "reason": "lock_timeout"}
+
+    response = client.post("/orders", headers=headers, json={"amount": 5, "currency": "USD"})
+    assert response.status_code == 503
+    assert response.json()["detail"]["budget"] == "order_write"
+
+    counters = metrics.snapshot()["counters"]
+    assert counters["db_budget.wallet_write.lock_timeout"] == 1
+    assert counters["db_budget.order_write.statement_timeout"] == 1
@@ -0,0 +1,60 @@
+import base64
+import hashlib
+
+from app.db import get_db
+from app.kdf import PBKDF2, SCRYPT, KdfParams, KdfPolicy, password_policy
+from app.main import app
+from app.models import User
+
+
+def test_calibration_stays_within_bounds():
+    fast = KdfPolicy(PBKDF2, target_ms=10_000, pbkdf2_bounds=(1_000, 20_000), scrypt_bounds=(1_024, 4_096))
+    assert fast.calibrate() == KdfParams(PBKDF2, 20_000)
+    slow = KdfPolicy(SCRYPT, target_ms=0.0001, pbkdf2_bounds=(1_000, 20_000), scrypt_bounds=(1_024, 4_096))
+    assert slow.calibrate() == KdfParams(SCRYPT, 1_024)
+    roomy = KdfPolicy(SCRYPT, target_ms=10_000, pbkdf2_bounds=(1_000, 20_000), scrypt_bounds=(1_024, 4_096))
+    assert roomy.calibrate() == KdfParams(SCRYPT, 4_096)
+
+
+def test_verify_and_rehash_decisions():
+    policy = KdfPolicy(PBKDF2, target_ms=0, pbkdf2_bounds=(1_000, 20_000), scrypt_bounds=(1_024, 4_096))
+    policy.params = KdfParams(PBKDF2, 10_000)
+    salt = b"0123456789abcdef"
+    legacy = "pbkdf2_sha256$1000${}${}".format(
+        base64.b64encode(salt).decode(),
+        base64.b64encode(hashlib.pbkdf2_hmac("sha256", b"secret123", salt, 1_000)).decode(),
+    )
+    assert policy.verify("secret123", legacy)
+    assert not policy.verify("wrong", legacy)
+    assert policy.needs_rehash(legacy)
+    current = policy.hash("secret123")
+    assert policy.verify("secret123", current) and not policy.needs_rehash(current)
+
+    policy.params = KdfParams(PBKDF2, 11_000)
+    assert not policy.needs_rehash(current)
+
+    policy.scheme, policy.params = SCRYPT, KdfParams(SCRYPT, 1_024)
+    assert policy.needs_rehash(current)
+    upgraded = policy.hash("secret123")
+    assert upgraded.startswith("scrypt$1024$8$1$")
+    assert policy.verify("secret123", upgraded) and not policy.needs_rehash(upgraded)
+    assert not policy.verify("secret123", "scrypt$not-a-number$8$1$AA==$AA==")
+
+
+def test_login_upgrades_outdated_hash(client, monkeypatch):
+    client.post(
+        "/users/signup",
+        json={"email": "kdf.user@example.com", "full_name": "Kdf User", "phone": None, "password": "secret123"},
+    )
+    monkeypatch.setattr(password_policy, "scheme", SCRYPT)
+    monkeypatch.setattr(password_policy, "params", KdfParams(SCRYPT, 16_384))
+
+    for _ in range(2):
+        response = client.post("/users/login", json={"email": "kdf.user@example.com", "password": "secret123"})
+        assert response.status_code == 200
+
+    db = next(app.dependency_overrides[get_db]())
+    stored = db.query(User).filter(User.email == "kdf.user@example.com").one().hashed_password
+    db.close()
+    assert stored.startswith("scrypt$16384$")
+    assert client.post("/users/login", json={"email": "kdf.user@example.com", "password": "nope"}).status_code == 400
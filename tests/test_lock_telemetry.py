@@ -0,0 +1,44 @@
+from app.config import settings
+from app.lock_telemetry import SpaceSaving, wallet_locks
+
+
+def test_space_saving_keeps_heavy_hitters_within_capacity():
+    sketch = SpaceSaving(capacity=5)
+    for key in ["hot"] * 50 + ["warm"] * 20 + [f"cold-{i}" for i in range(30)]:
+        sketch.add(key, 0.001, 0.002)
+
+    top = sketch.top(2)
+    assert [entry["customer_id"] for entry in top] == ["hot", "warm"]
+    assert top[0]["count"] == 50 and top[0]["error"] == 0
+    assert top[0]["avg_wait_ms"] == 1.0
+    assert len(sketch.top(10)) == 5
+    assert sketch.total == 100
+
+
+def test_wallet_lock_report_requires_admin_key(client, monkeypatch):
+    client.post(
+        "/users/signup",
+        json={"email": "lock.user@example.com", "full_name": "Lock User", "phone": None, "password": "secret123"},
+    )
+    login = client.post("/users/login", json={"email": "lock.user@example.com", "password": "secret123"})
+    headers = {"Authorization": f"Bearer {login.json()['access_token']}"}
+    me = client.get("/users/me", headers=headers).json()
+    wallet_locks.reset()
+    client.post("/wallet/me/credit", headers=headers, json={"amount": 10})
+    client.post("/wallet/me/debit", headers=headers, json={"amount": 3})
+    client.post("/wallet/me/debit", headers=headers, json={"amount": 100})
+
+    assert client.get("/admin/wallet-locks").status_code == 404
+    monkeypatch.setattr(settings, "admin_api_key", "admin-secret")
+    assert client.get("/admin/wallet-locks", headers={"X-Admin-Key": "wrong"}).status_code == 401
+
+    report = client.get("/admin/wallet-locks", headers={"X-Admin-Key": "admin-secret"}).json()
+    assert report["locks"] == 3
+    assert report["hottest"][0]["customer_id"] == me["id"]
+    assert report["hottest"][0]["count"] == 3
+    assert report["wait_ms"]["p50"] is not None
+
+    exported = client.get("/metrics").json()["wallet_locks"]
+    assert exported["locks"] == 3
+    assert "hottest" not in exported
+    assert me["id"] not in client.get("/metrics").text
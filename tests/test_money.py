@@ -0,0 +1,97 @@
+import os
+import subprocess
+import sys
+from decimal import Decimal
+import pytest
+from app.money import exponent, from_minor, to_minor
+
+
+def test_minor_unit_conversion_uses_currency_exponent():
+    assert exponent("USD") == 2
+    assert exponent("JPY") == 0
+    assert exponent("KWD") == 3
+    assert to_minor(Decimal("12.34"), "USD") == 1234
+    assert to_minor(Decimal("12.5"), "USD") == 1250
+    assert to_minor(Decimal("500"), "JPY") == 500
+    assert to_minor(Decimal("1.234"), "KWD") == 1234
+    assert from_minor(1250, "USD") == Decimal("12.50")
+    assert str(from_minor(1250, "USD")) == "12.50"
+    assert from_minor(500, "JPY") == Decimal("500")
+    # Beyond the old NUMERIC(10, 2) ceiling of 99,999,999.99.
+    assert from_minor(to_minor(Decimal("123456789012.34"), "USD"), "USD") == Decimal("123456789012.34")
+
+
+def test_minor_unit_conversion_refuses_to_round():
+    with pytest.raises(ValueError):
+        to_minor(Decimal("10.5"), "JPY")
+    with pytest.raises(ValueError):
+        to_minor(Decimal("0.001"), "USD")
+
+
+# Column types follow MONEY_STORAGE at import time, so this runs in a fresh interpreter.
+MINOR_UNITS_ROUND_TRIP = """
+import os
+from decimal import Decimal
+from fastapi.testclient import TestClient
+from sqlalchemy import create_engine, select
+from sqlalchemy.orm import sessionmaker
+from sqlalchemy.pool import StaticPool
+from app.db import get_db
+from app.main import app
+from app.models import Base, Order, Wallet, WalletTransfer
+
+engine = create_engine("sqlite+pysqlite:///:memory:", connect_args={"check_same_thread": False}, poolclass=StaticPool)
+Base.metadata.create_all(bind=engine)
+Session = sessionmaker(bind=engine)
+
+
+def override_get_db():
+    with Session() as db:
+        yield db
+
+
+app.dependency_overrides[get_db] = override_get_db
+
+
+def signup(client, email):
+    client.post("/users/signup", json={"email": email, "full_name": "Minor Units", "phone": None, "password": "secret123"})
+    login = client.post("/users/login", json={"email": email, "password": "secret123"})
+    headers = {"Authorization": f"Bearer {login.json()['access_token']}"}
+    return headers, client.get("/users/me", headers=headers).json()["id"]
+
+
+with TestClient(app) as client:
+    sender, _ = signup(client, "minor.sender@example.com")
+    _, recipient_id = signup(client, "minor.recipient@example.com")
+
+    order = client.post("/orders", headers=sender, json={"amount": "123456789012.34", "currency": "USD"})
+    assert order.status_code == 201, order.text
+    yen = client.post("/orders", headers=sender, json={"amount": "500", "currency": "JPY"})
+    assert client.post("/orders", headers=sender, json={"amount": "0.5", "currency": "JPY"}).status_code == 422
+    assert yen.status_code == 201, yen.text
+    listed = {Decimal(row["amount"]) for row in client.get("/orders", headers=sender).json()}
+    assert listed == {Decimal("123456789012.34"), Decimal("500")}
+
+    assert Decimal(client.post("/wallet/me/credit", headers=sender, json={"amount": "100.25"}).json()["balance"]) == Decimal("100.25")
+    transfer = client.post(
+        "/wallet/me/transfer", headers=sender, json={"amount": "40.10", "to_customer_id": recipient_id}
+    )
+    assert transfer.status_code == 201, transfer.text
+    assert Decimal(transfer.json()["amount"]) == Decimal("40.10")
+    assert Decimal(transfer.json()["balance"]) == Decimal("60.15")
+    assert Decimal(client.get("/wallet/me", headers=sender).json()["balance"]) == Decimal("60.15")
+
+with Session() as db:
+    assert sorted(db.scalars(select(Order.amount))) == [500, 12345678901234]
+    assert sorted(db.scalars(select(Wallet.balance))) == [4010, 6015]
+    assert list(db.scalars(select(WalletTransfer.amount))) == [4010]
+"""
+
+
+def test_minor_units_storage_round_trips_orders_wallets_and_transfers():
+    env = {**os.environ, "MONEY_STORAGE": "minor_units", "PASSWORD_HASH_TARGET_MS": "0"}
+    root = os.path.abspath(os.path.join(os.path.dirname(__file__), ".."))
+    result = subprocess.run(
+        [sys.executable, "-c", MINOR_UNITS_ROUND_TRIP], cwd=root, env=env, capture_output=True, text=True
+    )
+    assert result.returncode == 0, result.stderr
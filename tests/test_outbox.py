@@ -0,0 +1,153 @@
+import json
+import threading
+from contextlib import contextmanager
+from decimal import Decimal
+from uuid import uuid4
+import pytest
+from sqlalchemy.orm import sessionmaker
+from app import services
+from app.db import get_db
+from app.main import app
+from app.models import OutboxEvent, User
+from app.outbox import ORDER_CREATED, WALLET_CHANGED, NdjsonFileSink, OutboxRelay, OutboxSink
+from app.schemas import OrderCreate
+
+
+class FailingSink(OutboxSink):
+    def publish(self, events):
+        raise ConnectionError("sink unavailable")
+
+
+class RecordingSink(OutboxSink):
+    def __init__(self):
+        self.events = []
+
+    def publish(self, events):
+        self.events.extend(events)
+
+
+def _auth_headers(client, email):
+    client.post(
+        "/users/signup",
+        json={"email": email, "full_name": "Outbox User", "phone": None, "password": "secret123"},
+    )
+    login = client.post("/users/login", json={"email": email, "password": "secret123"})
+    return {"Authorization": f"Bearer {login.json()['access_token']}"}
+
+
+def _relay(sink, batch_size=2):
+    session_factory = app.dependency_overrides[get_db]
+    return OutboxRelay(
+        session_factory=lambda: contextmanager(session_factory)(),
+        sink=sink,
+        batch_size=batch_size,
+        poll_interval_seconds=0,
+    )
+
+
+def _pending():
+    with contextmanager(app.dependency_overrides[get_db])() as db:
+        return db.query(OutboxEvent).count()
+
+
+def test_outbox_relay_publishes_in_order_and_deletes(client, tmp_path):
+    headers = _auth_headers(client, "outbox.user@example.com")
+    client.post("/orders", headers=headers, json={"amount": 12.5, "currency": "USD"})
+    client.post("/wallet/me/credit", headers=headers, json={"amount": 100})
+    client.post("/wallet/me/debit", headers=headers, json={"amount": 40})
+    # A rejected debit rolls back, so it leaves no event behind.
+    assert client.post("/wallet/me/debit", headers=headers, json={"amount": 1000}).status_code == 400
+    assert _pending() == 3
+
+    path = tmp_path / "events.ndjson"
+    sink = NdjsonFileSink(str(path))
+    relay = _relay(sink)
+    relay.run(stop_when_idle=True)
+    sink.close()
+
+    events = [json.loads(line) for line in path.read_text().splitlines()]
+    assert [event["type"] for event in events] == [ORDER_CREATED, WALLET_CHANGED, WALLET_CHANGED]
+    assert [event["id"] for event in events] == sorted(event["id"] for event in events)
+    assert Decimal(events[0]["payload"]["amount"]) == Decimal("12.5")
+    assert [Decimal(event["payload"]["balance"]) for event in events[1:]] == [100, 60]
+    assert relay.published == 3
+    assert relay.batches == 2
+    assert _pending() == 0
+
+
+def test_outbox_relay_keeps_events_when_sink_fails(client):
+    headers = _auth_headers(client, "outbox.fail@example.com")
+    client.post("/wallet/me/credit", headers=headers, json={"amount": 10})
+
+    relay = _relay(FailingSink())
+    with pytest.raises(ConnectionError):
+        relay.relay_once()
+    assert relay.failures == 1
+    assert _pending() == 1
+
+
+def test_outbox_relay_publishes_in_id_order(client):
+    customer_id = uuid4()
+    with contextmanager(app.dependency_overrides[get_db])() as db:
+        # Inserted and committed out of id order; the relay still reads by id.
+        for event_id in (50, 10):
+            db.add(OutboxEvent(id=event_id, event_type=WALLET_CHANGED, customer_id=customer_id, payload={}))
+            db.commit()
+
+    sink = RecordingSink()
+    _relay(sink, batch_size=10).run(stop_when_idle=True)
+    assert [event["id"] for event in sink.events] == [10, 50]
+
+
+def test_concurrent_orders_for_one_customer_publish_in_commit_order(pg_engine, monkeypatch):
+    Session = sessionmaker(bind=pg_engine)
+    customer_id = uuid4()
+    with Session() as db:
+        db.add(User(id=customer_id, email="outbox.order@example.com", full_name="Outbox", hashed_password="x"))
+        db.commit()
+
+    first_recorded, release_first = threading.Event(), threading.Event()
+    record_event = services.record_event
+
+    def record_and_hold(db, event_type, event_customer_id, payload):
+        record_event(db, event_type, event_customer_id, payload)
+        if threading.current_thread().name == "first":
+            first_recorded.set()
+            release_first.wait(5)
+
+    monkeypatch.setattr(services, "record_event", record_and_hold)
+
+    def create(amount):
+        with Session() as db:
+            services.create_order(db, OrderCreate(amount=amount, currency="USD"), customer_id)
+
+    first = threading.Thread(target=create, args=(1,), name="first")
+    second = threading.Thread(target=create, args=(2,), name="second")
+    first.start()
+    assert first_recorded.wait(5)
+    second.start()
+    # The second order waits for the first one's per-customer lock instead of committing ahead of it.
+    second.join(0.5)
+    assert second.is_alive()
+    release_first.set()
+    first.join(5)
+    second.join(5)
+
+    sink = RecordingSink()
+    relay = OutboxRelay(Session, sink=sink, batch_size=10, poll_interval_seconds=0)
+    relay.run(stop_when_idle=True)
+    assert [Decimal(event["payload"]["amount"]) for event in sink.events] == [1, 2]
+
+
+def test_sink_without_publish_fails_when_built():
+    class IncompleteSink(OutboxSink):
+        pass
+
+    with pytest.raises(TypeError):
+        IncompleteSink()
+
+
+def test_outbox_relay_max_batches_stops_on_an_empty_outbox(client):
+    relay = _relay(RecordingSink())
+    relay.run(max_batches=1)
+    assert relay.published == 0
@@ -0,0 +1,97 @@
+import uuid
+from datetime import date, datetime
+
+from sqlalchemy import inspect, text
+
+from app.partitions import (
+    ARCHIVE_TABLE,
+    DEFAULT_PARTITION,
+    add_months,
+    archive_order_partitions,
+    ensure_order_partitions,
+    list_order_partitions,
+    month_start,
+    partition_month,
+    partition_name,
+)
+
+TODAY = date(2026, 5, 15)
+
+
+def test_month_arithmetic_crosses_year_boundaries():
+    assert month_start(date(2026, 3, 31)) == date(2026, 3, 1)
+    assert add_months(date(2026, 11, 1), 2) == date(2027, 1, 1)
+    assert add_months(date(2026, 1, 1), -1) == date(2025, 12, 1)
+    assert add_months(date(2026, 1, 1), -13) == date(2024, 12, 1)
+
+
+def test_partition_names_round_trip():
+    assert partition_name(date(2026, 2, 1)) == "orders_2026_02"
+    for month in (date(2025, 12, 1), date(2026, 1, 1), date(2026, 10, 1)):
+        assert partition_month(partition_name(month)) == month
+    for other in ("orders_default", "orders_archive", "orders_2026_2", "orders_2026_02_old", "wallets"):
+        assert partition_month(other) is None
+
+
+def _add_orders(engine, *created_at: datetime) -> uuid.UUID:
+    customer_id = uuid.uuid4()
+    with engine.begin() as conn:
+        conn.execute(
+            text("INSERT INTO users (id, email, full_name, hashed_password) VALUES (:id, :email, 'Partition', 'x')"),
+            {"id": customer_id, "email": f"{customer_id}@example.com"},
+        )
+        for moment in created_at:
+            conn.execute(
+                text(
+                    "INSERT INTO orders (id, customer_id, amount, currency, status, created_at, updated_at) "
+                    "VALUES (:id, :customer_id, 5, 'USD', 'settled', :created_at, :created_at)"
+                ),
+                {"id": uuid.uuid4(), "customer_id": customer_id, "created_at": moment},
+            )
+    return customer_id
+
+
+def _months(engine) -> dict:
+    with engine.connect() as conn:
+        return list_order_partitions(conn)
+
+
+def _count(engine, table: str) -> int:
+    with engine.connect() as conn:
+        return conn.execute(text(f"SELECT count(*) FROM {table}")).scalar()
+
+
+def test_archive_retires_default_partition_and_moves_old_months(pg_engine):
+    created = ensure_order_partitions(pg_engine, months_ahead=0, months_back=2, today=TODAY, default_partition=True)
+    assert created == ["orders_2026_03", "orders_2026_04", "orders_2026_05"]
+    # December has no partition, so its order lands in orders_default.
+    _add_orders(pg_engine, datetime(2025, 12, 20), datetime(2026, 3, 2), datetime(2026, 5, 10))
+    assert _count(pg_engine, DEFAULT_PARTITION) == 1
+
+    archived = archive_order_partitions(pg_engine, retain_months=1, max_partitions=5, batch_size=1, today=TODAY)
+
+    assert archived == ["orders_2025_12", "orders_2026_03"]
+    months = _months(pg_engine)
+    assert DEFAULT_PARTITION not in months
+    assert "orders_2026_04" in months and "orders_2026_03" not in months
+    assert not inspect(pg_engine).has_table(DEFAULT_PARTITION)
+    assert _count(pg_engine, ARCHIVE_TABLE) == 2
+    assert _count(pg_engine, "orders") == 1
+    # Without a default partition, later runs create no new one.
+    ensure_order_partitions(pg_engine, months_ahead=1, today=TODAY)
+    assert DEFAULT_PARTITION not in _months(pg_engine)
+
+
+def test_archive_detach_keeps_default_partition_when_asked(pg_engine):
+    ensure_order_partitions(pg_engine, months_ahead=0, months_back=2, today=TODAY, default_partition=True)
+    _add_orders(pg_engine, datetime(2026, 3, 2))
+
+    archived = archive_order_partitions(
+        pg_engine, retain_months=1, mode="detach", max_partitions=5, today=TODAY, keep_default=True
+    )
+
+    assert archived == ["orders_2026_03"]
+    months = _months(pg_engine)
+    assert DEFAULT_PARTITION in months and "orders_2026_03" not in months
+    assert _count(pg_engine, "orders_2026_03") == 1
+    assert not inspect(pg_engine).has_table(ARCHIVE_TABLE)
@@ -0,0 +1,24 @@
+import json
+
+from app.query_capture import QueryCapture
+
+
+def test_capture_records_each_statement_once_for_postgres(client, tmp_path):
+    path = tmp_path / "queries.jsonl"
+    capture = QueryCapture(str(path))
+    capture.install()
+    try:
+        for _ in range(2):
+            client.post(
+                "/users/signup",
+                json={"email": "capture.user@example.com", "full_name": "Capture", "phone": None, "password": "secret123"},
+            )
+    finally:
+        capture.uninstall()
+
+    records = [json.loads(line) for line in path.read_text().splitlines()]
+    statements = [record["sql"] for record in records]
+    assert len(statements) == len(set(statements))
+    insert = next(record for record in records if record["sql"].startswith("INSERT INTO users"))
+    assert "%(email)s" in insert["sql"]
+    assert insert["params"]["id"] is not None
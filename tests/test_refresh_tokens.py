@@ -0,0 +1,93 @@
+from contextlib import contextmanager
+from datetime import timedelta
+
+from jose import jwt
+
+from app import services
+from app.auth import ALGORITHM, SECRET_KEY
+from app.db import get_db
+from app.main import app
+from app.metrics import metrics
+from app.models import RefreshToken, utcnow_naive
+from app.revocation import RevokedSessions
+
+
+def _login(client, email):
+    client.post(
+        "/users/signup",
+        json={"email": email, "full_name": "Refresh User", "phone": None, "password": "secret123"},
+    )
+    response = client.post("/users/login", json={"email": email, "password": "secret123"})
+    assert response.status_code == 200
+    return response.json()
+
+
+def _me(client, access_token):
+    return client.get("/users/me", headers={"Authorization": f"Bearer {access_token}"})
+
+
+def test_refresh_rotates_without_password_verify(client):
+    tokens = _login(client, "rotate.user@example.com")
+    metrics.reset()
+
+    response = client.post("/users/token/refresh", json={"refresh_token": tokens["refresh_token"]})
+    assert response.status_code == 200
+    rotated = response.json()
+    assert rotated["refresh_token"] != tokens["refresh_token"]
+    assert _me(client, rotated["access_token"]).status_code == 200
+
+    claims = [jwt.decode(t["access_token"], SECRET_KEY, algorithms=[ALGORITHM]) for t in (tokens, rotated)]
+    assert claims[0]["sid"] == claims[1]["sid"]
+    counters = metrics.snapshot()["counters"]
+    assert counters["auth.refresh.rotated"] == 1
+    assert "kdf.verify" not in counters
+
+
+def test_reused_refresh_token_revokes_the_session(client):
+    tokens = _login(client, "reuse.user@example.com")
+    rotated = client.post("/users/token/refresh", json={"refresh_token": tokens["refresh_token"]}).json()
+
+    replay = client.post("/users/token/refresh", json={"refresh_token": tokens["refresh_token"]})
+    assert replay.status_code == 401
+    assert client.post("/users/token/refresh", json={"refresh_token": rotated["refresh_token"]}).status_code == 401
+    response = _me(client, rotated["access_token"])
+    assert response.status_code == 401
+    assert response.json()["detail"] == "Session revoked"
+
+    # Another process learns about the revocation from the table.
+    session_id = jwt.decode(rotated["access_token"], SECRET_KEY, algorithms=[ALGORITHM])["sid"]
+    other_process = RevokedSessions(ttl_seconds=1800, poll_seconds=10)
+    other_process.reload(contextmanager(app.dependency_overrides[get_db]))
+    assert other_process.is_revoked(session_id)
+
+    fresh = _login(client, "reuse.user@example.com")
+    assert _me(client, fresh["access_token"]).status_code == 200
+
+
+def test_logout_ends_session(client):
+    tokens = _login(client, "logout.user@example.com")
+    assert client.post("/users/logout", json={"refresh_token": tokens["refresh_token"]}).status_code == 204
+    assert _me(client, tokens["access_token"]).status_code == 401
+    assert client.post("/users/token/refresh", json={"refresh_token": tokens["refresh_token"]}).status_code == 401
+    assert client.post("/users/logout", json={"refresh_token": "unknown"}).status_code == 401
+
+
+def test_purge_keeps_tokens_until_the_access_token_ttl_has_passed(client):
+    _login(client, "purge.user@example.com")
+    for _ in range(3):
+        client.post("/users/login", json={"email": "purge.user@example.com", "password": "secret123"})
+    now = utcnow_naive()
+    with contextmanager(app.dependency_overrides[get_db])() as db:
+        tokens = db.query(RefreshToken).order_by(RefreshToken.created_at).all()
+        assert len(tokens) == 4
+        tokens[0].expires_at = now - timedelta(days=1)
+        tokens[1].expires_at = now - timedelta(days=2)
+        # Expired, but an access token from this session may still be live.
+        tokens[2].expires_at = now - timedelta(minutes=1)
+        db.commit()
+        kept = {tokens[2].id, tokens[3].id}
+
+        assert services.purge_expired_refresh_tokens(db, batch_size=1) == 1
+        assert services.purge_expired_refresh_tokens(db, batch_size=1) == 1
+        assert services.purge_expired_refresh_tokens(db, batch_size=1) == 0
+        assert {token.id for token in db.query(RefreshToken)} == kept
@@ -0,0 +1,67 @@
+import importlib.util
+import os
+import uuid
+from datetime import date, datetime
+from decimal import Decimal
+
+from sqlalchemy import create_engine, text
+from sqlalchemy.orm import Session
+
+from app.models import Base, Order
+
+SCRIPT = os.path.join(os.path.dirname(__file__), "..", "scripts", "report_daily.py")
+spec = importlib.util.spec_from_file_location("report_daily", SCRIPT)
+report_daily = importlib.util.module_from_spec(spec)
+spec.loader.exec_module(report_daily)
+
+
+def test_columnar_aggregator_and_output_rows():
+    SUM, MIN, MAX = report_daily.SUM, report_daily.MIN, report_daily.MAX
+    totals = report_daily.ColumnarAggregator(
+        ("customer_id", "currency"), {"orders": SUM, "amount": SUM, "min_amount": MIN, "max_amount": MAX}
+    )
+    for key, units in ((("a", "USD"), 1250), (("b", "JPY"), 500), (("a", "USD"), 75), (("a", "USD"), 3000)):
+        totals.add(key, (1, units, units, units))
+
+    assert len(totals) == 2
+    assert list(totals.rows()) == [("a", "USD", 3, 4325, 75, 3000), ("b", "JPY", 1, 500, 500, 500)]
+    rows = list(
+        report_daily.output_rows(totals, date(2026, 3, 1), {"amount", "min_amount", "max_amount"}, lambda row: row[1])
+    )
+    assert rows == [
+        ["2026-03-01", "a", "USD", 3, "43.25", "0.75", "30.00"],
+        ["2026-03-01", "b", "JPY", 1, "500", "500", "500"],
+    ]
+
+
+def test_aggregate_orders_reads_archived_days(tmp_path):
+    engine = create_engine(f"sqlite:///{tmp_path / 'report.db'}")
+    Base.metadata.create_all(engine)
+    customer_id = uuid.uuid4()
+    with Session(engine) as db:
+        for amount, hour in ((Decimal("10.00"), 9), (Decimal("2.50"), 18)):
+            db.add(
+                Order(
+                    id=uuid.uuid4(),
+                    customer_id=customer_id,
+                    amount=amount,
+                    currency="USD",
+                    status="settled",
+                    created_at=datetime(2026, 1, 5, hour),
+                )
+            )
+        db.commit()
+    assert report_daily.archived_until(engine) is None
+
+    with engine.begin() as conn:
+        conn.execute(text("CREATE TABLE orders_archive AS SELECT * FROM orders"))
+        conn.execute(text("DELETE FROM orders WHERE amount = 10"))
+        conn.execute(text("DELETE FROM orders_archive WHERE amount <> 10"))
+    assert report_daily.archived_until(engine) == date(2026, 1, 5)
+
+    _, rows = report_daily.aggregate_orders(engine, date(2026, 1, 5), chunk_size=1)
+    assert rows == 1
+    totals, rows = report_daily.aggregate_orders(engine, date(2026, 1, 5), chunk_size=1, archived=True)
+    assert rows == 2
+    [(_, currency, orders, settled, amount, low, high)] = totals.rows()
+    assert (currency, orders, settled, amount, low, high) == ("USD", 2, 2, 1250, 250, 1000)
@@ -0,0 +1,107 @@
+import asyncio
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+import pytest
+
+from app.singleflight import SingleFlight
+
+
+def test_concurrent_thread_calls_share_one_execution():
+    flight = SingleFlight("test")
+    executions = []
+    release = threading.Event()
+
+    def slow_read():
+        executions.append(1)
+        release.wait(timeout=5)
+        return ["row"]
+
+    with ThreadPoolExecutor(max_workers=8) as pool:
+        futures = [pool.submit(flight.do, "orders:1", slow_read) for _ in range(8)]
+        deadline = time.monotonic() + 5
+        while flight.stats()["coalesced"] < 7 and time.monotonic() < deadline:
+            time.sleep(0.01)
+        release.set()
+        results = [f.result() for f in futures]
+
+    assert len(executions) == 1
+    assert all(result is results[0] for result in results)
+    assert flight.stats() == {"in_flight": 0, "executions": 1, "coalesced": 7}
+
+
+def test_async_calls_share_result_and_errors():
+    flight = SingleFlight("test")
+    executions = []
+
+    async def read():
+        executions.append(1)
+        await asyncio.sleep(0.01)
+        return 42
+
+    async def failing():
+        await asyncio.sleep(0.01)
+        raise RuntimeError("db down")
+
+    async def run():
+        results = await asyncio.gather(*(flight.do_async("wallet:1", read) for _ in range(5)))
+        assert results == [42] * 5
+        errors = await asyncio.gather(
+            *(flight.do_async("wallet:2", failing) for _ in range(3)),
+            return_exceptions=True,
+        )
+        assert all(isinstance(error, RuntimeError) for error in errors)
+
+    asyncio.run(run())
+    assert len(executions) == 1
+    assert flight.stats()["coalesced"] == 6
+
+
+def test_cancelled_leader_does_not_cancel_followers():
+    flight = SingleFlight("test")
+    executions = []
+
+    async def read():
+        executions.append(1)
+        await asyncio.sleep(0.05)
+        return 42
+
+    async def run():
+        leader = asyncio.create_task(flight.do_async("wallet:1", read))
+        await asyncio.sleep(0)
+        follower = asyncio.create_task(flight.do_async("wallet:1", read))
+        await asyncio.sleep(0)
+        leader.cancel()
+        assert await follower == 42
+        assert leader.cancelled()
+
+    asyncio.run(run())
+    assert len(executions) == 1
+    assert flight.stats() == {"in_flight": 0, "executions": 1, "coalesced": 1}
+
+
+def test_forget_starts_a_new_flight():
+    flight = SingleFlight("test")
+    started = threading.Event()
+    release = threading.Event()
+
+    def stale_read():
+        started.set()
+        release.wait(timeout=5)
+        return "stale"
+
+    with ThreadPoolExecutor(max_workers=1) as pool:
+        leader = pool.submit(flight.do, "wallet:1", stale_read)
+        assert started.wait(timeout=5)
+        flight.forget("wallet:1")
+        assert flight.do("wallet:1", lambda: "fresh") == "fresh"
+        release.set()
+        assert leader.result() == "stale"
+
+    def broken_read():
+        raise ValueError("boom")
+
+    with pytest.raises(ValueError):
+        flight.do("wallet:1", broken_read)
+    assert flight.stats()["in_flight"] == 0
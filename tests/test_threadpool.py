@@ -0,0 +1,79 @@
+import asyncio
+import logging
+import time
+from functools import partial
+
+import anyio
+import anyio.to_thread
+
+from app.config import settings
+from app.metrics import metrics
+from app.threadpool import LoopStallWatchdog, ThreadPoolTelemetry, configure_worker_threads
+
+
+def test_worker_threads_default_to_db_pool_and_warn_when_larger(monkeypatch, caplog):
+    monkeypatch.setattr(logging.getLogger("app"), "propagate", True)
+
+    async def configure():
+        limiter = configure_worker_threads()
+        return limiter.total_tokens
+
+    assert anyio.run(configure) == settings.db_pool_size + settings.db_max_overflow
+
+    monkeypatch.setattr(settings, "worker_threads", settings.db_pool_size + settings.db_max_overflow + 1)
+    caplog.clear()
+    with caplog.at_level(logging.WARNING, logger="app.threadpool"):
+        assert anyio.run(configure) == settings.worker_threads
+    assert [record.message for record in caplog.records] == ["threadpool.exceeds_db_pool"]
+
+
+def test_metrics_report_thread_occupancy_and_probe_waits(client):
+    deadline = time.monotonic() + 2
+    while metrics.snapshot()["threadpool"]["probes"] == 0 and time.monotonic() < deadline:
+        client.get("/")
+        time.sleep(0.02)
+
+    report = metrics.snapshot()["threadpool"]
+    assert report["probes"] >= 1
+    assert report["total_tokens"] == settings.db_pool_size + settings.db_max_overflow
+    assert report["wait_ms"]["p50"] is not None
+    assert anyio.to_thread.run_sync.__module__ == "anyio.to_thread"
+
+
+def test_probe_measures_queue_wait_on_a_saturated_limiter():
+    async def saturate():
+        limiter = anyio.CapacityLimiter(1)
+        telemetry = ThreadPoolTelemetry(sample_size=16, interval_seconds=0.01)
+        async with anyio.create_task_group() as group:
+            group.start_soon(partial(anyio.to_thread.run_sync, time.sleep, 0.3, limiter=limiter))
+            await anyio.sleep(0.05)
+            await telemetry.start(limiter)
+            await anyio.sleep(0.4)
+        await telemetry.stop()
+        return telemetry.report()
+
+    report = asyncio.run(saturate())
+    assert report["wait_ms"]["max"] >= 200
+    assert report["borrowed"] == 0 and report["waiting"] == 0
+
+
+def test_watchdog_logs_stall_with_loop_stack(monkeypatch, caplog):
+    monkeypatch.setattr(logging.getLogger("app"), "propagate", True)
+
+    def block_the_loop():
+        time.sleep(0.3)
+
+    async def stall():
+        watchdog = LoopStallWatchdog(threshold_ms=100, interval_seconds=0.02)
+        await watchdog.start()
+        await asyncio.sleep(0.05)
+        block_the_loop()
+        await asyncio.sleep(0.05)
+        await watchdog.stop()
+
+    with caplog.at_level(logging.WARNING, logger="app.threadpool"):
+        asyncio.run(stall())
+
+    stalls = [record for record in caplog.records if record.message == "event_loop.stalled"]
+    assert len(stalls) == 1
+    assert "block_the_loop" in stalls[0].stack
@@ -0,0 +1,75 @@
+from app.config import settings
+from app.metrics import metrics
+from app.tracing import trace_buffer, tracer
+
+
+def _auth_headers(client, email):
+    client.post(
+        "/users/signup",
+        json={"email": email, "full_name": "Trace User", "phone": None, "password": "secret123"},
+    )
+    login = client.post("/users/login", json={"email": email, "password": "secret123"})
+    return {"Authorization": f"Bearer {login.json()['access_token']}"}
+
+
+def _spans(export):
+    return export["resourceSpans"][0]["scopeSpans"][0]["spans"]
+
+
+def test_sampled_request_exports_nested_spans(client, monkeypatch):
+    headers = _auth_headers(client, "trace.user@example.com")
+    monkeypatch.setattr(tracer, "enabled", True)
+    monkeypatch.setattr(tracer, "sample_rate", 1.0)
+    monkeypatch.setattr(settings, "admin_api_key", "admin-secret")
+    trace_buffer.clear()
+    trace_id = "4bf92f3577b34da6a3ce929d0e0e4736"
+
+    response = client.post(
+        "/wallet/me/credit",
+        headers={**headers, "traceparent": f"00-{trace_id}-00f067aa0ba902b7-01"},
+        json={"amount": 10},
+    )
+    assert response.status_code == 200
+
+    export = client.get("/admin/traces", headers={"X-Admin-Key": "admin-secret"}).json()
+    spans = {span["name"]: span for span in _spans(export) if span["name"] != "db.query"}
+    root = spans["POST /wallet/me/credit"]
+    assert {span["traceId"] for span in _spans(export)} == {trace_id}
+    assert root["parentSpanId"] == "00f067aa0ba902b7"
+    assert {"key": "http.status_code", "value": {"intValue": "200"}} in root["attributes"]
+    assert spans["auth.get_current_user"]["parentSpanId"] == root["spanId"]
+    service = spans["services.credit_wallet"]
+    assert service["parentSpanId"] == root["spanId"]
+    queries = [span for span in _spans(export) if span["name"] == "db.query"]
+    assert queries and all(span["parentSpanId"] == service["spanId"] for span in queries)
+    assert int(root["endTimeUnixNano"]) >= int(service["endTimeUnixNano"])
+
+
+def test_tail_sampling_keeps_only_slow_traces(client, monkeypatch):
+    headers = _auth_headers(client, "tail.user@example.com")
+    monkeypatch.setattr(tracer, "enabled", True)
+    monkeypatch.setattr(tracer, "sample_rate", 0.0)
+    monkeypatch.setattr(tracer, "tail_sample_rate", 1.0)
+    trace_buffer.clear()
+
+    monkeypatch.setattr(tracer, "slow_ns", 60 * 1_000_000_000)
+    client.get("/wallet/me", headers=headers)
+    assert trace_buffer.recent(10) == []
+
+    monkeypatch.setattr(tracer, "slow_ns", 0)
+    client.get("/wallet/me", headers=headers)
+    kept = trace_buffer.recent(10)
+    assert len(kept) == 1 and kept[0].reason == "tail"
+
+    monkeypatch.setattr(tracer, "tail_sample_rate", 0.0)
+    client.get("/wallet/me", headers=headers)
+    assert len(trace_buffer.recent(10)) == 1
+
+
+def test_disabled_tracer_records_nothing(client, monkeypatch):
+    monkeypatch.setattr(tracer, "enabled", False)
+    trace_buffer.clear()
+    before = metrics.get("tracing.traces.unsampled")
+    client.get("/health")
+    assert metrics.get("tracing.traces.unsampled") == before
+    assert trace_buffer.recent(10) == []
@@ -0,0 +1,32 @@
+import json
+
+from app.traffic_capture import REDACTED, traffic_capture
+
+
+def test_capture_tokenizes_bodies_and_users(client, monkeypatch, tmp_path):
+    path = tmp_path / "traffic.jsonl"
+    monkeypatch.setattr(traffic_capture, "path", str(path))
+    monkeypatch.setattr(traffic_capture, "sample_rate", 1.0)
+    monkeypatch.setattr(traffic_capture, "_fd", None)
+    try:
+        signup = {"email": "capture.me@example.com", "full_name": "Real Name", "phone": "+15550100", "password": "secret123"}
+        client.post("/users/signup", json=signup)
+        token = client.post("/users/login", json={"email": signup["email"], "password": "secret123"}).json()
+        client.post(
+            "/orders",
+            json={"amount": "12.50", "currency": "INR", "idempotency_key": "order-1"},
+            headers={"Authorization": f"Bearer {token['access_token']}"},
+        )
+    finally:
+        traffic_capture.close()
+
+    text = path.read_text()
+    for secret in ("capture.me", "Real Name", "secret123", "order-1", token["access_token"], token["refresh_token"]):
+        assert secret not in text
+    signup_record, login_record, order_record = [json.loads(line) for line in text.splitlines()]
+    assert signup_record["body"]["email"] == login_record["body"]["email"]
+    assert login_record["body"]["password"] == REDACTED
+    assert (login_record["route"], login_record["status"]) == ("/users/login", 200)
+    assert order_record["user"] and order_record["status"] == 201
+    assert order_record["body"]["amount"] == "12.50"
+    assert order_record["body"]["idempotency_key"].startswith("idempotency_key-")
@@ -0,0 +1,89 @@
+import pytest
+from sqlalchemy import create_engine
+from sqlalchemy.exc import OperationalError
+from sqlalchemy.orm import sessionmaker
+
+from app import services
+from app.config import settings
+from app.metrics import metrics
+from app.models import Base, User
+
+
+class FakeDriverError(Exception):
+    def __init__(self, pgcode):
+        super().__init__(f"driver error {pgcode}")
+        self.pgcode = pgcode
+
+
+def _driver_error(pgcode):
+    return OperationalError("UPDATE wallets ...", {}, FakeDriverError(pgcode))
+
+
+@pytest.fixture()
+def db(monkeypatch):
+    monkeypatch.setattr(settings, "db_retry_base_delay_ms", 0)
+    engine = create_engine("sqlite+pysqlite:///:memory:")
+    Base.metadata.create_all(bind=engine)
+    session = sessionmaker(bind=engine)()
+    metrics.reset()
+    yield session
+    session.close()
+
+
+def test_transient_errors_rerun_the_whole_unit(db):
+    calls = []
+
+    def work():
+        calls.append(len(calls))
+        db.add(User(email=f"retry{len(calls)}@example.com", full_name="Retry", hashed_password="!"))
+        if len(calls) < 3:
+            db.flush()
+            raise _driver_error("40P01" if len(calls) == 1 else "40001")
+        return "done"
+
+    assert services.run_in_transaction(db, "test_unit", work) == "done"
+    assert len(calls) == 3
+    # Rolled-back attempts leave nothing behind.
+    assert [user.email for user in db.query(User).all()] == ["retry3@example.com"]
+    assert metrics.get("db_retry.test_unit.deadlock") == 1
+    assert metrics.get("db_retry.test_unit.serialization_failure") == 1
+    assert metrics.get("db_retry.test_unit.recovered") == 1
+
+
+def test_non_retryable_and_exhausted_errors_propagate(db, monkeypatch):
+    calls = []
+
+    def unique_violation():
+        calls.append(1)
+        raise _driver_error("23505")
+
+    with pytest.raises(OperationalError):
+        services.run_in_transaction(db, "test_unit", unique_violation)
+    assert len(calls) == 1
+
+    monkeypatch.setattr(settings, "db_retry_max_attempts", 3)
+    calls.clear()
+
+    def always_locked():
+        calls.append(1)
+        raise _driver_error("55P03")
+
+    with pytest.raises(OperationalError):
+        services.run_in_transaction(db, "test_unit", always_locked)
+    assert len(calls) == 3
+    assert metrics.get("db_retry.test_unit.lock_timeout") == 2
+    assert metrics.get("db_retry.test_unit.exhausted") == 1
+
+
+def test_commit_that_may_have_landed_is_not_retried(db, monkeypatch):
+    calls = []
+    lost = OperationalError("COMMIT", {}, FakeDriverError(None), connection_invalidated=True)
+
+    def fail_commit():
+        raise lost
+
+    monkeypatch.setattr(db, "commit", fail_commit)
+    with pytest.raises(OperationalError):
+        services.run_in_transaction(db, "test_unit", lambda: calls.append(1))
+    assert calls == [1]
+